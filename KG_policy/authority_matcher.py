@@ -0,0 +1,181 @@
+import csv
+import os
+import re
+import time
+
+# --- 制定机关的本地匹配器 ---
+# 在调用 LLM 之前，先用 disambiguation.py 提示词中已有的规则和机构名录在本地解析常见变体：
+# 去掉或补全“中华人民共和国”前缀、去掉“机关”后缀、统一全/半角括号，以及规则C的人大名称统一；
+# 其余名称用字符二元组 (bigram) 倒排索引与名录做模糊匹配。每个结果都带有置信度。
+# 只有确定性规则的结果可以直接采用；模糊匹配分不清“食品药品监督管理局”与“药品监督管理局”、
+# “林业厅”与“林业局”这类改名或升格前后的不同机构，其候选只写入审计日志，名称仍交给 LLM 处理。
+
+COUNTRY_PREFIX = "中华人民共和国"
+ORGAN_SUFFIX = "机关"
+NPC_OUTPUT_FORMAT = "{region}人民代表大会 (含常务委员会)"  # 规则C的统一格式
+
+# 各类规则命中时的置信度
+EXACT_CONFIDENCE = 1.0
+NORMALIZED_CONFIDENCE = 0.99  # 仅空白或括号不同
+AFFIX_CONFIDENCE = 0.97  # 补全/去掉“中华人民共和国”前缀或去掉“机关”后缀后命中名录
+NPC_RULE_CONFIDENCE = 0.97  # 规则C
+DETERMINISTIC_RULES = ('empty', 'npc_rule_c', 'exact', 'normalized', 'affix')  # 可直接采用的规则
+FUZZY_MIN_MARGIN = 0.1  # 模糊匹配时最佳候选与次佳候选的最小分差，分差不足视为有歧义
+FUZZY_MAX_LENGTH_DIFF = 2  # 模糊匹配时与候选名称的最大长度差，防止“浙江省人民政府”被匹配为“浙江省人民政府办公厅”
+
+_NPC_REGEX = re.compile(
+    r'^(?P<region>全国|.+?(?:省|自治区|市|自治州|州|盟|县|自治县|旗|区))'
+    r'(?:人民代表大会常务委员会|人民代表大会|人大常务委员会|人大常委会|人大)$'
+)
+
+# 名称开头的行政区划 (可带“中共”前缀)，模糊匹配要求两边一致，防止“湖北省…厅”匹配到“浙江省…厅”
+_REGION_PREFIX_REGEX = re.compile(r'^(?:中共)?(.{2,3}?(?:省|自治区|市|县|区))')
+
+AUDIT_LOG_COLUMNS = ['Timestamp', 'RawName', 'NormalizedName', 'Result', 'Confidence', 'Rule', 'Candidate',
+                     'RunnerUpScore', 'Accepted']
+
+
+def normalize_for_matching(name):
+    """ 去掉所有空白，半角括号统一为全角 """
+    name = re.sub(r'\s+', '', name or '')
+    return name.replace('(', '（').replace(')', '）')
+
+
+def _bigrams(name):
+    return {name[i:i + 2] for i in range(len(name) - 1)} if len(name) > 1 else {name}
+
+
+def _region_prefix(name):
+    region_match = _REGION_PREFIX_REGEX.match(name)
+    return region_match.group(1) if region_match else None
+
+
+def _strip_country_prefix(name):
+    return name[len(COUNTRY_PREFIX):] if name.startswith(COUNTRY_PREFIX) and len(name) > len(COUNTRY_PREFIX) else name
+
+
+def build_local_matcher(canonical_names):
+    """
+    根据名录构建匹配器：规范化名称 → 名录原名的映射，以及去掉国名前缀后的 bigram 倒排索引。
+    """
+    by_normalized = {}
+    by_stripped = {}
+    for canonical_name in sorted(canonical_names):
+        normalized = normalize_for_matching(canonical_name)
+        by_normalized[normalized] = canonical_name
+        by_stripped.setdefault(_strip_country_prefix(normalized), canonical_name)
+
+    stripped_names = list(by_stripped)
+    bigram_index = {}
+    for i, stripped in enumerate(stripped_names):
+        for bigram in _bigrams(stripped):
+            bigram_index.setdefault(bigram, []).append(i)
+    return {
+        'canonical_names': set(canonical_names),
+        'by_normalized': by_normalized,
+        'by_stripped': by_stripped,
+        'stripped_names': stripped_names,
+        'bigram_counts': [len(_bigrams(stripped)) for stripped in stripped_names],
+        'bigram_index': bigram_index,
+    }
+
+
+def _result(standardized_name, confidence, rule, candidate=None, runner_up_score=None):
+    return {
+        'standardized_name': standardized_name,
+        'confidence': confidence,
+        'rule': rule,
+        'candidate': candidate,
+        'runner_up_score': runner_up_score,
+    }
+
+
+def _lookup_with_affixes(matcher, normalized):
+    """ 依次尝试：原样、去掉“机关”后缀、补全或去掉“中华人民共和国”前缀 """
+    base_names = [normalized]
+    if normalized.endswith(ORGAN_SUFFIX) and len(normalized) > len(ORGAN_SUFFIX):
+        base_names.append(normalized[:-len(ORGAN_SUFFIX)])
+    for i, base_name in enumerate(base_names):
+        if base_name in matcher['by_normalized']:
+            return matcher['by_normalized'][base_name], i > 0
+        canonical_name = matcher['by_stripped'].get(_strip_country_prefix(base_name))
+        if canonical_name is not None:
+            return canonical_name, True
+    return None, False
+
+
+def _fuzzy_match(matcher, normalized):
+    """ bigram Dice 系数模糊匹配，返回 (最佳候选, 得分, 次佳得分) """
+    query = _strip_country_prefix(normalized)
+    if query.endswith(ORGAN_SUFFIX) and len(query) > len(ORGAN_SUFFIX):
+        query = query[:-len(ORGAN_SUFFIX)]
+    query_bigrams = _bigrams(query)
+    overlaps = {}
+    for bigram in query_bigrams:
+        for i in matcher['bigram_index'].get(bigram, ()):
+            overlaps[i] = overlaps.get(i, 0) + 1
+    if not overlaps:
+        return None, 0.0, 0.0
+
+    scored = sorted(
+        ((2 * overlap / (len(query_bigrams) + matcher['bigram_counts'][i]), i) for i, overlap in overlaps.items()),
+        reverse=True,
+    )
+    best_score, best_index = scored[0]
+    runner_up_score = scored[1][0] if len(scored) > 1 else 0.0
+    best_stripped = matcher['stripped_names'][best_index]
+    # 长度差过大或一方包含另一方时通常是上下级机构 (如 人民政府 / 人民政府办公厅)，行政区划不同则是另一地的同类机构，
+    # 这些情况都不能视为同一机构
+    if abs(len(best_stripped) - len(query)) > FUZZY_MAX_LENGTH_DIFF or query in best_stripped or best_stripped in query \
+            or _region_prefix(query) != _region_prefix(best_stripped):
+        best_score = 0.0
+    return matcher['by_stripped'][best_stripped], best_score, runner_up_score
+
+
+def match_authority_locally(matcher, authority_name_raw):
+    """
+    在本地解析一个制定机关名称，返回结果字典：
+    standardized_name (未找到时为 None)、confidence、rule、candidate (模糊匹配的最佳候选)、runner_up_score。
+    是否采用由调用方决定：只有 rule 属于 DETERMINISTIC_RULES 的结果可以直接采用，fuzzy_bigram 仅作参考。
+    """
+    normalized = normalize_for_matching(authority_name_raw)
+    if not normalized:
+        return _result("", EXACT_CONFIDENCE, 'empty')
+
+    # 规则C：任何级别的人大或人大常委会统一为“<行政区划>人民代表大会 (含常务委员会)”
+    npc_match = _NPC_REGEX.match(normalized[:-len(ORGAN_SUFFIX)] if normalized.endswith(ORGAN_SUFFIX) else normalized)
+    if npc_match:
+        return _result(NPC_OUTPUT_FORMAT.format(region=npc_match.group('region')), NPC_RULE_CONFIDENCE, 'npc_rule_c')
+
+    if authority_name_raw.strip() in matcher['canonical_names']:
+        return _result(authority_name_raw.strip(), EXACT_CONFIDENCE, 'exact')
+    if normalized in matcher['by_normalized']:
+        return _result(matcher['by_normalized'][normalized], NORMALIZED_CONFIDENCE, 'normalized')
+
+    canonical_name, used_affix = _lookup_with_affixes(matcher, normalized)
+    if canonical_name is not None:
+        return _result(canonical_name, AFFIX_CONFIDENCE if used_affix else NORMALIZED_CONFIDENCE, 'affix')
+
+    candidate, score, runner_up_score = _fuzzy_match(matcher, normalized)
+    if candidate is not None and score - runner_up_score >= FUZZY_MIN_MARGIN:
+        return _result(candidate, round(score, 4), 'fuzzy_bigram', candidate, round(runner_up_score, 4))
+    return _result(None, round(score, 4), 'no_match', candidate, round(runner_up_score, 4))
+
+
+def append_audit_log(log_path, entries):
+    """
+    将本地匹配结果追加写入审计日志 CSV (每行一个名称，含未采用的候选)，用于调整阈值。
+    entries 为 (原始名称, 结果字典, 是否采用) 的列表。
+    """
+    if not log_path or not entries:
+        return
+    write_header = not os.path.isfile(log_path)
+    timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
+    with open(log_path, 'a', encoding='utf-8-sig' if write_header else 'utf-8', newline='') as f:
+        writer = csv.writer(f)
+        if write_header:
+            writer.writerow(AUDIT_LOG_COLUMNS)
+        for raw_name, result, accepted in entries:
+            writer.writerow([timestamp, raw_name, normalize_for_matching(raw_name), result['standardized_name'] or '',
+                             result['confidence'], result['rule'], result['candidate'] or '',
+                             '' if result['runner_up_score'] is None else result['runner_up_score'], accepted])
@@ -0,0 +1,198 @@
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import data_clean as dc
+from synthetic_corpus import FILES_PER_CATEGORY, RANDOM_SEED, generate_corpus
+
+# --- data_clean.py 性能基准 ---
+# 在合成语料 (synthetic_corpus.py) 上分别测量全文清洗、文件匹配、后处理以及完整流程的吞吐量和峰值内存，
+# 结果写入 JSON 文件，便于在不同版本之间对比。每个阶段都在新启动的子进程中运行，
+# 因此峰值 RSS 只反映该阶段 (含其准备工作) 的内存占用，互不干扰。
+
+# --- 配置信息 ---
+CORPUS_DIR = "benchmark_corpus"
+OUTPUT_JSON_FILE = "benchmark_results.json"
+REPEATS = 3  # 每个阶段重复次数，报告最快一次的耗时
+STAGES = ["clean_text_content", "match_files", "postprocess", "postprocess_columnar", "main"]
+
+
+def peak_rss_mb():
+    """ 返回当前进程的峰值常驻内存 (MB)；平台不支持时返回 None """
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 上单位为 KB，macOS 上单位为字节
+        return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 1024 / 1024
+    except (ImportError, AttributeError):
+        return None
+
+
+def git_revision():
+    """ 返回当前代码的 git 提交哈希，不在 git 仓库中时返回 None """
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _prepare_states():
+    """ 读取所有分类目录并匹配全文文件 """
+    return [state for state in (dc.prepare_category(category) for category in dc.CATEGORIES) if state is not None]
+
+
+def _all_jobs(states):
+    return [job for state in states for job in state['jobs']]
+
+
+def _jobs_bytes(jobs):
+    return sum(os.path.getsize(path) for path, _ in jobs)
+
+
+def _clean_all(jobs):
+    return [dc.read_policy_text(path, title) for path, title in jobs]
+
+
+def _timed(func, repeats):
+    """ 重复执行 func，返回 (最快一次的秒数, 最后一次的返回值) """
+    best, result = None, None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run_stage(stage, corpus_dir, repeats, num_workers):
+    """
+    在子进程中运行单个阶段，返回该阶段的测量结果字典。
+    data_clean.py 的逐条输出在测量期间被丢弃，避免终端输出影响计时。
+    """
+    dc.BASE_DIR = corpus_dir
+    dc.NUM_WORKERS = num_workers
+    with contextlib.redirect_stdout(io.StringIO()):
+        if stage == "clean_text_content":
+            jobs = _all_jobs(_prepare_states())
+            seconds, _ = _timed(lambda: [dc.clean_text_content(path, title) for path, title in jobs], repeats)
+            files, size = len(jobs), _jobs_bytes(jobs)
+
+        elif stage == "match_files":
+            # 预先解析 Excel 目录，计时只覆盖列目录、建索引和逐行匹配
+            catalogs = {}
+            for category in dc.CATEGORIES:
+                excel_filepath = os.path.join(corpus_dir, category, f"{category}目录.xlsx")
+                if os.path.isfile(excel_filepath):
+                    catalogs[excel_filepath] = dc.read_catalog(excel_filepath)
+            dc.read_catalog = lambda excel_filepath, *args, **kwargs: catalogs[excel_filepath].copy()
+            seconds, states = _timed(_prepare_states, repeats)
+            jobs = _all_jobs(states)
+            files, size = sum(len(state['df']) for state in states), _jobs_bytes(jobs)
+
+        elif stage in ("postprocess", "postprocess_columnar"):
+            columnar = stage == "postprocess_columnar"
+            finalize = dc.finalize_category_columnar if columnar else dc.finalize_category
+            states = _prepare_states()
+            jobs = _all_jobs(states)
+            cleaned = _clean_all(jobs)
+
+            def postprocess():
+                results = iter(cleaned)
+                dfs = [finalize(dict(state, df=state['df'].copy()), results)[0] for state in states]
+                return dc.postprocess_combined_df(pd.concat(dfs, ignore_index=True, sort=False), columnar=columnar)
+
+            seconds, _ = _timed(postprocess, repeats)
+            files, size = len(jobs), _jobs_bytes(jobs)
+
+        elif stage == "main":
+            seconds, _ = _timed(dc.main, repeats)
+            jobs = _all_jobs(_prepare_states())
+            files, size = len(jobs), _jobs_bytes(jobs)
+
+        else:
+            raise ValueError(f"未知的基准阶段: {stage}")
+
+    return {
+        'stage': stage,
+        'files': files,
+        'megabytes': round(size / 1024 / 1024, 3),
+        'seconds': round(seconds, 4),
+        'files_per_sec': round(files / seconds, 2) if seconds else None,
+        'mb_per_sec': round(size / 1024 / 1024 / seconds, 3) if seconds else None,
+        'peak_rss_mb': round(peak_rss_mb(), 1) if peak_rss_mb() is not None else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="data_clean.py 性能基准")
+    parser.add_argument("--corpus-dir", default=CORPUS_DIR)
+    parser.add_argument("--files-per-category", type=int, default=FILES_PER_CATEGORY)
+    parser.add_argument("--seed", type=int, default=RANDOM_SEED)
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--workers", type=int, default=dc.NUM_WORKERS, help="main 阶段使用的 NUM_WORKERS")
+    parser.add_argument("--stages", nargs="+", default=STAGES, choices=STAGES)
+    parser.add_argument("--output", default=OUTPUT_JSON_FILE)
+    parser.add_argument("--regenerate", action="store_true", help="即使语料目录已存在也重新生成")
+    args = parser.parse_args()
+
+    corpus_dir = os.path.abspath(args.corpus_dir)
+    corpus_stats = None
+    if args.regenerate or not os.path.isdir(corpus_dir):
+        print(f"正在生成合成语料到 {corpus_dir} ...")
+        corpus_stats = generate_corpus(corpus_dir, args.files_per_category, seed=args.seed)
+        print(f"生成 {corpus_stats['files']} 个全文文件，共 {corpus_stats['bytes'] / 1024 / 1024:.2f} MB。")
+    else:
+        print(f"使用已有语料目录 {corpus_dir} (如需重新生成请加 --regenerate)。")
+
+    results = []
+    for stage in args.stages:
+        # 每个阶段使用新的子进程 (spawn)，保证峰值内存互不影响
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            result = executor.submit(run_stage, stage, corpus_dir, args.repeats, args.workers).result()
+        results.append(result)
+        print(f"  {stage:<22} {result['files']:>7} 个文件  {result['seconds']:>9.3f} 秒  "
+              f"{result['files_per_sec'] or 0:>10.1f} 文件/秒  {result['mb_per_sec'] or 0:>8.2f} MB/秒  "
+              f"峰值 RSS {result['peak_rss_mb']} MB")
+
+    report = {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'corpus': {
+            'dir': corpus_dir,
+            'files_per_category': args.files_per_category,
+            'seed': args.seed,
+            'generated': corpus_stats,
+        },
+        'config': {
+            'repeats': args.repeats,
+            'num_workers': args.workers,
+        },
+        'stages': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n基准结果已保存到 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,30 @@
 import os
 import pandas as pd
 import openai  # openai library is used for DeepSeek
+import asyncio
 import time
 import json
 
+from fulltext_store import fulltext_store_dir_for, load_full_text
+from llm_checkpoint import (append_checkpoint, input_fingerprint, load_checkpoint, lookup_checkpoint,
+                            open_checkpoint, stage_version)
+from near_duplicates import load_canonical_map
+
 # --- DeepSeek API 配置 ---
 DEEPSEEK_API_KEY = "sk-xxx" # <--- User-provided key, ensure it's intended or replace
 DEEPSEEK_BASE_URL = "https://api.deepseek.com"
 DEEPSEEK_MODEL = "deepseek-chat "
 
+MAX_PROMPT_TEXT_LENGTH = 15000  # 从全文存储加载的全文在提示中的最大长度 (与旧版 data_clean.py 的截断长度一致)
+POLICY_ID_COLUMN = "编号"  # 政策唯一标识列
+NEAR_DUPLICATE_CLUSTERS_CSV = None  # near_duplicates.py 输出的近重复簇文件；设置后近重复政策直接复用规范政策的抽取结果
+CHECKPOINT_FILENAME = "core_entity_types.checkpoint.jsonl"  # 断点续跑检查点 (与输入 CSV 位于同一目录)；None 为不使用
+EXTRACTION_PROMPT_VERSION = 1  # 修改提示词后递增，使检查点中按旧提示词得到的结果失效
+COMBINED_EXTRACTION_MODE = True  # 一次调用同时抽取全部5类实体，未通过校验的字段再单独调用；False 为逐类调用
+API_CALL_DELAY_SECONDS = 3  # 每次API调用后的等待时间 (仅同步模式)
+USE_ASYNC_WORKERS = True  # 使用 AsyncOpenAI 并发处理多条政策；False 为逐条同步调用
+CONCURRENCY_LIMIT = 8  # 异步模式下同时处理的政策数上限
+
 client = None
 if DEEPSEEK_API_KEY != "YOUR_DEEPSEEK_API_KEY" and DEEPSEEK_API_KEY:
     try:
@@ -165,52 +181,186 @@ JSON Output:
     return prompt
 
 
+def construct_combined_entity_prompt(policy_title, policy_full_text):
+    """
+    为全部实体类型构建一个合并的Prompt，要求在一个JSON对象中同时返回各类实体。
+    """
+    entity_sections = []
+    for entity_name, entity_info in ENTITY_DEFINITIONS.items():
+        example_list_str = ""
+        if entity_name in ["PolicyTopic", "PolicyTool", "TargetBeneficiary", "IndustryFocus"]:
+            example_list_str = "预定义的候选列表如下 (请不要在回答中包含序号):\n"
+            for item in entity_info["examples"]:
+                example_list_str += f"- {item}\n"
+        entity_sections.append(f"""### 实体类型 "{entity_name}"
+描述: {entity_info["description"]}
+{example_list_str}
+指示: {entity_info["instruction"]}
+""")
+    entity_sections_str = "\n".join(entity_sections)
+    json_keys_str = ",\n".join(f'  "{entity_name}": ["提取结果1;提取结果2"]' for entity_name in ENTITY_DEFINITIONS)
+
+    prompt = f"""
+请你扮演一位专业的政策分析助手。根据以下提供的政策标题和政策全文内容，同时提取下列 {len(ENTITY_DEFINITIONS)} 类实体的信息。
+
+{entity_sections_str}
+对每一类实体，请尽可能根据文本推断。只有文本为空或者完全没有提及任何相关信息，或者该实体类型不适用，才为该实体返回一个空列表。
+否则尽量不要返回空列表。
+
+政策标题:
+{policy_title}
+
+政策全文内容:
+{policy_full_text}
+
+请严格按照以下JSON格式输出，必须包含全部 {len(ENTITY_DEFINITIONS)} 个键。每个键的值是一个列表：选择多项时将它们放在一个字符串中并用半角分号 ";" 隔开，
+不在列表中时按指示输出"其他（实际描述）"，信息确实且无法推断/该实体类型不适用时为空列表 []：
+{{
+{json_keys_str}
+}}
+
+JSON Output:
+"""
+    return prompt
+
+
+def _parse_json_content(content):
+    """ 清理可能的Markdown代码块标记后解析JSON """
+    if content.strip().startswith("```json"):
+        content = content.strip()[7:-3].strip()
+    elif content.strip().startswith("```"):
+        content = content.strip()[3:-3].strip()
+    return json.loads(content)
+
+
+def _entity_value_to_list(extracted_values_raw):
+    """
+    将API返回的单个实体值统一为列表：[] 或仅含一个字符串 (可能含分号或为 "其他(...)") 的列表。
+    值的类型不符合约定时返回 None。
+    """
+    # API 可能直接返回一个包含单个字符串（可能含分号）的列表，或者空列表
+    if isinstance(extracted_values_raw, list):
+        if not extracted_values_raw:  # 空列表
+            return []
+        single_string_result = extracted_values_raw[0]
+        if isinstance(single_string_result, str) and single_string_result.strip():
+            return [single_string_result.strip()]
+        return None
+    if isinstance(extracted_values_raw, str):  # 模型有时可能不按列表格式返回
+        return [extracted_values_raw.strip()] if extracted_values_raw.strip() else []
+    return None
+
+
+def validate_entity_value(entity_name, extracted_list):
+    """
+    校验合并抽取中单个字段的结果：类型必须正确；有预定义列表的实体，每一项都必须来自列表或为 "其他(...)"。
+    """
+    if extracted_list is None:
+        return False
+    if not extracted_list or entity_name not in ["PolicyTopic", "PolicyTool", "TargetBeneficiary", "IndustryFocus"]:
+        return True
+    allowed_items = set(ENTITY_DEFINITIONS[entity_name]["examples"])
+    for item in extracted_list[0].split(';'):
+        item = item.strip()
+        if item and item not in allowed_items and not item.startswith("其他"):
+            return False
+    return True
+
+
+def _combined_request_kwargs(policy_title, policy_full_text):
+    """ 合并抽取请求的参数 (同步与异步客户端共用) """
+    return dict(
+        model=DEEPSEEK_MODEL,
+        messages=[
+            {"role": "system",
+             "content": "你是一位专业的政策文本分析助手，需要从文本中同时提取多类指定信息，并严格按照指示的JSON格式和内容要求返回。"},
+            {"role": "user", "content": construct_combined_entity_prompt(policy_title, policy_full_text)}
+        ],
+        temperature=0.1,
+        max_tokens=2048,  # 5类实体的结果，包括较长的 "其他(...)" 描述
+        stream=False
+    )
+
+
+def _single_entity_request_kwargs(policy_title, policy_full_text, entity_name, entity_info):
+    """ 单个实体类型请求的参数 (同步与异步客户端共用) """
+    return dict(
+        model=DEEPSEEK_MODEL,
+        messages=[
+            {"role": "system",
+             "content": f"你是一位专业的政策文本分析助手，需要从文本中提取指定的 '{entity_name}' 信息，并严格按照指示的JSON格式和内容要求返回。"},
+            {"role": "user", "content": construct_single_entity_prompt(policy_title, policy_full_text, entity_name, entity_info)}
+        ],
+        temperature=0.1,  # 更低的温度以获取更确定的、基于列表的分类结果
+        max_tokens=1024,  # 允许返回较长的 "其他(...)" 或多个分号分隔的项
+        stream=False
+    )
+
+
+def _parse_combined_response(content):
+    """ 解析合并抽取的响应，返回 {实体类型: 列表或 None}；JSON 无法解析时抛出 json.JSONDecodeError """
+    extracted_json = _parse_json_content(content)
+    if not isinstance(extracted_json, dict):
+        raise json.JSONDecodeError("JSON 顶层不是对象", content, 0)
+
+    results = {}
+    for entity_name in ENTITY_DEFINITIONS:
+        extracted_list = _entity_value_to_list(extracted_json.get(entity_name)) \
+            if entity_name in extracted_json else None
+        results[entity_name] = extracted_list if validate_entity_value(entity_name, extracted_list) else None
+    return results
+
+
+def call_deepseek_api_combined(policy_title, policy_full_text, retries=3, delay=5):
+    """
+    一次API调用抽取全部实体类型。返回 {实体类型: 列表或 None}，None 表示该字段缺失或未通过校验，
+    需要单独重新抽取；整个调用失败时所有字段均为 None。
+    """
+    failed_fields = {entity_name: None for entity_name in ENTITY_DEFINITIONS}
+    if not client:
+        return failed_fields
+
+    request_kwargs = _combined_request_kwargs(policy_title, policy_full_text)
+    for attempt in range(retries):
+        try:
+            response = client.chat.completions.create(**request_kwargs)
+            content = response.choices[0].message.content
+            return _parse_combined_response(content)
+
+        except openai.RateLimitError as e:
+            print(f"  - API速率限制错误 (合并抽取，尝试 {attempt + 1}/{retries}): {e}. 等待 {delay * (attempt + 1)} 秒后重试...")
+            time.sleep(delay * (attempt + 1))
+        except json.JSONDecodeError as e:
+            print(f"  - JSON解析API响应时出错 (合并抽取，尝试 {attempt + 1}/{retries}): {e}")
+            print(f"  - 原始响应内容: {content if 'content' in locals() else 'N/A'}")
+            if attempt == retries - 1: return failed_fields
+            time.sleep(delay)
+        except Exception as e:
+            print(f"  - 调用API时发生错误 (合并抽取，尝试 {attempt + 1}/{retries}): {e}")
+            if attempt == retries - 1: return failed_fields
+            time.sleep(delay)
+    return failed_fields
+
+
 def call_deepseek_api_for_entity(policy_title, policy_full_text, entity_name, entity_info, retries=3, delay=5):
+    """
+    单独抽取一个实体类型，返回列表 (没有相关信息时为空列表)；
+    重试用尽仍失败时返回 None，调用方据此不把该政策写入检查点，重新运行时会再次处理。
+    """
     if not client:
         print(f"  - DeepSeek client not initialized. Skipping API call for {entity_name}.")
-        return []
+        return None
 
-    prompt = construct_single_entity_prompt(policy_title, policy_full_text, entity_name, entity_info)
+    request_kwargs = _single_entity_request_kwargs(policy_title, policy_full_text, entity_name, entity_info)
 
     for attempt in range(retries):
         try:
-            response = client.chat.completions.create(
-                model=DEEPSEEK_MODEL,
-                messages=[
-                    {"role": "system",
-                     "content": f"你是一位专业的政策文本分析助手，需要从文本中提取指定的 '{entity_name}' 信息，并严格按照指示的JSON格式和内容要求返回。"},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,  # 更低的温度以获取更确定的、基于列表的分类结果
-                max_tokens=1024,  # 允许返回较长的 "其他(...)" 或多个分号分隔的项
-                stream=False
-            )
+            response = client.chat.completions.create(**request_kwargs)
 
             content = response.choices[0].message.content
-            # 清理可能的Markdown代码块标记
-            if content.strip().startswith("```json"):
-                content = content.strip()[7:-3].strip()
-            elif content.strip().startswith("```"):
-                content = content.strip()[3:-3].strip()
-
-            extracted_json = json.loads(content)
-            extracted_values_raw = extracted_json.get(entity_name, [])
-
-            # API 可能直接返回一个包含单个字符串（可能含分号）的列表，或者空列表
-            if isinstance(extracted_values_raw, list):
-                if not extracted_values_raw:  # 空列表
-                    return []
-                # 如果列表非空，我们期望的是单个字符串，这个字符串内部可能包含分号
-                # 或者是一个 "其他(...)" 形式的字符串
-                single_string_result = extracted_values_raw[0]
-                if isinstance(single_string_result, str) and single_string_result.strip():
-                    return [single_string_result.strip()]  # 返回包含这个处理后字符串的列表
-                else:
-                    return []  # 如果列表中的元素不是有效字符串
-            elif isinstance(extracted_values_raw, str) and extracted_values_raw.strip():  # 模型有时可能不按列表格式返回
-                return [extracted_values_raw.strip()]
-            else:
-                return []  # 其他意外情况
+            extracted_json = _parse_json_content(content)
+            # 如果列表非空，我们期望的是单个字符串，这个字符串内部可能包含分号，或者是一个 "其他(...)" 形式的字符串
+            return _entity_value_to_list(extracted_json.get(entity_name, [])) or []
 
         except openai.RateLimitError as e:
             print(
@@ -218,32 +368,259 @@ def call_deepseek_api_for_entity(policy_title, policy_full_text, entity_name, en
             time.sleep(delay * (attempt + 1))
         except openai.APIError as e:
             print(f"  - DeepSeek API 错误 for {entity_name} (尝试 {attempt + 1}/{retries}): {e}")
-            if attempt == retries - 1: return []
+            if attempt == retries - 1: return None
             time.sleep(delay)
         except json.JSONDecodeError as e:
             print(f"  - JSON解析API响应时出错 for {entity_name} (尝试 {attempt + 1}/{retries}): {e}")
             print(f"  - 原始响应内容: {content if 'content' in locals() else 'N/A'}")
-            if attempt == retries - 1: return []
+            if attempt == retries - 1: return None
             time.sleep(delay)
         except Exception as e:
             print(f"  - 调用API时发生未知错误 for {entity_name} (尝试 {attempt + 1}/{retries}): {e}")
-            if attempt == retries - 1: return []
+            if attempt == retries - 1: return None
             time.sleep(delay)
-    return []
+    return None
 
 
-def supplement_policy_data_with_deepseek(csv_file_path):
+async def call_deepseek_api_combined_async(aclient, policy_title, policy_full_text, retries=3, delay=5):
+    """ call_deepseek_api_combined 的异步版本，重试等待期间不占用事件循环 """
+    failed_fields = {entity_name: None for entity_name in ENTITY_DEFINITIONS}
+    request_kwargs = _combined_request_kwargs(policy_title, policy_full_text)
+    for attempt in range(retries):
+        try:
+            response = await aclient.chat.completions.create(**request_kwargs)
+            content = response.choices[0].message.content
+            return _parse_combined_response(content)
+
+        except openai.RateLimitError as e:
+            print(f"  - API速率限制错误 (合并抽取，尝试 {attempt + 1}/{retries}): {e}. 等待 {delay * (attempt + 1)} 秒后重试...")
+            await asyncio.sleep(delay * (attempt + 1))
+        except json.JSONDecodeError as e:
+            print(f"  - JSON解析API响应时出错 (合并抽取，尝试 {attempt + 1}/{retries}): {e}")
+            if attempt == retries - 1: return failed_fields
+            await asyncio.sleep(delay)
+        except Exception as e:
+            print(f"  - 调用API时发生错误 (合并抽取，尝试 {attempt + 1}/{retries}): {e}")
+            if attempt == retries - 1: return failed_fields
+            await asyncio.sleep(delay)
+    return failed_fields
+
+
+async def call_deepseek_api_for_entity_async(aclient, policy_title, policy_full_text, entity_name, entity_info,
+                                             retries=3, delay=5):
+    """ call_deepseek_api_for_entity 的异步版本，失败时同样返回 None """
+    request_kwargs = _single_entity_request_kwargs(policy_title, policy_full_text, entity_name, entity_info)
+    for attempt in range(retries):
+        try:
+            response = await aclient.chat.completions.create(**request_kwargs)
+            content = response.choices[0].message.content
+            extracted_json = _parse_json_content(content)
+            return _entity_value_to_list(extracted_json.get(entity_name, [])) or []
+
+        except openai.RateLimitError as e:
+            print(f"  - API速率限制错误 for {entity_name} (尝试 {attempt + 1}/{retries}): {e}. 等待 {delay * (attempt + 1)} 秒后重试...")
+            await asyncio.sleep(delay * (attempt + 1))
+        except json.JSONDecodeError as e:
+            print(f"  - JSON解析API响应时出错 for {entity_name} (尝试 {attempt + 1}/{retries}): {e}")
+            if attempt == retries - 1: return None
+            await asyncio.sleep(delay)
+        except Exception as e:
+            print(f"  - 调用API时发生错误 for {entity_name} (尝试 {attempt + 1}/{retries}): {e}")
+            if attempt == retries - 1: return None
+            await asyncio.sleep(delay)
+    return None
+
+
+async def extract_policy_entities_async(aclient, policy_title, full_text_cell, fulltext_store_dir,
+                                        semaphore, row_position):
+    """
+    在信号量限制下完成一条政策的全部抽取 (合并调用 + 未通过校验字段的单独调用)。
+    返回 (行位置, {实体类型: 字符串})；标题和全文均为空时结果为 None，不调用API。
+    单独调用重试用尽仍失败的字段值为 None (与没有相关信息的空字符串区分)，该政策不写入检查点。
+    全文在取得信号量之后才加载，内存中最多同时保留 CONCURRENCY_LIMIT 篇全文。
+    """
+    async with semaphore:
+        policy_full_text = load_full_text(full_text_cell, fulltext_store_dir, max_length=MAX_PROMPT_TEXT_LENGTH)
+        if not policy_full_text and not policy_title:
+            return row_position, None
+
+        combined_results = {}
+        if COMBINED_EXTRACTION_MODE:
+            combined_results = await call_deepseek_api_combined_async(aclient, policy_title, policy_full_text)
+
+        results = {}
+        for entity_name, entity_info in ENTITY_DEFINITIONS.items():
+            extracted_list = combined_results.get(entity_name)
+            if extracted_list is None:
+                extracted_list = await call_deepseek_api_for_entity_async(aclient, policy_title, policy_full_text,
+                                                                          entity_name, entity_info)
+            if extracted_list is None:
+                results[entity_name] = None
+            else:
+                results[entity_name] = extracted_list[0] if extracted_list else ""
+    return row_position, results
+
+
+def read_policy_csv(csv_file_path):
+    """ 读取待补充的政策CSV，失败时返回 None """
     print(f"尝试读取CSV文件: {csv_file_path}")
     try:
         df = pd.read_csv(csv_file_path)
         print(f"成功读取 {len(df)} 条数据。")
+        return df
     except FileNotFoundError:
         print(f"错误: 文件 '{csv_file_path}' 未找到.")
-        return None
     except Exception as e:
         print(f"读取CSV文件 '{csv_file_path}' 时发生错误: {e}")
+    return None
+
+
+def open_extraction_checkpoint(csv_file_path):
+    """ 读取并以追加模式打开输入 CSV 同目录下的检查点，返回 (已完成记录, 文件句柄, 阶段版本) """
+    checkpoint_version = stage_version("core_entity_types", EXTRACTION_PROMPT_VERSION, DEEPSEEK_MODEL, ENTITY_DEFINITIONS,
+                                       COMBINED_EXTRACTION_MODE)
+    if not CHECKPOINT_FILENAME:
+        return {}, None, checkpoint_version
+    checkpoint_path = os.path.join(os.path.dirname(os.path.abspath(csv_file_path)), CHECKPOINT_FILENAME)
+    checkpoint_records = load_checkpoint(checkpoint_path, checkpoint_version)
+    if checkpoint_records:
+        print(f"已从检查点 {checkpoint_path} 加载 {len(checkpoint_records)} 条已完成的政策，将跳过这些政策。")
+    return checkpoint_records, open_checkpoint(checkpoint_path), checkpoint_version
+
+
+async def supplement_policy_data_async(csv_file_path):
+    """
+    supplement_policy_data_with_deepseek 的并发版本：最多 CONCURRENCY_LIMIT 条政策同时调用API，
+    结果按列累积在列表中，全部完成后一次性写入 DataFrame；每完成一条政策立即追加到检查点。
+    """
+    df = read_policy_csv(csv_file_path)
+    if df is None:
         return None
 
+    fulltext_store_dir = fulltext_store_dir_for(csv_file_path)
+    canonical_map = load_canonical_map(NEAR_DUPLICATE_CLUSTERS_CSV)
+    if canonical_map:
+        print(f"已加载近重复簇，{len(canonical_map)} 条政策可复用规范政策的抽取结果。")
+    checkpoint_records, checkpoint_handle, checkpoint_version = open_extraction_checkpoint(csv_file_path)
+
+    # 按列累积结果，下标为行位置
+    extracted_columns = {entity_name: [None] * len(df) for entity_name in ENTITY_DEFINITIONS}
+    extracted_by_policy_id = {}  # 已完成抽取的政策编号 -> {实体类型: 结果}
+    scheduled_policy_ids = set()  # 已有结果或已排队抽取的政策编号
+    reused_rows = []  # (行位置, 规范政策编号)，所有任务完成后再复用
+    row_info = {}  # 行位置 -> (政策编号, 输入指纹)
+    checkpoint_hits = 0
+
+    def store_row(row_position, results):
+        for entity_name in ENTITY_DEFINITIONS:
+            extracted_columns[entity_name][row_position] = results.get(entity_name, "")
+
+    aclient = openai.AsyncOpenAI(api_key=DEEPSEEK_API_KEY, base_url=DEEPSEEK_BASE_URL) if client else None
+    semaphore = asyncio.Semaphore(CONCURRENCY_LIMIT)
+    tasks = []
+    titles = df['标题'] if '标题' in df.columns else pd.Series([None] * len(df), index=df.index)
+    full_text_cells = df['全文内容'] if '全文内容' in df.columns else pd.Series([None] * len(df), index=df.index)
+    policy_ids = df[POLICY_ID_COLUMN] if POLICY_ID_COLUMN in df.columns else pd.Series([None] * len(df), index=df.index)
+
+    for row_position, (title_value, full_text_cell, policy_id_value) in enumerate(
+            zip(titles.tolist(), full_text_cells.tolist(), policy_ids.tolist())):
+        policy_title = str(title_value) if pd.notna(title_value) else ""
+        policy_id = str(policy_id_value) if pd.notna(policy_id_value) else ""
+        fingerprint = input_fingerprint(policy_title, full_text_cell)
+
+        found, checkpoint_result = lookup_checkpoint(checkpoint_records, policy_id, fingerprint)
+        if found:
+            store_row(row_position, checkpoint_result)
+            extracted_by_policy_id[policy_id] = {
+                entity_name: checkpoint_result.get(entity_name, "") for entity_name in ENTITY_DEFINITIONS
+            }
+            scheduled_policy_ids.add(policy_id)
+            checkpoint_hits += 1
+            continue
+
+        canonical_id = canonical_map.get(policy_id)
+        if canonical_id in scheduled_policy_ids:
+            reused_rows.append((row_position, canonical_id))
+            continue
+
+        if aclient is None:
+            store_row(row_position, {entity_name: [] for entity_name in ENTITY_DEFINITIONS})  # 存空列表
+            continue
+
+        if policy_id:
+            scheduled_policy_ids.add(policy_id)
+        row_info[row_position] = (policy_id, fingerprint)
+        tasks.append(extract_policy_entities_async(aclient, policy_title, full_text_cell, fulltext_store_dir,
+                                                   semaphore, row_position))
+
+    print(f"检查点命中 {checkpoint_hits} 条，近重复复用 {len(reused_rows)} 条，"
+          f"待抽取 {len(tasks)} 条 (并发数上限: {CONCURRENCY_LIMIT})。")
+    if aclient is None:
+        print("DeepSeek API Key 未正确配置或客户端初始化失败，跳过所有API调用。")
+
+    failed_count = 0
+    partially_failed_count = 0
+    start_time = time.time()
+    for completed_count, future in enumerate(asyncio.as_completed(tasks), start=1):
+        try:
+            row_position, results = await future
+        except Exception as e:
+            failed_count += 1
+            print(f"  - 抽取任务异常: {e}")
+            continue
+        policy_id, fingerprint = row_info[row_position]
+        if results is None:
+            print(f"  - 第 {row_position + 1} 条政策标题和全文内容均为空，跳过API调用。")
+            store_row(row_position, {entity_name: [] for entity_name in ENTITY_DEFINITIONS})  # 存空列表
+        elif any(value is None for value in results.values()):
+            partially_failed_count += 1
+            store_row(row_position, results)  # 失败字段留空，不写入检查点，近重复政策也不复用
+        else:
+            store_row(row_position, results)
+            if policy_id:
+                extracted_by_policy_id[policy_id] = results
+                append_checkpoint(checkpoint_handle, policy_id, checkpoint_version, fingerprint, results)
+        if completed_count % 10 == 0 or completed_count == len(tasks):
+            elapsed = time.time() - start_time
+            print(f"  已完成 {completed_count}/{len(tasks)} 条政策，耗时 {elapsed:.1f} 秒 "
+                  f"({completed_count / elapsed if elapsed else 0:.2f} 条/秒)。")
+
+    for row_position, canonical_id in reused_rows:
+        if canonical_id in extracted_by_policy_id:
+            store_row(row_position, extracted_by_policy_id[canonical_id])
+        else:
+            print(f"  - 规范政策 {canonical_id} 抽取失败，第 {row_position + 1} 条近重复政策的结果留空。")
+            store_row(row_position, {})
+
+    if aclient is not None:
+        await aclient.close()
+    if checkpoint_handle is not None:
+        checkpoint_handle.close()
+    if failed_count:
+        print(f"有 {failed_count} 条政策的抽取任务异常，结果留空且未写入检查点，重新运行时会再次处理。")
+    if partially_failed_count:
+        print(f"有 {partially_failed_count} 条政策的部分字段API调用失败，这些字段留空且未写入检查点，重新运行时会再次处理。")
+
+    for entity_name, values in extracted_columns.items():
+        df[f"{entity_name}_extracted"] = pd.Series(values, index=df.index, dtype=object)
+    return df
+
+
+def supplement_policy_data_with_deepseek(csv_file_path):
+    df = read_policy_csv(csv_file_path)
+    if df is None:
+        return None
+
+    # 全文存储与输入 CSV 位于同一目录；'全文内容' 为引用时按需加载
+    fulltext_store_dir = fulltext_store_dir_for(csv_file_path)
+
+    canonical_map = load_canonical_map(NEAR_DUPLICATE_CLUSTERS_CSV)
+    if canonical_map:
+        print(f"已加载近重复簇，{len(canonical_map)} 条政策可复用规范政策的抽取结果。")
+    extracted_by_policy_id = {}  # 已完成抽取的政策编号 -> {实体类型: 结果}
+
+    checkpoint_records, checkpoint_handle, checkpoint_version = open_extraction_checkpoint(csv_file_path)
+
     new_df_columns = {}
     for entity_name in ENTITY_DEFINITIONS.keys():
         df_col_name = f"{entity_name}_extracted"
@@ -257,7 +634,19 @@ def supplement_policy_data_with_deepseek(csv_file_path):
         print(f"\n正在处理第 {index + 1}/{len(df)} 条政策: {row.get('标题', '无标题')}")
 
         policy_title = str(row.get('标题', '')) if pd.notna(row.get('标题')) else ""
-        policy_full_text = str(row.get('全文内容', '')) if pd.notna(row.get('全文内容')) else ""
+        policy_id = str(row.get(POLICY_ID_COLUMN, '')) if pd.notna(row.get(POLICY_ID_COLUMN)) else ""
+        fingerprint = input_fingerprint(policy_title, row.get('全文内容'))
+        found, checkpoint_result = lookup_checkpoint(checkpoint_records, policy_id, fingerprint)
+        if found:
+            print("  - 检查点中已有该政策的抽取结果，跳过API调用。")
+            for entity_name in ENTITY_DEFINITIONS.keys():
+                df.loc[index, new_df_columns[entity_name]] = checkpoint_result.get(entity_name, "")
+            extracted_by_policy_id[policy_id] = {
+                entity_name: checkpoint_result.get(entity_name, "") for entity_name in ENTITY_DEFINITIONS.keys()
+            }
+            continue
+
+        policy_full_text = load_full_text(row.get('全文内容'), fulltext_store_dir, max_length=MAX_PROMPT_TEXT_LENGTH)
 
         if not policy_full_text and not policy_title:
             print("  - 政策标题和全文内容均为空，跳过API调用。")
@@ -265,26 +654,58 @@ def supplement_policy_data_with_deepseek(csv_file_path):
                 df.loc[index, new_df_columns[entity_name]] = []  # 存空列表
             continue
 
+        canonical_id = canonical_map.get(policy_id)
+        if canonical_id in extracted_by_policy_id:
+            print(f"  - 近重复政策，复用规范政策 {canonical_id} 的抽取结果，跳过API调用。")
+            for entity_name, value in extracted_by_policy_id[canonical_id].items():
+                df.loc[index, new_df_columns[entity_name]] = value
+            continue
+
         if not client:
             print("  - DeepSeek API Key 未正确配置或客户端初始化失败，跳过所有API调用。")
             for entity_name in ENTITY_DEFINITIONS.keys():
                 df.loc[index, new_df_columns[entity_name]] = []  # 存空列表
             continue
 
-        for entity_name, entity_info in ENTITY_DEFINITIONS.items():
-            print(f"  Extracting {entity_name}...")
-            # API现在应该返回一个列表，其中包含一个字符串（该字符串可能包含分号或 "其他(...)"）
-            extracted_list = call_deepseek_api_for_entity(policy_title, policy_full_text, entity_name, entity_info)
+        combined_results = {}
+        if COMBINED_EXTRACTION_MODE:
+            print(f"  Extracting {len(ENTITY_DEFINITIONS)} entity types in one call...")
+            combined_results = call_deepseek_api_combined(policy_title, policy_full_text)
+            time.sleep(API_CALL_DELAY_SECONDS)
+            failed_fields = [entity_name for entity_name, value in combined_results.items() if value is None]
+            if failed_fields:
+                print(f"    - 以下字段未通过校验，将单独重新抽取: {', '.join(failed_fields)}")
 
-            if extracted_list:  # extracted_list 是一个列表，例如 ["结果1;结果2"] 或 ["其他(...)"]
+        failed_entities = []
+        for entity_name, entity_info in ENTITY_DEFINITIONS.items():
+            extracted_list = combined_results.get(entity_name)
+            if extracted_list is None:
+                print(f"  Extracting {entity_name}...")
+                # API现在应该返回一个列表，其中包含一个字符串（该字符串可能包含分号或 "其他(...)"）
+                extracted_list = call_deepseek_api_for_entity(policy_title, policy_full_text, entity_name, entity_info)
+                time.sleep(API_CALL_DELAY_SECONDS)
+
+            if extracted_list is None:
+                print(f"    - API调用失败，{entity_name} 留空。")
+                failed_entities.append(entity_name)
+            elif extracted_list:  # extracted_list 是一个列表，例如 ["结果1;结果2"] 或 ["其他(...)"]
                 print(f"    - Extracted for {entity_name}: {extracted_list[0]}")  # 打印列表中的字符串
                 df.loc[index, new_df_columns[entity_name]] = extracted_list[0]  # 直接存储这个字符串
             else:
                 print(f"    - No information extracted for {entity_name}.")
                 df.loc[index, new_df_columns[entity_name]] = ""  # 存空字符串
 
-            time.sleep(3)
-
+        if failed_entities:
+            print("  - 部分字段API调用失败，该政策不写入检查点，重新运行时会再次处理。")
+        elif policy_id:
+            extracted_by_policy_id[policy_id] = {
+                entity_name: df.loc[index, new_df_columns[entity_name]] for entity_name in ENTITY_DEFINITIONS.keys()
+            }
+            append_checkpoint(checkpoint_handle, policy_id, checkpoint_version, fingerprint,
+                              extracted_by_policy_id[policy_id])
+
+    if checkpoint_handle is not None:
+        checkpoint_handle.close()
     return df
 
 
@@ -300,7 +721,10 @@ if __name__ == "__main__":
     input_csv_path = r"C:\Users\hongm\OneDrive\桌面\民营经济促进政策\政策文本\policy_data_standardized_v4.csv"
 
     print(f"开始处理文件: {input_csv_path}")
-    updated_df = supplement_policy_data_with_deepseek(input_csv_path)
+    if USE_ASYNC_WORKERS:
+        updated_df = asyncio.run(supplement_policy_data_async(input_csv_path))
+    else:
+        updated_df = supplement_policy_data_with_deepseek(input_csv_path)
 
     if updated_df is not None:
         output_csv_path = r"C:\Users\hongm\OneDrive\桌面\民营经济促进政策\政策文本\policy_data_standardized_v4_extracted_v2.csv"
@@ -1,34 +1,60 @@
 # tool_code
 import os
+import bisect
+import codecs
+import collections
+import hashlib
+import mmap
+import sqlite3
 import pandas as pd
 import re
+from concurrent.futures import ProcessPoolExecutor
 
-# 清理文本内容的函数 (修改版)
-def clean_text_content(file_path, title):
+from fulltext_store import TRUNCATION_SUFFIX, fulltext_store_dir_for, put_full_text
+
+ENCODING_DETECT_PREFIX_BYTES = 64 * 1024 # 编码检测只检查文件开头的这部分字节
+HEADER_SCAN_LINES = 14 # 头部分析最多涉及的行数：元数据 10 行 + 重复标题 3 行 + 发文字号 1 行
+_LINE_BREAK_RE = re.compile(rb'\r\n|\r|\n') # 与文本模式的通用换行一致；GBK/UTF-8 多字节字符不含这两个字节
+
+
+def detect_encoding(prefix):
     """
-    读取文本文件，尝试移除头部信息，返回清理后的正文和识别到的发文字号。
+    根据有限长度的字节前缀判断编码：前缀能按 UTF-8 解码 (允许末尾截断半个多字节字符) 则为 UTF-8，否则为 GBK。
     """
-    lines = []
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+        codecs.getincrementaldecoder('utf-8')().decode(prefix, final=False)
+        return 'utf-8'
     except UnicodeDecodeError:
-        try:
-            with open(file_path, 'r', encoding='gbk') as f:
-                lines = f.readlines()
-        except Exception as e_gbk:
-            print(f"\n错误: 无法使用 UTF-8 或 GBK 解码文件 {os.path.basename(file_path)}。错误信息: {e_gbk}")
-            return None, None # 返回两个 None
-    except FileNotFoundError:
-        return None, None # 返回两个 None
-    except Exception as e:
-        print(f"\n错误: 处理文件 {os.path.basename(file_path)} 时发生异常: {e}")
-        return None, None # 返回两个 None
+        return 'gbk'
+
+
+def _split_text_lines(text):
+    """ 按通用换行切分并去掉换行符，行数与文本模式 readlines() 相同 """
+    lines = text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    if lines[-1] == '':
+        lines.pop() # 以换行结尾时不产生额外的空行
+    return lines
 
-    if not lines:
-        return None, None # 如果文件为空
 
-    identified_doc_num = None # 初始化识别到的发文字号
+def _clean_policy_bytes(buffer, encoding, title):
+    """
+    在原始字节上完成头部分析，只解码头部若干行，再从正文起始偏移处一次性解码正文。
+    返回 (正文, 正文首行)：正文包含首行，首行即可能的发文字号行，由 split_doc_num_line 判断。
+    编码不匹配时抛出 UnicodeDecodeError。
+    """
+    size = len(buffer)
+    # 只定位前 HEADER_SCAN_LINES 行的字节范围
+    line_starts = [0]
+    line_ends = []
+    for match in _LINE_BREAK_RE.finditer(buffer):
+        line_ends.append(match.start())
+        line_starts.append(match.end())
+        if len(line_ends) == HEADER_SCAN_LINES: break
+    # 扫描范围之外的行不需要单独定位：正文从起始偏移处整体解码
+    if len(line_ends) < HEADER_SCAN_LINES and line_starts[-1] < size:
+        line_ends.append(size) # 最后一行没有换行符
+    lines = [buffer[start:end].decode(encoding) for start, end in zip(line_starts, line_ends)]
+
     start_index = 0
     lines_to_skip = 0
     max_header_lines = 10
@@ -55,30 +81,89 @@ def clean_text_content(file_path, title):
          elif title_lines_found == 0 and i >= start_index: break
     start_index = lines_to_skip
 
-    # 3. *** 识别并提取发文字号 (同时兼容全角/半角括号) ***
-    if start_index < len(lines):
-        line_stripped = lines[start_index].strip()
-        # 更新正则表达式以包含半角括号，并简化匹配逻辑
-        # 匹配被 () （） 〔〕 【】 包围的内容，或以 "号" 结尾的非空字符串
-        doc_num_regex = r'^\s*([（(〔【].*?[）)〕】]|\S+?号)\s*$'
-        # 增加长度限制，避免误判过长的普通文本行
-        if line_stripped and len(line_stripped) < 100 and re.match(doc_num_regex, line_stripped):
-            identified_doc_num = line_stripped # 存储识别到的发文字号
-            start_index += 1 # 跳过这一行
-            # print(f"      -- 识别到发文号: {identified_doc_num}") # 调试时可取消注释
-
-    # --- 拼接正文 ---
+    # 3. 发文字号在正文首行，识别与剥离见 split_doc_num_line / split_doc_num_columns
+
+    # --- 拼接正文 (正文字节只解码这一次) ---
     content = None
+    first_line = None
     if start_index < len(lines):
-        content_lines = [line.strip() for line in lines[start_index:]]
+        first_line = lines[start_index].strip()
+        with memoryview(buffer) as view:
+            body_text = str(view[line_starts[start_index]:], encoding)
+        content_lines = [line.strip() for line in _split_text_lines(body_text)]
         # 过滤掉可能的空行？或者保留？暂时保留
         content = "\n".join(content_lines).strip()
         # 清理多余的空行
         if content: # 确保内容不是 None 或空字符串
              content = re.sub(r'\n\s*\n', '\n\n', content)
 
-    # 返回正文和识别到的发文字号
-    return content, identified_doc_num
+    return content, first_line
+
+
+# 更新正则表达式以包含半角括号，并简化匹配逻辑
+# 匹配被 () （） 〔〕 【】 包围的内容，或以 "号" 结尾的非空字符串
+DOC_NUM_REGEX = r'^\s*([（(〔【].*?[）)〕】]|\S+?号)\s*$'
+DOC_NUM_MAX_LENGTH = 100 # 增加长度限制，避免误判过长的普通文本行
+
+
+def split_doc_num_line(content, first_line):
+    """
+    *** 识别并提取发文字号 (同时兼容全角/半角括号) ***
+    若正文首行是发文字号，则将其从正文中剥离。返回 (正文, 识别到的发文字号)；剥离后正文为空时返回 None。
+    """
+    if content is None or not first_line:
+        return content, None
+    if len(first_line) < DOC_NUM_MAX_LENGTH and re.match(DOC_NUM_REGEX, first_line):
+        # 首行已去除首尾空白且不含换行，正文以它开头，剩余部分去除空白即为原正文
+        rest = content.partition('\n')[2].strip()
+        return (rest or None), first_line
+    return content, None
+
+
+def split_doc_num_columns(contents, first_lines):
+    """ split_doc_num_line 的向量化版本，输入输出均为按行对齐的 Series """
+    is_doc_num = (first_lines.str.len() < DOC_NUM_MAX_LENGTH) & first_lines.str.match(DOC_NUM_REGEX)
+    is_doc_num = is_doc_num.fillna(False).astype(bool) & contents.notna()
+    rest = contents.str.extract(r'\n(.*)', flags=re.DOTALL, expand=False).str.strip()
+    stripped = rest.where(rest.str.len() > 0, None)
+    new_contents = contents.where(~is_doc_num, stripped)
+    doc_nums = first_lines.where(is_doc_num, None)
+    return new_contents, doc_nums
+
+
+def read_policy_text(file_path, title):
+    """
+    读取文本文件并移除头部信息，返回 (正文, 正文首行)；发文字号尚未剥离。
+    文件通过 mmap 只读取一次：先由开头的有限字节判断编码 (UTF-8 优先，否则 GBK)，
+    若正文中途出现非法 UTF-8 字节，则与旧逻辑一致地整体改用 GBK。
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None, None # 如果文件为空
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                encoding = detect_encoding(buffer[:ENCODING_DETECT_PREFIX_BYTES])
+                try:
+                    return _clean_policy_bytes(buffer, encoding, title)
+                except UnicodeDecodeError:
+                    if encoding == 'gbk': raise
+                    return _clean_policy_bytes(buffer, 'gbk', title)
+    except UnicodeDecodeError as e_gbk:
+        print(f"\n错误: 无法使用 UTF-8 或 GBK 解码文件 {os.path.basename(file_path)}。错误信息: {e_gbk}")
+        return None, None # 返回两个 None
+    except FileNotFoundError:
+        return None, None # 返回两个 None
+    except Exception as e:
+        print(f"\n错误: 处理文件 {os.path.basename(file_path)} 时发生异常: {e}")
+        return None, None # 返回两个 None
+
+
+# 清理文本内容的函数 (修改版)
+def clean_text_content(file_path, title):
+    """
+    读取文本文件，尝试移除头部信息，返回清理后的正文和识别到的发文字号。
+    """
+    return split_doc_num_line(*read_policy_text(file_path, title))
 
 
 # --- 从文件路径提取ID的函数 (保持不变) ---
@@ -98,6 +183,187 @@ def extract_id_from_path(filepath):
             return None
     return None
 
+def extract_ids_from_paths(filepaths):
+    """ extract_id_from_path 的向量化版本，对整列文件路径使用 pandas 字符串方法 """
+    separators = re.escape(os.sep + (os.altsep or ''))
+    names = filepaths.str.replace(f'^.*[{separators}]', '', regex=True) # os.path.basename
+    # os.path.splitext：最后一个点之前必须有非点字符才算扩展名
+    stems = names.str.extract(r'^(.*?[^.].*)\.[^.]*$', expand=False).fillna(names)
+    tail_ids = stems.str.slice(-18).str.strip('()')
+    short_ids = stems.str.strip('()')
+    short_ids = short_ids.where(short_ids != stems, None)
+    ids = tail_ids.where(stems.str.len() >= 18, short_ids)
+    return ids.where(filepaths.str.len() > 0, None)
+
+
+# --- 标题前缀索引 (用于次要查找) ---
+def build_title_prefix_index(file_paths):
+    """
+    将文件基本名 (去除首尾空白并转为小写) 排序，构建可二分查找的前缀索引。
+    每个条目记录文件在目录遍历中的原始顺序，以便与线性查找返回相同的文件。
+    """
+    entries = sorted(
+        (os.path.splitext(os.path.basename(path))[0].strip().lower(), order, path)
+        for order, path in enumerate(file_paths)
+    )
+    return {'keys': [entry[0] for entry in entries], 'entries': entries}
+
+
+def lookup_title_prefix(prefix_index, title_lower):
+    """
+    查找基本名以 title_lower 开头的所有文件，耗时 O(log n + 匹配数)。
+    返回 (首个匹配文件, 全部匹配文件列表)，二者均按目录遍历顺序；无匹配时返回 (None, [])。
+    """
+    keys = prefix_index['keys']
+    entries = prefix_index['entries']
+    # 以 title_lower 为前缀的键在有序数组中是连续的一段
+    i = bisect.bisect_left(keys, title_lower)
+    matches = []
+    while i < len(keys) and keys[i].startswith(title_lower):
+        matches.append(entries[i])
+        i += 1
+    if not matches:
+        return None, []
+    matches.sort(key=lambda entry: entry[1])
+    matched_paths = [entry[2] for entry in matches]
+    return matched_paths[0], matched_paths
+
+
+# --- 增量清洗清单 (manifest) ---
+# 清单保存在 SQLite 中：files 表记录每个全文文件的路径、大小、修改时间和内容哈希；
+# results 表按 (文件路径, 标题) 缓存 read_policy_text 的结果 (正文及其首行，截断和发文字号剥离之前)；
+# catalogs 表记录已解析 Excel 目录的签名及其 pickle 缓存文件。
+MANIFEST_SCHEMA_VERSION = 2 # 缓存结果格式变化时递增，旧版本的结果缓存会被清空
+
+
+def open_clean_manifest(cache_dir):
+    """ 打开 (必要时创建) 增量清洗清单数据库 """
+    os.makedirs(cache_dir, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(cache_dir, "manifest.sqlite3"))
+    if conn.execute("PRAGMA user_version").fetchone()[0] != MANIFEST_SCHEMA_VERSION:
+        conn.execute("DROP TABLE IF EXISTS results")
+        conn.execute(f"PRAGMA user_version = {MANIFEST_SCHEMA_VERSION}")
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS files (
+            path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, sha1 TEXT);
+        CREATE TABLE IF NOT EXISTS results (
+            path TEXT, title TEXT, content TEXT, first_line TEXT, PRIMARY KEY (path, title));
+        CREATE TABLE IF NOT EXISTS catalogs (
+            path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, pickle_name TEXT);
+    """)
+    return conn
+
+
+def file_signature(file_path):
+    """ 返回文件的 (大小, 纳秒级修改时间) """
+    st = os.stat(file_path)
+    return st.st_size, st.st_mtime_ns
+
+
+def file_sha1(file_path):
+    """ 计算文件内容的 SHA-1 """
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def validate_manifest_file(manifest, file_path):
+    """
+    对照清单检查文件是否变化。返回 (未变化, 当前签名, 当前哈希)。
+    大小和修改时间都未变时直接信任清单，不读取文件；否则计算哈希再比较，
+    内容确实变化时删除该文件的缓存结果。
+    """
+    signature = file_signature(file_path)
+    row = manifest.execute("SELECT size, mtime_ns, sha1 FROM files WHERE path = ?", (file_path,)).fetchone()
+    if row is not None and (row[0], row[1]) == signature:
+        return True, signature, row[2]
+
+    sha1 = file_sha1(file_path)
+    if row is not None and row[2] == sha1:
+        # 仅修改时间变化 (例如重新同步)，内容未变
+        manifest.execute("UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?", (*signature, file_path))
+        return True, signature, sha1
+    if row is not None:
+        manifest.execute("DELETE FROM results WHERE path = ?", (file_path,))
+    return False, signature, sha1
+
+
+def split_cached_jobs(manifest, jobs):
+    """
+    将清理任务分为命中缓存和待处理两类。
+    返回 (与 jobs 对齐的命中标记列表, 待处理任务列表, {路径: (签名, 哈希)})。
+    """
+    file_states = {}
+    cached_flags = []
+    pending_jobs = []
+    for txt_filepath, title in jobs:
+        if txt_filepath not in file_states:
+            file_states[txt_filepath] = validate_manifest_file(manifest, txt_filepath)
+        unchanged = file_states[txt_filepath][0]
+        cached = unchanged and manifest.execute(
+            "SELECT 1 FROM results WHERE path = ? AND title = ?", (txt_filepath, title)).fetchone() is not None
+        cached_flags.append(cached)
+        if not cached:
+            pending_jobs.append((txt_filepath, title))
+    file_hashes = {path: (state[1], state[2]) for path, state in file_states.items()}
+    return cached_flags, pending_jobs, file_hashes
+
+
+def iter_incremental_results(manifest, jobs, cached_flags, fresh_results, file_hashes):
+    """ 按 jobs 顺序产出清理结果：命中缓存的从清单读取，其余取自 fresh_results 并写回清单 """
+    stored_count = 0
+    for (txt_filepath, title), cached in zip(jobs, cached_flags):
+        if cached:
+            yield manifest.execute(
+                "SELECT content, first_line FROM results WHERE path = ? AND title = ?", (txt_filepath, title)).fetchone()
+            continue
+        result = next(fresh_results)
+        signature, sha1 = file_hashes[txt_filepath]
+        manifest.execute("INSERT OR REPLACE INTO files (path, size, mtime_ns, sha1) VALUES (?, ?, ?, ?)",
+                         (txt_filepath, *signature, sha1))
+        manifest.execute("INSERT OR REPLACE INTO results (path, title, content, first_line) VALUES (?, ?, ?, ?)",
+                         (txt_filepath, title, *result))
+        stored_count += 1
+        if stored_count % 500 == 0:
+            manifest.commit()
+        yield result
+    manifest.commit()
+
+
+def prune_clean_manifest(manifest, jobs):
+    """ 删除本次运行中不再使用的文件和结果缓存 (文件已删除或标题已变化) """
+    used_keys = set(jobs)
+    used_paths = {txt_filepath for txt_filepath, _ in jobs}
+    stale_results = [key for key in manifest.execute("SELECT path, title FROM results") if key not in used_keys]
+    stale_files = [(path,) for (path,) in manifest.execute("SELECT path FROM files") if path not in used_paths]
+    manifest.executemany("DELETE FROM results WHERE path = ? AND title = ?", stale_results)
+    manifest.executemany("DELETE FROM files WHERE path = ?", stale_files)
+    manifest.commit()
+    return len(stale_results), len(stale_files)
+
+
+def read_catalog(excel_filepath, manifest=None, cache_dir=None):
+    """ 读取分类 Excel 目录；增量模式下 Excel 未变化时直接加载上次解析结果的 pickle 缓存 """
+    if manifest is None:
+        return pd.read_excel(excel_filepath)
+
+    signature = file_signature(excel_filepath)
+    pickle_name = hashlib.sha1(excel_filepath.encode('utf-8')).hexdigest() + ".pkl"
+    pickle_path = os.path.join(cache_dir, pickle_name)
+    row = manifest.execute("SELECT size, mtime_ns FROM catalogs WHERE path = ?", (excel_filepath,)).fetchone()
+    if row is not None and (row[0], row[1]) == signature and os.path.isfile(pickle_path):
+        return pd.read_pickle(pickle_path)
+
+    df = pd.read_excel(excel_filepath)
+    df.to_pickle(pickle_path)
+    manifest.execute("INSERT OR REPLACE INTO catalogs (path, size, mtime_ns, pickle_name) VALUES (?, ?, ?, ?)",
+                     (excel_filepath, *signature, pickle_name))
+    manifest.commit()
+    return df
+
+
 # --- 配置区域 ---
 BASE_DIR = r"C:\Users\hongm\OneDrive\桌面\民营经济促进政策\政策文本"
 CATEGORIES = [
@@ -110,41 +376,67 @@ CATEGORIES = [
     "行政法规"
 ]
 OUTPUT_FILENAME_CSV = "combined_policy_data_adjusted_v2.csv" # 更新输出文件名
+OUTPUT_FILENAME_PARQUET = "combined_policy_data_adjusted_v2.parquet"
+OUTPUT_FORMATS = ("csv",) # 输出格式，可选 "csv" 和 "parquet" (Parquet 需要安装 pyarrow)
+STREAMING_OUTPUT = False # 流式输出：每个分类清洗完成后立即去重、回填并追加写出，不在内存中保留全部分类
 MAX_CELL_LENGTH = 15000
-TRUNCATION_SUFFIX = "... [截断]"
+NUM_WORKERS = 1 # 清洗全文使用的进程数：1 为串行处理，None 为使用全部 CPU 核心
+PARALLEL_CHUNKSIZE = 32 # 并行模式下每次分发给子进程的文件数量
+FULLTEXT_STORE_MODE = False # 全文存储模式：全文无损写入输出 CSV 所在目录下的 fulltext_store，CSV 的 '全文内容' 列只保存引用，不再截断
+COLUMNAR_POSTPROCESS = False # 列式后处理：发文字号识别、截断、编号提取等使用 pandas 向量化字符串方法，低基数列转为 category
+CATEGORICAL_COLUMNS = ["效力级别", "制定机关", "时效性", "法规类别"] # 列式后处理时转为 category 类型的低基数列 (存在时)
+INCREMENTAL_MODE = False # 增量模式：仅重新清洗新增或内容变化的文件，其余结果取自清单缓存
+INCREMENTAL_CACHE_DIRNAME = "_data_clean_cache" # 清单和目录缓存所在目录 (位于 BASE_DIR 下)
 
-# --- 主处理逻辑 ---
-all_data_dfs = []
-not_found_files = []
-found_files_count = 0
-truncated_files_count = 0
-filled_doc_num_count = 0 # 新增：统计填充的发文字号数量
-
-print(f"开始处理数据，根目录: {BASE_DIR}")
-print("采用混合匹配逻辑 + 超长文本截断 + 增强发文号处理 (仅输出CSV):")
-# ... [其他打印信息不变] ...
-
-# 遍历每个分类目录
-for category in CATEGORIES:
-    print(f"\n--- 正在处理分类: {category} ---")
-    # ... [路径检查和Excel读取代码不变] ...
+
+# --- 并行清洗任务 (必须位于模块顶层，以便子进程导入) ---
+def _clean_text_job(job):
+    """ 进程池任务：job 为 (文件路径, 标题)，返回 read_policy_text 的结果 """
+    txt_filepath, title = job
+    return read_policy_text(txt_filepath, title)
+
+
+def _clean_text_batch(jobs):
+    """ 进程池任务：批量处理一组 job，减少进程间通信次数 """
+    return [_clean_text_job(job) for job in jobs]
+
+
+def iter_parallel_results(executor, jobs, chunksize, max_pending_batches):
+    """
+    按提交顺序产出进程池的清理结果。与 executor.map 不同，最多只有 max_pending_batches 批任务在途，
+    消费方处理较慢时不会把整个语料的结果堆积在内存中。
+    """
+    pending = collections.deque()
+    for start in range(0, len(jobs), chunksize):
+        pending.append(executor.submit(_clean_text_batch, jobs[start:start + chunksize]))
+        if len(pending) >= max_pending_batches:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
+
+
+def prepare_category(category, manifest=None):
+    """
+    读取分类的 Excel 目录，并为每一行匹配全文文件 (不读取全文)。
+    返回分类状态字典；目录文件或全文文件夹不存在时返回 None。
+    传入增量清单 manifest 时，Excel 目录优先从缓存加载。
+    """
     category_path = os.path.join(BASE_DIR, category)
     excel_filename = f"{category}目录.xlsx"
     text_dirname = f"{category}全文"
     excel_filepath = os.path.join(category_path, excel_filename)
     text_dirpath = os.path.join(category_path, text_dirname)
 
-    if not os.path.isfile(excel_filepath): continue
-    if not os.path.isdir(text_dirpath): continue
+    if not os.path.isfile(excel_filepath): return None
+    if not os.path.isdir(text_dirpath): return None
 
-    try: df = pd.read_excel(excel_filepath)
-    except Exception as e: continue
+    try: df = read_catalog(excel_filepath, manifest, os.path.join(BASE_DIR, INCREMENTAL_CACHE_DIRNAME))
+    except Exception as e: return None
 
     # 创建查找字典和文件列表
     text_files_primary = {}
     all_file_paths_in_category = []
     try:
-        # ... [遍历文件创建字典和列表的代码不变] ...
         files_in_dir = 0
         for filename in os.listdir(text_dirpath):
             if filename.lower().endswith(".txt"):
@@ -155,28 +447,22 @@ for category in CATEGORIES:
                 key_primary = base_name[:21].lower()
                 text_files_primary[key_primary] = full_path
         print(f"  在 {text_dirname} 目录找到 {files_in_dir} 个 .txt 文件。")
-    except Exception as e: continue
+    except Exception as e: return None
+    prefix_index = build_title_prefix_index(all_file_paths_in_category)
 
-    # --- 遍历 Excel DataFrame 的每一行 ---
-    extracted_texts = []
+    # --- 遍历 Excel DataFrame 的每一行，只做文件匹配 ---
     matched_filepaths = []
-    identified_doc_nums = [] # *** 新增列表 ***
-    category_found_count = 0
-    category_truncated_count = 0
-    print(f"  开始处理 '{category}' 的 {len(df)} 条 Excel 条目...")
+    jobs = [] # 待清理的 (文件路径, 标题)，顺序与匹配成功的行一致
+    not_found = []
+    ambiguous = [] # 次要查找命中多个文件的记录
+    print(f"  开始匹配 '{category}' 的 {len(df)} 条 Excel 条目...")
 
     for index, row in df.iterrows():
-        # ... [获取 row_identifier 和 title 的代码不变] ...
         row_identifier = f"序号 {row.get('序号', index+2)}"
         title = str(row.get('标题', '')).strip()
 
-        # 打印日志精简，只保留基本信息
-        # print(f"\n    >> 正在处理: {category} - {row_identifier} - 标题: '{title[:30]}...'")
-
         if not title:
-            extracted_texts.append(None)
             matched_filepaths.append(None)
-            identified_doc_nums.append(None) # *** 补充 None ***
             continue
 
         txt_filepath = None
@@ -185,74 +471,143 @@ for category in CATEGORIES:
         lookup_key_primary = title[:21].lower()
         txt_filepath = text_files_primary.get(lookup_key_primary)
 
-        # 2. 次要查找尝试
+        # 2. 次要查找尝试 (前缀索引，结果与逐个 startswith 比较一致)
         if txt_filepath is None:
-            title_lower = title.lower()
-            for current_filepath in all_file_paths_in_category:
-                current_basename = os.path.splitext(os.path.basename(current_filepath))[0].strip()
-                current_basename_lower = current_basename.lower()
-                if current_basename_lower.startswith(title_lower):
-                    txt_filepath = current_filepath
-                    break
-
-        # --- 处理查找结果 ---
+            txt_filepath, prefix_matches = lookup_title_prefix(prefix_index, title.lower())
+            if len(prefix_matches) > 1:
+                ambiguous.append({
+                    'Category': category,
+                    'Identifier': row_identifier,
+                    'Title': title,
+                    'Candidates': [os.path.basename(path) for path in prefix_matches]
+                })
+
+        matched_filepaths.append(txt_filepath)
         if txt_filepath:
-            # *** 接收两个返回值 ***
-            cleaned_content, identified_doc_num = clean_text_content(txt_filepath, title)
-
-            if cleaned_content is not None:
-                # 处理截断 (保持不变)
-                if len(cleaned_content) > MAX_CELL_LENGTH:
-                    cleaned_content = cleaned_content[:MAX_CELL_LENGTH] + TRUNCATION_SUFFIX
-                    category_truncated_count += 1
-                    truncated_files_count += 1
-
-                extracted_texts.append(cleaned_content)
-                matched_filepaths.append(txt_filepath)
-                identified_doc_nums.append(identified_doc_num) # *** 存储识别的文号 ***
-                category_found_count += 1
-            else:
-                 extracted_texts.append(None)
-                 matched_filepaths.append(txt_filepath) # 即使内容为空，也记录路径
-                 identified_doc_nums.append(identified_doc_num) # *** 存储识别的文号 ***
+            jobs.append((txt_filepath, title))
         else:
-            extracted_texts.append(None)
-            matched_filepaths.append(None)
-            identified_doc_nums.append(None) # *** 未找到文件，文号也为 None ***
-            not_found_files.append({
+            not_found.append({
                 'Category': category,
                 'Identifier': row_identifier,
                 'Title': title,
                 'PrimaryLookupKey': lookup_key_primary
             })
 
+    return {
+        'category': category,
+        'df': df,
+        'matched_filepaths': matched_filepaths,
+        'jobs': jobs,
+        'not_found': not_found,
+        'ambiguous': ambiguous,
+    }
+
+
+def finalize_category(state, cleaned_results):
+    """
+    按目录顺序从 cleaned_results 迭代器中取回本分类每个已匹配文件的清理结果，
+    处理截断并添加新列。返回 (DataFrame, 获取文本数, 截断数)。
+    """
+    df = state['df']
+    extracted_texts = []
+    identified_doc_nums = []
+    category_found_count = 0
+    category_truncated_count = 0
+
+    for txt_filepath in state['matched_filepaths']:
+        if not txt_filepath:
+            extracted_texts.append(None)
+            identified_doc_nums.append(None) # *** 未找到文件，文号也为 None ***
+            continue
+
+        # *** 接收两个返回值 ***
+        cleaned_content, identified_doc_num = split_doc_num_line(*next(cleaned_results))
+
+        if cleaned_content is not None:
+            if FULLTEXT_STORE_MODE:
+                # 全文无损写入存储，单元格只保存引用
+                cleaned_content = put_full_text(cleaned_content,
+                                                fulltext_store_dir_for(os.path.join(BASE_DIR, OUTPUT_FILENAME_CSV)))
+            # 处理截断 (保持不变)
+            elif len(cleaned_content) > MAX_CELL_LENGTH:
+                cleaned_content = cleaned_content[:MAX_CELL_LENGTH] + TRUNCATION_SUFFIX
+                category_truncated_count += 1
+            category_found_count += 1
+        extracted_texts.append(cleaned_content)
+        identified_doc_nums.append(identified_doc_num) # *** 存储识别的文号 ***
+
     # 添加新列到当前分类的 DataFrame
     df['全文内容'] = extracted_texts
-    df['Matched_Filepath'] = matched_filepaths
+    df['Matched_Filepath'] = state['matched_filepaths'] # 即使内容为空，也记录路径
     df['Identified_Doc_Num'] = identified_doc_nums # *** 添加临时文号列 ***
-    all_data_dfs.append(df)
-    print(f"  完成处理 {category}。获取 {category_found_count} 条文本 (其中 {category_truncated_count} 条被截断)。")
+    print(f"  完成处理 {state['category']}。获取 {category_found_count} 条文本 (其中 {category_truncated_count} 条被截断)。")
+    return df, category_found_count, category_truncated_count
 
-# --- 合并所有 DataFrame ---
-if all_data_dfs:
-    print("\n--- 开始合并和后处理 ---")
-    final_df = pd.concat(all_data_dfs, ignore_index=True)
-    print(f"数据合并完成。当前条目数: {len(final_df)}")
 
-    # --- 执行微调 ---
+def finalize_category_columnar(state, cleaned_results):
+    """
+    finalize_category 的列式版本：一次取回本分类的全部清理结果，
+    发文字号识别、截断均以整列字符串运算完成。返回值与 finalize_category 相同。
+    """
+    df = state['df']
+    matched = pd.Series(state['matched_filepaths'], index=df.index, dtype=object)
+    has_file = matched.notna()
+    raw_results = [next(cleaned_results) for _ in range(int(has_file.sum()))]
+
+    contents = pd.Series(None, index=df.index, dtype=object)
+    first_lines = pd.Series(None, index=df.index, dtype=object)
+    if raw_results:
+        contents[has_file] = [result[0] for result in raw_results]
+        first_lines[has_file] = [result[1] for result in raw_results]
+
+    contents, doc_nums = split_doc_num_columns(contents, first_lines)
+    category_found_count = int(contents.notna().sum())
+    if FULLTEXT_STORE_MODE:
+        store_dir = fulltext_store_dir_for(os.path.join(BASE_DIR, OUTPUT_FILENAME_CSV))
+        contents = contents.map(lambda text: put_full_text(text, store_dir), na_action='ignore')
+        category_truncated_count = 0
+    else:
+        too_long = contents.str.len() > MAX_CELL_LENGTH
+        category_truncated_count = int(too_long.sum())
+        contents = contents.where(~too_long, contents.str.slice(0, MAX_CELL_LENGTH) + TRUNCATION_SUFFIX)
+
+    df['全文内容'] = contents
+    df['Matched_Filepath'] = matched
+    df['Identified_Doc_Num'] = doc_nums
+    print(f"  完成处理 {state['category']}。获取 {category_found_count} 条文本 (其中 {category_truncated_count} 条被截断)。")
+    return df, category_found_count, category_truncated_count
+
+
+def _doc_num_fill_condition(df):
+    """ 原始 '发文字号' 为空 (NaN 或 '') 且 识别出的 'Identified_Doc_Num' 不为空 """
+    return (pd.isna(df['发文字号']) | (df['发文字号'].astype(str).str.strip() == '')) & \
+           (pd.notna(df['Identified_Doc_Num']) & (df['Identified_Doc_Num'].astype(str).str.strip() != ''))
+
+
+def postprocess_combined_df(final_df, columnar=False):
+    """
+    对合并后的 DataFrame 执行微调，返回 (处理后的 DataFrame, 填充的发文字号数量)。
+    columnar 为 True 时以向量化方式生成 '编号'，并将低基数列转为 category 以节省内存。
+    """
+    filled_doc_num_count = 0
+    if columnar:
+        categorical_columns = [col for col in CATEGORICAL_COLUMNS if col in final_df.columns]
+        for col in categorical_columns:
+            final_df[col] = final_df[col].astype('category')
+        if categorical_columns:
+            print(f"  * 已将低基数列转为 category 类型: {', '.join(categorical_columns)}")
 
     # *** 新增步骤：填充缺失的发文字号 ***
     print("  * 正在尝试使用提取的文号填充缺失的 '发文字号'...")
     if '发文字号' in final_df.columns and 'Identified_Doc_Num' in final_df.columns:
         # 条件：原始 '发文字号' 为空 (NaN 或 '') 且 识别出的 'Identified_Doc_Num' 不为空
-        condition = (pd.isna(final_df['发文字号']) | (final_df['发文字号'].astype(str).str.strip() == '')) & \
-                    (pd.notna(final_df['Identified_Doc_Num']) & (final_df['Identified_Doc_Num'].astype(str).str.strip() != ''))
+        condition = _doc_num_fill_condition(final_df)
 
         fill_count = condition.sum()
         if fill_count > 0:
             # 只对满足条件的行进行填充
             final_df.loc[condition, '发文字号'] = final_df.loc[condition, 'Identified_Doc_Num']
-            filled_doc_num_count = fill_count # 更新全局计数器
+            filled_doc_num_count = fill_count
             print(f"     成功使用提取的文号填充了 {fill_count} 个缺失的 '发文字号'。")
         else:
             print("     未发现可填充的缺失 '发文字号'。")
@@ -276,7 +631,6 @@ if all_data_dfs:
         except KeyError:
              print("     尝试删除 '实施日期' 列时出错（可能已被删除或不存在）。")
         print("     完成日期合并。")
-    # ... [其他日期列检查逻辑保持不变] ...
     elif '实施日期' in final_df.columns: print("     警告: 仅存在 '实施日期' 列。")
     elif '施行日期' in final_df.columns: print("     信息: 仅存在 '施行日期' 列。")
     else: print("     警告: 未找到日期列。")
@@ -292,7 +646,10 @@ if all_data_dfs:
     # 3. 生成新的 '编号' 列并删除旧 '序号'
     print("  3. 正在生成新的 '编号' 列...")
     if 'Matched_Filepath' in final_df.columns:
-        final_df['编号'] = final_df['Matched_Filepath'].apply(extract_id_from_path)
+        if columnar:
+            final_df['编号'] = extract_ids_from_paths(final_df['Matched_Filepath'].astype(object))
+        else:
+            final_df['编号'] = final_df['Matched_Filepath'].apply(extract_id_from_path)
         try: # 增加错误处理
              final_df.drop(columns=['Matched_Filepath'], inplace=True)
         except KeyError: pass # 如果列不存在，忽略错误
@@ -321,6 +678,256 @@ if all_data_dfs:
         else: print("     '编号' 列未成功创建。")
     else: print("     未找到 '编号' 列。")
 
+    return final_df, filled_doc_num_count
+
+
+# --- 流式输出 ---
+_NAN_TITLE_KEY = object() # drop_duplicates 将所有缺失标题视为相同，流式去重时统一映射到该键
+
+
+def streaming_columns(category_states):
+    """
+    根据各分类的 Excel 目录列预先推算输出列，与 pd.concat 后再做后处理得到的列及顺序一致。
+    返回 (合并后的列, 最终输出列)。
+    """
+    combined_columns = []
+    for state in category_states:
+        category_columns = list(state['df'].columns)
+        for col in ['全文内容', 'Matched_Filepath', 'Identified_Doc_Num']:
+            if col not in category_columns:
+                category_columns.append(col)
+        for col in category_columns:
+            if col not in combined_columns:
+                combined_columns.append(col)
+
+    dropped = {'Identified_Doc_Num', 'Matched_Filepath', '序号'}
+    if '实施日期' in combined_columns and '施行日期' in combined_columns:
+        dropped.add('实施日期')
+    final_columns = [col for col in combined_columns if col not in dropped]
+    if '编号' not in final_columns:
+        final_columns.append('编号')
+    final_columns.insert(0, final_columns.pop(final_columns.index('编号')))
+    return combined_columns, final_columns
+
+
+def postprocess_stream_chunk(chunk, combined_columns, final_columns, seen_titles, columnar=False):
+    """
+    对单个分类的结果执行与 postprocess_combined_df 相同的微调：发文字号回填、日期合并、
+    基于 seen_titles 的跨分类标题去重 (保留最先出现的一条) 以及 '编号' 生成。
+    返回 (处理后的分块, 填充的发文字号数量, 移除的重复条目数)。
+    """
+    chunk = chunk.reindex(columns=combined_columns)
+    filled_count = 0
+    if '发文字号' in chunk.columns:
+        condition = _doc_num_fill_condition(chunk)
+        filled_count = int(condition.sum())
+        if filled_count > 0:
+            chunk.loc[condition, '发文字号'] = chunk.loc[condition, 'Identified_Doc_Num']
+
+    if '实施日期' in chunk.columns and '施行日期' in chunk.columns:
+        chunk['施行日期'] = chunk['施行日期'].combine_first(chunk['实施日期'])
+
+    title_keys = chunk['标题'].map(lambda title: _NAN_TITLE_KEY if pd.isna(title) else title)
+    keep = ~title_keys.duplicated(keep='first') & ~title_keys.map(lambda key: key in seen_titles)
+    seen_titles.update(title_keys[keep])
+    removed_count = int((~keep).sum())
+    chunk = chunk[keep]
+
+    if columnar:
+        chunk['编号'] = extract_ids_from_paths(chunk['Matched_Filepath'].astype(object))
+    else:
+        chunk['编号'] = chunk['Matched_Filepath'].apply(extract_id_from_path)
+    return chunk[final_columns], filled_count, removed_count
+
+
+def parquet_schema(columns, sample_dfs):
+    """
+    为 Parquet 输出确定固定的列类型：在所有样本中均为数值的列用 float64，均为日期时间的列用 timestamp，
+    其余列 (包括混合类型的 Excel 列) 一律为字符串。
+    """
+    import pyarrow as pa
+    fields = []
+    for col in columns:
+        dtypes = [df[col].dtype for df in sample_dfs if col in df.columns]
+        if dtypes and all(pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype) for dtype in dtypes):
+            fields.append(pa.field(col, pa.float64()))
+        elif dtypes and all(pd.api.types.is_datetime64_any_dtype(dtype) for dtype in dtypes):
+            fields.append(pa.field(col, pa.timestamp('ns')))
+        else:
+            fields.append(pa.field(col, pa.string()))
+    return pa.schema(fields)
+
+
+def to_arrow_table(df, schema):
+    """ 按 parquet_schema 给出的类型将 DataFrame 转为 Arrow 表 """
+    import pyarrow as pa
+    arrays = []
+    for field in schema:
+        col = df[field.name]
+        if pa.types.is_floating(field.type):
+            values = pd.to_numeric(col, errors='coerce').astype('float64')
+        elif pa.types.is_timestamp(field.type):
+            values = pd.to_datetime(col, errors='coerce')
+        else:
+            values = col.astype(object).map(str, na_action='ignore')
+        arrays.append(pa.array(values, type=field.type, from_pandas=True))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def write_streaming_output(category_states, cleaned_results, finalize):
+    """
+    流式处理：逐个分类完成清洗后立即微调并追加写入 CSV / Parquet，内存中只保留当前分类。
+    返回统计字典。
+    """
+    combined_columns, final_columns = streaming_columns(category_states)
+    output_path_csv = os.path.join(BASE_DIR, OUTPUT_FILENAME_CSV)
+    output_path_parquet = os.path.join(BASE_DIR, OUTPUT_FILENAME_PARQUET)
+    parquet_writer = None
+    schema = None
+    if "parquet" in OUTPUT_FORMATS:
+        import pyarrow.parquet as pq
+        schema = parquet_schema(final_columns, [state['df'] for state in category_states])
+        parquet_writer = pq.ParquetWriter(output_path_parquet, schema)
+
+    stats = {'rows': 0, 'found': 0, 'truncated': 0, 'filled': 0, 'duplicates': 0, 'empty': 0}
+    seen_titles = set()
+    try:
+        for state in category_states:
+            df, category_found_count, category_truncated_count = finalize(state, cleaned_results)
+            state['df'] = None # 目录 DataFrame 已写入分块，释放引用
+            chunk, filled_count, removed_count = postprocess_stream_chunk(
+                df, combined_columns, final_columns, seen_titles, columnar=COLUMNAR_POSTPROCESS)
+            del df
+
+            if "csv" in OUTPUT_FORMATS:
+                # 本次运行尚未写出任何行时以 'w' 模式重写表头，覆盖上次中断留下的 .partial 文件
+                first_chunk = stats['rows'] == 0
+                chunk.to_csv(output_path_csv + ".partial", index=False, header=first_chunk,
+                             mode='w' if first_chunk else 'a', encoding='utf-8-sig' if first_chunk else 'utf-8')
+            if parquet_writer is not None:
+                parquet_writer.write_table(to_arrow_table(chunk, schema))
+
+            stats['rows'] += len(chunk)
+            stats['found'] += int(chunk['全文内容'].notna().sum())
+            stats['empty'] += int(chunk['全文内容'].isna().sum())
+            stats['truncated'] += category_truncated_count
+            stats['filled'] += filled_count
+            stats['duplicates'] += removed_count
+            print(f"     已写出 {len(chunk)} 条 (去重移除 {removed_count} 条，回填发文字号 {filled_count} 条)。")
+    finally:
+        if parquet_writer is not None:
+            parquet_writer.close()
+
+    if "csv" in OUTPUT_FORMATS:
+        if os.path.exists(output_path_csv + ".partial"):
+            os.replace(output_path_csv + ".partial", output_path_csv)
+        else:
+            pd.DataFrame(columns=final_columns).to_csv(output_path_csv, index=False, encoding='utf-8-sig')
+        print(f"\n已将结果流式写入 CSV 文件: {output_path_csv}")
+    if parquet_writer is not None:
+        print(f"已将结果流式写入 Parquet 文件: {output_path_parquet}")
+    return stats
+
+
+# --- 主处理逻辑 ---
+def main():
+    all_data_dfs = []
+    not_found_files = []
+    ambiguous_matches = []
+    found_files_count = 0
+    truncated_files_count = 0
+    filled_doc_num_count = 0 # 新增：统计填充的发文字号数量
+
+    print(f"开始处理数据，根目录: {BASE_DIR}")
+    print("采用混合匹配逻辑 + 超长文本截断 + 增强发文号处理 (仅输出CSV):")
+    if FULLTEXT_STORE_MODE:
+        print(f"全文存储模式: 已启用，全文写入 {fulltext_store_dir_for(os.path.join(BASE_DIR, OUTPUT_FILENAME_CSV))}，不做截断")
+    if NUM_WORKERS == 1:
+        print("全文清洗模式: 串行")
+    else:
+        print(f"全文清洗模式: 并行 (进程数: {NUM_WORKERS or os.cpu_count()})")
+    if COLUMNAR_POSTPROCESS:
+        print("后处理模式: 列式 (向量化字符串运算 + category 类型)")
+    manifest = None
+    if INCREMENTAL_MODE:
+        manifest = open_clean_manifest(os.path.join(BASE_DIR, INCREMENTAL_CACHE_DIRNAME))
+        print(f"增量模式: 已启用 (清单目录: {INCREMENTAL_CACHE_DIRNAME})")
+
+    # 第一阶段：读取各分类目录并匹配文件 (仅涉及 Excel 和目录列表，开销较小)
+    category_states = []
+    for category in CATEGORIES:
+        print(f"\n--- 正在处理分类: {category} ---")
+        state = prepare_category(category, manifest)
+        if state is None: continue
+        category_states.append(state)
+        not_found_files.extend(state['not_found'])
+        ambiguous_matches.extend(state['ambiguous'])
+
+    # 第二阶段：读取并清理全文。并行模式下所有分类的文件一起分发给进程池，
+    # 结果按提交顺序返回，因此输出与串行模式逐字节一致。
+    all_jobs = [job for state in category_states for job in state['jobs']]
+    pending_jobs = all_jobs
+    if manifest is not None:
+        cached_flags, pending_jobs, file_hashes = split_cached_jobs(manifest, all_jobs)
+        print(f"\n增量模式: {len(all_jobs) - len(pending_jobs)} 个条目命中缓存，"
+              f"{len(pending_jobs)} 个条目 (新增或变化的文件) 需要重新清洗。")
+
+    executor = None
+    if NUM_WORKERS != 1 and len(pending_jobs) > 1:
+        executor = ProcessPoolExecutor(max_workers=NUM_WORKERS)
+        cleaned_results = iter_parallel_results(executor, pending_jobs, PARALLEL_CHUNKSIZE,
+                                                max_pending_batches=4 * (NUM_WORKERS or os.cpu_count() or 1))
+    else:
+        cleaned_results = map(_clean_text_job, pending_jobs)
+    if manifest is not None:
+        # 缓存结果与新结果按原始顺序合并，输出与全量运行一致
+        cleaned_results = iter_incremental_results(manifest, all_jobs, cached_flags, cleaned_results, file_hashes)
+
+    finalize = finalize_category_columnar if COLUMNAR_POSTPROCESS else finalize_category
+    stream_stats = None
+    try:
+        if STREAMING_OUTPUT and category_states:
+            print("\n--- 流式输出：逐个分类清洗、后处理并追加写出 ---")
+            stream_stats = write_streaming_output(category_states, cleaned_results, finalize)
+        else:
+            for state in category_states:
+                df, category_found_count, category_truncated_count = finalize(state, cleaned_results)
+                all_data_dfs.append(df)
+                found_files_count += category_found_count
+                truncated_files_count += category_truncated_count
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    if manifest is not None:
+        stale_results_count, stale_files_count = prune_clean_manifest(manifest, all_jobs)
+        if stale_files_count or stale_results_count:
+            print(f"增量模式: 已从清单中移除 {stale_files_count} 个失效文件和 {stale_results_count} 条失效结果。")
+        manifest.close()
+
+    if stream_stats is not None:
+        print(f"\n流式处理完成。最终条目数: {stream_stats['rows']} (去重移除 {stream_stats['duplicates']} 条)")
+        print(f"成功提取到文本内容的总条目数（去重后）: {stream_stats['found']}")
+        if stream_stats['filled'] > 0:
+            print(f"其中，有 {stream_stats['filled']} 条记录的 '发文字号' 是从文本内容中提取并填充的。")
+        if not_found_files:
+            print(f"\n--- 摘要：处理过程中有 {len(not_found_files)} 条原始记录未能找到匹配文件 ---")
+        if stream_stats['empty'] > 0:
+            print(f"\n注意：最终输出文件中有 {stream_stats['empty']} 行的 '全文内容' 为空。")
+        print("\n数据处理及微调完成。")
+        return
+
+    # --- 合并所有 DataFrame ---
+    if not all_data_dfs:
+        print("\n未处理任何数据。")
+        return
+
+    print("\n--- 开始合并和后处理 ---")
+    final_df = pd.concat(all_data_dfs, ignore_index=True)
+    print(f"数据合并完成。当前条目数: {len(final_df)}")
+
+    # --- 执行微调 ---
+    final_df, filled_doc_num_count = postprocess_combined_df(final_df, columnar=COLUMNAR_POSTPROCESS)
 
     # --- 输出到 CSV 文件 ---
     print(f"\n后处理完成。最终条目数: {len(final_df)}")
@@ -331,12 +938,22 @@ if all_data_dfs:
 
     try:
         output_path_csv = os.path.join(BASE_DIR, OUTPUT_FILENAME_CSV)
-        print(f"\n准备将最终结果写入 CSV 文件: {output_path_csv}")
-        final_df.to_csv(output_path_csv, index=False, encoding='utf-8-sig')
-        print(f"已成功将合并后的数据保存到 CSV 文件。")
+        if "csv" in OUTPUT_FORMATS:
+            print(f"\n准备将最终结果写入 CSV 文件: {output_path_csv}")
+            final_df.to_csv(output_path_csv, index=False, encoding='utf-8-sig')
+            print(f"已成功将合并后的数据保存到 CSV 文件。")
     except Exception as e_csv:
         print(f"\n错误: 保存数据到 CSV 文件时出错: {e_csv}")
 
+    if "parquet" in OUTPUT_FORMATS:
+        try:
+            import pyarrow.parquet as pq
+            output_path_parquet = os.path.join(BASE_DIR, OUTPUT_FILENAME_PARQUET)
+            pq.write_table(to_arrow_table(final_df, parquet_schema(final_df.columns, [final_df])), output_path_parquet)
+            print(f"已成功将合并后的数据保存到 Parquet 文件: {output_path_parquet}")
+        except Exception as e_parquet:
+            print(f"\n错误: 保存数据到 Parquet 文件时出错: {e_parquet}")
+
     # --- 打印未找到文件的摘要 ---
     if not_found_files:
         print("\n--- 摘要：处理过程中未能找到匹配文件的原始记录 ---")
@@ -345,11 +962,19 @@ if all_data_dfs:
         final_not_found_count = len(final_missing_titles)
         print(f"  (原始记录 {original_not_found_count} 条未找到，最终输出 {final_not_found_count} 行内容为空)")
 
+    # --- 打印次要查找存在歧义的摘要 ---
+    if ambiguous_matches:
+        print(f"\n--- 摘要：{len(ambiguous_matches)} 条记录的标题前缀匹配到多个文件 (已取目录中的第一个) ---")
+        for item in ambiguous_matches:
+            print(f"  [{item['Category']}] {item['Identifier']} '{item['Title'][:30]}' -> {', '.join(item['Candidates'])}")
+
     none_content_count = final_df['全文内容'].isna().sum()
     if none_content_count > 0:
         print(f"\n注意：最终输出文件中有 {none_content_count} 行的 '全文内容' 为空。")
 
     print("\n数据处理及微调完成。")
 
-else:
-    print("\n未处理任何数据。")
\ No newline at end of file
+
+if __name__ == "__main__":
+    # 并行模式在 Windows 上以 spawn 方式启动子进程，主逻辑必须放在此保护块内
+    main()
@@ -1,13 +1,33 @@
+import asyncio
 import csv
+import hashlib
+import json
 import os
-from openai import OpenAI
+import random
+import re
+import sqlite3
+from openai import AsyncOpenAI, OpenAI
 import time
 
+from authority_matcher import DETERMINISTIC_RULES, append_audit_log, build_local_matcher, match_authority_locally
+
 # --- Configuration ---
 INPUT_CSV_FILE = 'policy_data.csv'
 OUTPUT_CSV_FILE = 'policy_data_standardized_v4.csv' # Output filename remains as per your script
 TARGET_COLUMN_NAME = '制定机关'
 NEW_COLUMN_NAME = '制定机关_标准化'
+# Original component aligned one-to-one with each ';'-separated name in NEW_COLUMN_NAME
+# (schema_v2.py pairs IssuingBodyFullName and IssuingBodyShortName by position)
+COMPONENT_COLUMN_NAME = '制定机关_原名'
+
+# --- Multi-Authority Cells ---
+# Jointly issued policies list several bodies in one cell. Each component is standardized on its own
+# (cache, local matcher, LLM), so lookups grow with the number of bodies rather than their combinations.
+AUTHORITY_SEPARATORS = ";；、"
+# Official names that contain a separator themselves and must not be split
+COMPOUND_AUTHORITY_NAMES = set([
+    "中共中央纪律检查委员会、中华人民共和国国家监察委员会机关",
+])
 
 # --- IMPORTANT SECURITY NOTE ---
 # The API key below is from your provided script.
@@ -17,6 +37,41 @@ DEEPSEEK_BASE_URL = "https://api.deepseek.com"
 LLM_MODEL = "deepseek-chat"
 
 API_CALL_DELAY_SECONDS = 0.5
+MAX_RETRIES = 3
+MAX_RESPONSE_TOKENS = 150
+
+# --- Async Engine ---
+# With USE_ASYNC_ENGINE the distinct names are standardized concurrently through AsyncOpenAI.
+# A token bucket keeps both the request rate and the token rate under the account limits;
+# a failing call only backs off its own task. Set USE_ASYNC_ENGINE = False for the sequential loop.
+USE_ASYNC_ENGINE = True
+ASYNC_CONCURRENCY = 8
+REQUESTS_PER_MINUTE = 300 # 0 or None disables the request limit
+TOKENS_PER_MINUTE = 300000 # 0 or None disables the token limit
+ESTIMATED_TOKENS_PER_CHAR = 0.6 # rough token count per prompt character, corrected with the reported usage
+
+# --- Batched Prompts ---
+# BATCH_SIZE distinct names share one request, so the rules and reference lists are sent once per batch.
+# The model answers with a JSON object; names missing from it or failing validation fall back to single-name calls.
+# Set BATCH_SIZE = 1 to always use single-name prompts.
+BATCH_SIZE = 20
+MAX_BATCH_RESPONSE_TOKENS = 8000 # upper bound of the API's max_tokens
+
+# --- Standardization Cache ---
+# Results are stored per distinct (normalized) authority name, keyed together with the prompt version
+# and model, so re-runs and repeated names never hit the LLM twice. Editing the prompt or the
+# reference lists changes PROMPT_VERSION and therefore bypasses stale entries automatically.
+CACHE_DB_FILE = 'disambiguation_cache.sqlite'
+
+# --- Local Matcher ---
+# Before any LLM call, names are resolved locally with the prompt's own rules (country prefix, 机关 suffix,
+# bracket width, Rule C for people's congresses) and a character-bigram fuzzy match against the reference
+# lists. Only the deterministic rules are accepted (and only at LOCAL_MATCH_MIN_CONFIDENCE or above): fuzzy
+# matches confuse renamed or re-ranked bodies (林业厅 vs 林业局), so their candidates are only written to the
+# audit log and the name goes to the LLM. Every decision is appended to the audit log.
+USE_LOCAL_MATCHER = True
+LOCAL_MATCH_MIN_CONFIDENCE = 0.8
+LOCAL_MATCH_AUDIT_LOG = 'local_match_audit.csv' # None disables the audit log
 
 # --- Central Government & CCP Bodies List (for LLM prompt reference & direct match) ---
 CENTRAL_BODIES = set([
@@ -155,18 +210,151 @@ B3. 如果机构**当前有效**，并且不是规则A所涵盖的挂牌单位
 标准化名称：
 """
 
+# Batch prompts reuse everything in LLM_PROMPT_TEMPLATE up to the single-name input section
+LLM_BATCH_PROMPT_SUFFIX = """输入的政府机构或党组织名称（JSON 数组，共 {name_count} 个）：
+--- START NAMES ---
+{authority_names_json}
+--- END NAMES ---
+
+请对数组中的每个名称分别、独立地应用上述规则进行标准化。
+请*仅*返回一个 JSON 对象：键为上面数组中的原始名称（逐字保留，不得改动），值为对应的标准化名称（字符串，格式与单个名称时相同）。不要添加任何解释、介绍性文字或 Markdown 代码块。
+"""
+_SINGLE_NAME_INPUT_MARKER = "输入的政府机构或党组织名称："
+LLM_BATCH_PROMPT_TEMPLATE = LLM_PROMPT_TEMPLATE[:LLM_PROMPT_TEMPLATE.index(_SINGLE_NAME_INPUT_MARKER)] + LLM_BATCH_PROMPT_SUFFIX
+
 # Generate the string for the prompt using CENTRAL_BODIES
 central_bodies_for_prompt_list_string = "\n".join(sorted(list(CENTRAL_BODIES)))
 
 # Generate the string for the prompt using ZHEJIANG_BODIES
 zhejiang_bodies_for_prompt_list_string = "\n".join(sorted(list(ZHEJIANG_BODIES)))
 
+PROMPT_VERSION = hashlib.sha1(
+    (LLM_PROMPT_TEMPLATE + LLM_BATCH_PROMPT_SUFFIX + central_bodies_for_prompt_list_string + zhejiang_bodies_for_prompt_list_string).encode('utf-8')
+).hexdigest()[:12]
+
+
+def split_authority_cell(cell_value):
+    """Splits a 制定机关 cell into its stripped, non-empty components; separators inside brackets are kept."""
+    if not cell_value or not cell_value.strip():
+        return []
+    if normalize_authority_name(cell_value) in _COMPOUND_KEYS:
+        return [cell_value.strip()]
+    components, current, depth = [], [], 0
+    for char in cell_value:
+        if char in "(（[【〔":
+            depth += 1
+        elif char in ")）]】〕":
+            depth = max(depth - 1, 0)
+        if char in AUTHORITY_SEPARATORS and depth == 0:
+            components.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    components.append("".join(current))
+    return [component.strip() for component in components if component.strip()]
+
+
+def assemble_standardized_cell(components, standardized_by_key):
+    """
+    Joins the standardized components with ';' in the format schema_v2.py expects, dropping repeated bodies.
+    Returns (standardized names, original components aligned to them); a Rule A result such as
+    "<挂牌单位>;<被挂牌单位>" contributes two names, each paired with the same original component.
+    """
+    full_names, original_names = [], []
+    for component in components:
+        key = normalize_authority_name(component)
+        standardized = standardized_by_key.get(key, f"ERROR: Processing failed ({component})")
+        for full_name in standardized.split(';'):
+            full_name = full_name.strip()
+            if full_name and full_name not in full_names:
+                full_names.append(full_name)
+                original_names.append(component)
+    return ";".join(full_names), ";".join(original_names)
+
+
+def normalize_authority_name(authority_name_raw):
+    """Cache key for a raw name: whitespace removed and half-width brackets unified to full-width."""
+    if not authority_name_raw:
+        return ""
+    name = re.sub(r'\s+', '', authority_name_raw)
+    return name.replace('(', '（').replace(')', '）')
+
+
+_COMPOUND_KEYS = set(normalize_authority_name(name) for name in COMPOUND_AUTHORITY_NAMES)
+
+
+def open_standardization_cache(db_path=CACHE_DB_FILE):
+    cache = sqlite3.connect(db_path)
+    cache.execute(
+        "CREATE TABLE IF NOT EXISTS standardized_names ("
+        " normalized_name TEXT NOT NULL, prompt_version TEXT NOT NULL, model TEXT NOT NULL,"
+        " standardized_name TEXT NOT NULL, created_at REAL NOT NULL,"
+        " PRIMARY KEY (normalized_name, prompt_version, model))"
+    )
+    return cache
+
+
+def load_cached_names(cache, normalized_names):
+    """Returns {normalized_name: standardized_name} for the names already cached for this prompt and model."""
+    cached = {}
+    names = list(normalized_names)
+    for start in range(0, len(names), 500): # stay below SQLite's bound-parameter limit
+        chunk = names[start:start + 500]
+        rows = cache.execute(
+            f"SELECT normalized_name, standardized_name FROM standardized_names"
+            f" WHERE prompt_version = ? AND model = ? AND normalized_name IN ({','.join('?' * len(chunk))})",
+            [PROMPT_VERSION, LLM_MODEL] + chunk,
+        )
+        cached.update(rows)
+    return cached
+
+
+def store_cached_name(cache, normalized_name, standardized_name):
+    """Errors are never cached so that they are retried on the next run."""
+    if not normalized_name or not standardized_name or standardized_name.startswith("ERROR:"):
+        return
+    with cache:
+        cache.execute(
+            "INSERT OR REPLACE INTO standardized_names VALUES (?, ?, ?, ?, ?)",
+            (normalized_name, PROMPT_VERSION, LLM_MODEL, standardized_name, time.time()),
+        )
+
+def build_standardization_prompt(authority_name):
+    return LLM_PROMPT_TEMPLATE.format(
+        central_bodies_list_str=central_bodies_for_prompt_list_string,
+        zhejiang_bodies_list_str=zhejiang_bodies_for_prompt_list_string, # Added Zhejiang bodies list
+        authority_name=authority_name
+    )
+
+
+def build_batch_prompt(authority_names):
+    return LLM_BATCH_PROMPT_TEMPLATE.format(
+        central_bodies_list_str=central_bodies_for_prompt_list_string,
+        zhejiang_bodies_list_str=zhejiang_bodies_for_prompt_list_string,
+        name_count=len(authority_names),
+        authority_names_json=json.dumps(authority_names, ensure_ascii=False)
+    )
+
+
+def is_valid_standardized_name(standardized_name):
+    return isinstance(standardized_name, str) and 0 < len(standardized_name.strip()) <= 150 \
+        and '\n' not in standardized_name.strip()
+
+
+def parse_batch_response(content, authority_names):
+    """Returns {input name: standardized name} for the entries that pass validation; anything else is left out."""
+    content = (content or "").strip()
+    if content.startswith("```"): # tolerate a Markdown code fence despite the instructions
+        content = re.sub(r'^```(?:json)?\s*|\s*```$', '', content)
+    try:
+        mapping = json.loads(content)
+    except ValueError:
+        return {}
+    if not isinstance(mapping, dict):
+        return {}
+    return {name: mapping[name].strip() for name in authority_names
+            if name in mapping and is_valid_standardized_name(mapping[name])}
 
-try:
-    client = OpenAI(api_key=DEEPSEEK_API_KEY, base_url=DEEPSEEK_BASE_URL)
-except Exception as e:
-    print(f"Error initializing OpenAI client: {e}")
-    exit()
 
 def get_standardized_name(authority_name_raw, llm_client):
     if not authority_name_raw or not authority_name_raw.strip():
@@ -178,12 +366,8 @@ def get_standardized_name(authority_name_raw, llm_client):
     if authority_name in ALL_KNOWN_CANONICAL_NAMES:
         return authority_name
 
-    prompt = LLM_PROMPT_TEMPLATE.format(
-        central_bodies_list_str=central_bodies_for_prompt_list_string,
-        zhejiang_bodies_list_str=zhejiang_bodies_for_prompt_list_string, # Added Zhejiang bodies list
-        authority_name=authority_name
-    )
-    max_retries = 3
+    prompt = build_standardization_prompt(authority_name)
+    max_retries = MAX_RETRIES
     for attempt in range(max_retries):
         try:
             response = llm_client.chat.completions.create(
@@ -191,10 +375,10 @@ def get_standardized_name(authority_name_raw, llm_client):
                 messages=[{"role": "user", "content": prompt}],
                 stream=False,
                 temperature=0.0,
-                max_tokens=150
+                max_tokens=MAX_RESPONSE_TOKENS
             )
             standardized_name = response.choices[0].message.content.strip()
-            if not standardized_name or len(standardized_name) > 150:
+            if not is_valid_standardized_name(standardized_name):
                  print(f"Warning: Unusual response for '{authority_name}': '{standardized_name}'. Retrying...")
                  raise ValueError("Unusual or empty response received")
             if API_CALL_DELAY_SECONDS > 0:
@@ -209,41 +393,332 @@ def get_standardized_name(authority_name_raw, llm_client):
                 return f"ERROR: Could not standardize ({authority_name})"
     return f"ERROR: Could not standardize ({authority_name})" # Fallback after all retries
 
-# --- Main Processing Logic ---
-try:
-    with open(INPUT_CSV_FILE, 'r', encoding='utf-8', newline='') as infile, \
-         open(OUTPUT_CSV_FILE, 'w', encoding='utf-8', newline='') as outfile:
-        reader = csv.reader(infile)
-        writer = csv.writer(outfile)
-        header = next(reader)
+
+# --- Token Bucket Rate Limiter ---
+def create_rate_limiter(requests_per_minute=REQUESTS_PER_MINUTE, tokens_per_minute=TOKENS_PER_MINUTE):
+    """Token bucket state for both requests and LLM tokens; each bucket refills continuously up to one minute's budget."""
+    return {
+        'requests_per_minute': requests_per_minute or None,
+        'tokens_per_minute': tokens_per_minute or None,
+        'request_allowance': float(requests_per_minute or 0),
+        'token_allowance': float(tokens_per_minute or 0),
+        'updated': time.monotonic(),
+        'lock': asyncio.Lock(),
+    }
+
+
+def _refill_rate_limiter(limiter):
+    now = time.monotonic()
+    elapsed_minutes = (now - limiter['updated']) / 60
+    limiter['updated'] = now
+    if limiter['requests_per_minute']:
+        limiter['request_allowance'] = min(limiter['requests_per_minute'],
+                                           limiter['request_allowance'] + elapsed_minutes * limiter['requests_per_minute'])
+    if limiter['tokens_per_minute']:
+        limiter['token_allowance'] = min(limiter['tokens_per_minute'],
+                                         limiter['token_allowance'] + elapsed_minutes * limiter['tokens_per_minute'])
+
+
+async def acquire_rate_limit(limiter, estimated_tokens):
+    """Waits until one request and estimated_tokens tokens are available, then takes them from the buckets."""
+    if limiter['tokens_per_minute']:
+        estimated_tokens = min(estimated_tokens, limiter['tokens_per_minute']) # an oversized prompt must not wait forever
+    async with limiter['lock']: # callers are served in arrival order
+        while True:
+            _refill_rate_limiter(limiter)
+            wait_seconds = 0.0
+            if limiter['requests_per_minute'] and limiter['request_allowance'] < 1:
+                wait_seconds = (1 - limiter['request_allowance']) / limiter['requests_per_minute'] * 60
+            if limiter['tokens_per_minute'] and limiter['token_allowance'] < estimated_tokens:
+                wait_seconds = max(wait_seconds,
+                                   (estimated_tokens - limiter['token_allowance']) / limiter['tokens_per_minute'] * 60)
+            if wait_seconds <= 0:
+                break
+            await asyncio.sleep(wait_seconds)
+        if limiter['requests_per_minute']:
+            limiter['request_allowance'] -= 1
+        if limiter['tokens_per_minute']:
+            limiter['token_allowance'] -= estimated_tokens
+
+
+def record_token_usage(limiter, estimated_tokens, usage):
+    """Corrects the token bucket with the usage reported by the API (may leave it temporarily negative)."""
+    actual_tokens = getattr(usage, 'total_tokens', None) if usage is not None else None
+    if limiter['tokens_per_minute'] and actual_tokens:
+        limiter['token_allowance'] -= actual_tokens - min(estimated_tokens, limiter['tokens_per_minute'])
+
+
+async def get_standardized_name_async(authority_name_raw, llm_client, rate_limiter):
+    """Async counterpart of get_standardized_name; retries back off only this task."""
+    if not authority_name_raw or not authority_name_raw.strip():
+        return ""
+    authority_name = authority_name_raw.strip()
+    if authority_name in ALL_KNOWN_CANONICAL_NAMES:
+        return authority_name
+
+    prompt = build_standardization_prompt(authority_name)
+    estimated_tokens = int(len(prompt) * ESTIMATED_TOKENS_PER_CHAR) + MAX_RESPONSE_TOKENS
+    for attempt in range(MAX_RETRIES):
         try:
-            target_col_index = header.index(TARGET_COLUMN_NAME)
-        except ValueError:
-            print(f"Error: Column '{TARGET_COLUMN_NAME}' not found in '{INPUT_CSV_FILE}'. Available columns: {header}")
-            exit()
-        new_header = header + [NEW_COLUMN_NAME]
-        writer.writerow(new_header)
-        print(f"Starting standardization. Input: '{INPUT_CSV_FILE}', Output: '{OUTPUT_CSV_FILE}'")
-        processed_count = 0
-        for i, row in enumerate(reader):
-            if not row: continue # Skip empty rows
+            await acquire_rate_limit(rate_limiter, estimated_tokens)
+            response = await llm_client.chat.completions.create(
+                model=LLM_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                stream=False,
+                temperature=0.0,
+                max_tokens=MAX_RESPONSE_TOKENS
+            )
+            record_token_usage(rate_limiter, estimated_tokens, getattr(response, 'usage', None))
+            standardized_name = response.choices[0].message.content.strip()
+            if not is_valid_standardized_name(standardized_name):
+                print(f"Warning: Unusual response for '{authority_name}': '{standardized_name}'. Retrying...")
+                raise ValueError("Unusual or empty response received")
+            return standardized_name
+        except Exception as e:
+            print(f"Error calling LLM for '{authority_name}' (Attempt {attempt + 1}/{MAX_RETRIES}): {e}")
+            if attempt < MAX_RETRIES - 1:
+                await asyncio.sleep(2 ** attempt + random.uniform(0, 1)) # Exponential backoff with jitter
+    print(f"Failed to standardize '{authority_name}' after {MAX_RETRIES} attempts.")
+    return f"ERROR: Could not standardize ({authority_name})"
+
+
+def _batch_request_kwargs(authority_names):
+    return dict(
+        model=LLM_MODEL,
+        messages=[{"role": "user", "content": build_batch_prompt(authority_names)}],
+        stream=False,
+        temperature=0.0,
+        max_tokens=min(MAX_BATCH_RESPONSE_TOKENS, MAX_RESPONSE_TOKENS * len(authority_names)),
+        response_format={"type": "json_object"},
+    )
+
+
+def get_standardized_names_batch(authority_names, llm_client):
+    """
+    Standardizes several stripped, non-empty names in one request. Returns {name: standardized name} for the
+    names that were answered validly; the caller falls back to get_standardized_name for the rest.
+    """
+    request_kwargs = _batch_request_kwargs(authority_names)
+    for attempt in range(MAX_RETRIES):
+        try:
+            response = llm_client.chat.completions.create(**request_kwargs)
+            results = parse_batch_response(response.choices[0].message.content, authority_names)
+            if not results:
+                raise ValueError("No valid entries in batch response")
+            if API_CALL_DELAY_SECONDS > 0:
+                time.sleep(API_CALL_DELAY_SECONDS)
+            return results
+        except Exception as e:
+            print(f"Error calling LLM for a batch of {len(authority_names)} names (Attempt {attempt + 1}/{MAX_RETRIES}): {e}")
+            if attempt < MAX_RETRIES - 1:
+                time.sleep(2 ** attempt) # Exponential backoff
+    return {}
+
+
+async def get_standardized_names_batch_async(authority_names, llm_client, rate_limiter):
+    """Async counterpart of get_standardized_names_batch."""
+    request_kwargs = _batch_request_kwargs(authority_names)
+    estimated_tokens = int(len(request_kwargs['messages'][0]['content']) * ESTIMATED_TOKENS_PER_CHAR) \
+        + request_kwargs['max_tokens']
+    for attempt in range(MAX_RETRIES):
+        try:
+            await acquire_rate_limit(rate_limiter, estimated_tokens)
+            response = await llm_client.chat.completions.create(**request_kwargs)
+            record_token_usage(rate_limiter, estimated_tokens, getattr(response, 'usage', None))
+            results = parse_batch_response(response.choices[0].message.content, authority_names)
+            if not results:
+                raise ValueError("No valid entries in batch response")
+            return results
+        except Exception as e:
+            print(f"Error calling LLM for a batch of {len(authority_names)} names (Attempt {attempt + 1}/{MAX_RETRIES}): {e}")
+            if attempt < MAX_RETRIES - 1:
+                await asyncio.sleep(2 ** attempt + random.uniform(0, 1)) # Exponential backoff with jitter
+    return {}
+
+
+def resolve_names_locally(pending_keys, raw_by_key, standardized_by_key):
+    """
+    Resolves what the local matcher can answer with enough confidence and returns the keys left for the LLM.
+    Local results are not written to the cache, so tuning the matcher takes effect on the next run.
+    """
+    matcher = build_local_matcher(ALL_KNOWN_CANONICAL_NAMES)
+    remaining_keys, audit_entries = [], []
+    for key in pending_keys:
+        result = match_authority_locally(matcher, raw_by_key[key])
+        accepted = (result['rule'] in DETERMINISTIC_RULES and result['standardized_name'] is not None
+                    and result['confidence'] >= LOCAL_MATCH_MIN_CONFIDENCE)
+        audit_entries.append((raw_by_key[key], result, accepted))
+        if accepted:
+            standardized_by_key[key] = result['standardized_name']
+        else:
+            remaining_keys.append(key)
+    append_audit_log(LOCAL_MATCH_AUDIT_LOG, audit_entries)
+    return remaining_keys
+
+
+def plan_llm_batches(pending_keys, raw_by_key):
+    """
+    Splits pending keys into (keys resolved without the LLM, batches of keys for batched prompts).
+    Empty names and exact reference-list hits never reach the LLM; with BATCH_SIZE <= 1 there are no batches.
+    """
+    local_keys, llm_keys = [], []
+    for key in pending_keys:
+        authority_name = raw_by_key[key].strip()
+        (local_keys if not authority_name or authority_name in ALL_KNOWN_CANONICAL_NAMES else llm_keys).append(key)
+    if BATCH_SIZE is None or BATCH_SIZE <= 1:
+        return pending_keys, []
+    return local_keys, [llm_keys[start:start + BATCH_SIZE] for start in range(0, len(llm_keys), BATCH_SIZE)]
+
+
+def standardize_pending_names(pending_keys, raw_by_key, standardized_by_key, cache):
+    """Sequential engine: one blocking call at a time with API_CALL_DELAY_SECONDS between calls."""
+    try:
+        client = OpenAI(api_key=DEEPSEEK_API_KEY, base_url=DEEPSEEK_BASE_URL)
+    except Exception as e:
+        print(f"Error initializing OpenAI client: {e}")
+        return
+    single_keys, batches = plan_llm_batches(pending_keys, raw_by_key)
+    for n, batch in enumerate(batches, start=1):
+        authority_names = [raw_by_key[key].strip() for key in batch]
+        print(f"Processing batch {n}/{len(batches)} ({len(batch)} names)")
+        results = get_standardized_names_batch(authority_names, client)
+        for key, authority_name in zip(batch, authority_names):
+            if authority_name in results:
+                print(f"  '{authority_name}' -> '{results[authority_name]}'")
+                standardized_by_key[key] = results[authority_name]
+                store_cached_name(cache, key, results[authority_name])
+            else:
+                single_keys.append(key) # fall back to a single-name call
+        if len(results) < len(batch):
+            print(f"  {len(batch) - len(results)} names without a valid answer will be retried individually.")
+
+    for n, key in enumerate(single_keys, start=1):
+        original_authority = raw_by_key[key]
+        print(f"Processing distinct value {n}/{len(single_keys)}: Original='{original_authority}'")
+        try:
+            standardized_authority = get_standardized_name(original_authority, client)
+        except Exception as e:
+            print(f"Error processing '{original_authority}': {e}")
+            standardized_authority = f"ERROR: Processing failed ({original_authority})"
+        print(f"  -> Standardized='{standardized_authority}'")
+        standardized_by_key[key] = standardized_authority
+        store_cached_name(cache, key, standardized_authority)
+
+
+async def standardize_pending_names_async(pending_keys, raw_by_key, standardized_by_key, cache):
+    """Async engine: up to ASYNC_CONCURRENCY calls in flight, throttled by the token bucket."""
+    try:
+        client = AsyncOpenAI(api_key=DEEPSEEK_API_KEY, base_url=DEEPSEEK_BASE_URL)
+    except Exception as e:
+        print(f"Error initializing AsyncOpenAI client: {e}")
+        return
+    semaphore = asyncio.Semaphore(ASYNC_CONCURRENCY)
+    rate_limiter = create_rate_limiter()
+    completed = 0
+
+    def record_result(key, original_authority, standardized_authority):
+        nonlocal completed
+        standardized_by_key[key] = standardized_authority
+        store_cached_name(cache, key, standardized_authority) # cached as soon as it completes, so an interrupted run keeps it
+        completed += 1
+        print(f"[{completed}/{len(pending_keys)}] '{original_authority}' -> '{standardized_authority}'")
+
+    async def standardize_one(key):
+        original_authority = raw_by_key[key]
+        async with semaphore:
             try:
-                original_authority = row[target_col_index]
-                print(f"Processing row {i+2}: Original='{original_authority}'") # i is 0-based for data rows
-                standardized_authority = get_standardized_name(original_authority, client)
-                print(f"  -> Standardized='{standardized_authority}'")
-                output_row = row + [standardized_authority]
-                writer.writerow(output_row)
-                processed_count += 1
-            except IndexError:
-                print(f"Warning: Row {i+2} has fewer columns than expected. Skipping.")
-                writer.writerow(row + ["ERROR: Malformed row"])
+                standardized_authority = await get_standardized_name_async(original_authority, client, rate_limiter)
             except Exception as e:
-                 print(f"Error processing row {i+2} ('{original_authority}'): {e}")
-                 writer.writerow(row + [f"ERROR: Processing failed ({original_authority})"])
-        print(f"\nProcessing finished. {processed_count} data rows processed.")
+                print(f"Error processing '{original_authority}': {e}")
+                standardized_authority = f"ERROR: Processing failed ({original_authority})"
+        record_result(key, original_authority, standardized_authority)
+
+    async def standardize_batch(batch):
+        authority_names = [raw_by_key[key].strip() for key in batch]
+        async with semaphore:
+            results = await get_standardized_names_batch_async(authority_names, client, rate_limiter)
+        fallback_keys = []
+        for key, authority_name in zip(batch, authority_names):
+            if authority_name in results:
+                record_result(key, raw_by_key[key], results[authority_name])
+            else:
+                fallback_keys.append(key)
+        if fallback_keys:
+            print(f"{len(fallback_keys)} names from a batch of {len(batch)} will be retried individually.")
+            # the semaphore is released first: the single-name fallbacks acquire it themselves
+            await asyncio.gather(*(standardize_one(key) for key in fallback_keys))
+
+    single_keys, batches = plan_llm_batches(pending_keys, raw_by_key)
+    await asyncio.gather(*(standardize_one(key) for key in single_keys),
+                         *(standardize_batch(batch) for batch in batches))
+
+# --- Main Processing Logic ---
+def main():
+    try:
+        with open(INPUT_CSV_FILE, 'r', encoding='utf-8', newline='') as infile:
+            reader = csv.reader(infile)
+            header = next(reader)
+            rows = [row for row in reader if row] # Skip empty rows
+    except FileNotFoundError:
+        print(f"Error: Input file '{INPUT_CSV_FILE}' not found.")
+        return
+    try:
+        target_col_index = header.index(TARGET_COLUMN_NAME)
+    except ValueError:
+        print(f"Error: Column '{TARGET_COLUMN_NAME}' not found in '{INPUT_CSV_FILE}'. Available columns: {header}")
+        return
+
+    # Resolve each distinct authority once (cache first, LLM only for misses), then join back to all rows.
+    # Multi-authority cells are split so that every body is looked up on its own.
+    raw_by_key = {}
+    components_by_row = []
+    for row in rows:
+        components = split_authority_cell(row[target_col_index]) if len(row) > target_col_index else []
+        components_by_row.append(components)
+        for component in components:
+            raw_by_key.setdefault(normalize_authority_name(component), component)
+    print(f"Starting standardization. Input: '{INPUT_CSV_FILE}', Output: '{OUTPUT_CSV_FILE}'")
+    print(f"{len(rows)} data rows, {len(set(row[target_col_index] for row in rows if len(row) > target_col_index))} "
+          f"distinct '{TARGET_COLUMN_NAME}' values, {len(raw_by_key)} distinct authorities after splitting "
+          f"(prompt version {PROMPT_VERSION}).")
+
+    cache = open_standardization_cache(CACHE_DB_FILE)
+    try:
+        standardized_by_key = load_cached_names(cache, raw_by_key)
+        print(f"{len(standardized_by_key)} distinct authorities found in cache '{CACHE_DB_FILE}'.")
+        pending_keys = [key for key in raw_by_key if key not in standardized_by_key]
+        if USE_LOCAL_MATCHER and pending_keys:
+            remaining_keys = resolve_names_locally(pending_keys, raw_by_key, standardized_by_key)
+            print(f"{len(pending_keys) - len(remaining_keys)} distinct authorities resolved by the local matcher "
+                  f"(audit log: '{LOCAL_MATCH_AUDIT_LOG}').")
+            pending_keys = remaining_keys
+        if USE_ASYNC_ENGINE:
+            print(f"Standardizing {len(pending_keys)} values with up to {ASYNC_CONCURRENCY} concurrent requests "
+                  f"({REQUESTS_PER_MINUTE or 'unlimited'} requests/min, {TOKENS_PER_MINUTE or 'unlimited'} tokens/min).")
+            asyncio.run(standardize_pending_names_async(pending_keys, raw_by_key, standardized_by_key, cache))
+        else:
+            standardize_pending_names(pending_keys, raw_by_key, standardized_by_key, cache)
+    finally:
+        cache.close()
+
+    try:
+        with open(OUTPUT_CSV_FILE, 'w', encoding='utf-8', newline='') as outfile:
+            writer = csv.writer(outfile)
+            writer.writerow(header + [NEW_COLUMN_NAME, COMPONENT_COLUMN_NAME])
+            processed_count = 0
+            for i, (row, components) in enumerate(zip(rows, components_by_row)):
+                if len(row) <= target_col_index:
+                    print(f"Warning: Row {i+2} has fewer columns than expected. Skipping.")
+                    writer.writerow(row + ["ERROR: Malformed row", ""])
+                    continue
+                writer.writerow(row + list(assemble_standardized_cell(components, standardized_by_key)))
+                processed_count += 1
+        print(f"\nProcessing finished. {processed_count} data rows processed, "
+              f"{len(pending_keys)} distinct authorities sent for standardization.")
         print(f"Standardized data saved to '{OUTPUT_CSV_FILE}'")
-except FileNotFoundError:
-    print(f"Error: Input file '{INPUT_CSV_FILE}' not found.")
-except Exception as e:
-    print(f"An unexpected error occurred: {e}")
\ No newline at end of file
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import hashlib
+import os
+import zlib
+
+import pandas as pd
+
+# --- 政策全文的内容寻址存储 ---
+# 全文经 zlib 压缩后以内容的 SHA-1 为键保存为 <存储目录>/<哈希前两位>/<哈希>.zz，
+# CSV 中只保存形如 "fulltext:sha1:<哈希>" 的引用，各处理阶段在需要时再加载全文。
+# 相同内容只存一份，重复运行时已存在的文件不会重写。
+
+FULLTEXT_REF_PREFIX = "fulltext:sha1:"
+FULLTEXT_STORE_DIRNAME = "fulltext_store" # 与 CSV 文件放在同一目录下，见 fulltext_store_dir_for
+TRUNCATION_SUFFIX = "... [截断]"
+COMPRESSION_LEVEL = 6
+
+
+def fulltext_store_dir_for(csv_path):
+    """
+    全文存储目录统一位于 CSV 文件所在目录下：data_clean.py 按输出 CSV 确定写入位置，
+    后续各阶段按各自的输入 CSV 确定读取位置，与当前工作目录无关。
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(csv_path)), FULLTEXT_STORE_DIRNAME)
+
+
+def _blob_path(store_dir, digest):
+    return os.path.join(store_dir, digest[:2], digest + ".zz")
+
+
+def put_full_text(text, store_dir):
+    """ 将全文写入存储并返回引用字符串；text 为 None 时返回 None """
+    if text is None:
+        return None
+    data = text.encode('utf-8')
+    digest = hashlib.sha1(data).hexdigest()
+    blob_path = _blob_path(store_dir, digest)
+    if not os.path.isfile(blob_path):
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        # 先写临时文件再重命名，避免中断或并发写入留下不完整的文件
+        tmp_path = f"{blob_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(zlib.compress(data, COMPRESSION_LEVEL))
+        os.replace(tmp_path, blob_path)
+    return FULLTEXT_REF_PREFIX + digest
+
+
+def is_full_text_ref(value):
+    """ 判断单元格的值是否为全文引用 """
+    return isinstance(value, str) and value.startswith(FULLTEXT_REF_PREFIX)
+
+
+def load_full_text(value, store_dir, max_length=None):
+    """
+    按需加载全文：value 为引用时从存储中读取并解压，否则视为旧版 CSV 中直接保存的正文原样返回
+    (空值返回空字符串)。
+    max_length 仅作用于从存储加载的全文，超出部分按旧版 data_clean.py 的方式截断，
+    便于 LLM 阶段保持原有的提示长度上限。
+    """
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ""
+    if not is_full_text_ref(value):
+        return str(value)
+
+    digest = value[len(FULLTEXT_REF_PREFIX):]
+    try:
+        with open(_blob_path(store_dir, digest), 'rb') as f:
+            text = zlib.decompress(f.read()).decode('utf-8')
+    except FileNotFoundError:
+        print(f"警告: 全文存储中找不到 {value} (存储目录: {store_dir})。")
+        return ""
+    if max_length is not None and len(text) > max_length:
+        text = text[:max_length] + TRUNCATION_SUFFIX
+    return text
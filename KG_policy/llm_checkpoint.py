@@ -0,0 +1,82 @@
+import hashlib
+import json
+import os
+import time
+
+# --- LLM 抽取阶段的断点续跑 ---
+# 每个阶段维护一个只追加的 JSONL 文件，每完成一条政策就写入一行：
+#   {"id": 政策编号, "version": 阶段版本, "input": 输入指纹, "result": 结果, "time": 时间戳}
+# 重新运行时读取该文件，政策编号、阶段版本和输入指纹都一致的记录视为已完成，直接并入输出 CSV。
+# 同一政策多次写入时以最后一条为准；进程中断留下的不完整末行会被忽略。
+
+
+def stage_version(*parts):
+    """ 由提示词、模型、候选列表等决定结果的内容计算阶段版本，任何一项变化都会使旧记录失效 """
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+
+
+def input_fingerprint(*values):
+    """ 计算一行输入 (标题、全文、政策工具等) 的指纹，输入变化的政策会被重新处理 """
+    payload = json.dumps([None if value is None else str(value) for value in values], ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def load_checkpoint(path, version):
+    """ 读取检查点文件，返回 {政策编号: {'input': 输入指纹, 'result': 结果}}；只保留当前阶段版本的记录 """
+    records = {}
+    if not path or not os.path.isfile(path):
+        return records
+    skipped_lines = 0
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                skipped_lines += 1  # 中断时写了一半的行
+                continue
+            if record.get('version') == version and record.get('id'):
+                records[record['id']] = {'input': record.get('input'), 'result': record.get('result')}
+    if skipped_lines:
+        print(f"警告: 检查点文件 {path} 中有 {skipped_lines} 行无法解析，已忽略。")
+    return records
+
+
+def lookup_checkpoint(records, policy_id, fingerprint):
+    """ 返回 (是否已完成, 结果)；结果本身可能是空字符串，因此单独返回是否命中 """
+    record = records.get(policy_id) if policy_id else None
+    if record is None or record['input'] != fingerprint:
+        return False, None
+    return True, record['result']
+
+
+def open_checkpoint(path):
+    """
+    以追加模式打开检查点文件 (不存在时创建所在目录)。
+    上次中断留下的不完整末行没有换行符，先补一个换行，避免新记录接在它后面而同样无法解析。
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    needs_newline = False
+    if os.path.isfile(path) and os.path.getsize(path) > 0:
+        with open(path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b"\n"
+    handle = open(path, 'a', encoding='utf-8')
+    if needs_newline:
+        handle.write("\n")
+        handle.flush()
+    return handle
+
+
+def append_checkpoint(handle, policy_id, version, fingerprint, result):
+    """ 追加一条完成记录并立即落盘，进程随后崩溃也不会丢失；handle 为 None (未启用检查点) 时不做任何事 """
+    if handle is None or not policy_id:
+        return
+    record = {'id': policy_id, 'version': version, 'input': fingerprint, 'result': result, 'time': time.time()}
+    handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+    handle.flush()
+    os.fsync(handle.fileno())
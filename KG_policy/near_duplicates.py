@@ -0,0 +1,180 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from fulltext_store import fulltext_store_dir_for, load_full_text
+
+# --- 配置信息 ---
+INPUT_CSV_FILE = "combined_policy_data_adjusted_v2.csv"  # data_clean.py 的输出
+OUTPUT_CSV_FILE = "near_duplicate_clusters.csv"  # 近重复簇输出 (供 LLM 抽取阶段复用规范政策的结果)
+ID_COLUMN = "编号"
+TITLE_COLUMN = "标题"
+TEXT_COLUMN = "全文内容"
+
+SHINGLE_SIZE = 5  # 字符 shingle 长度
+NUM_PERMUTATIONS = 128  # MinHash 签名长度
+LSH_BANDS = 16  # LSH 分段数；每段 NUM_PERMUTATIONS // LSH_BANDS 行，候选阈值约为 (1/b)^(1/r) ≈ 0.71
+SIMILARITY_THRESHOLD = 0.8  # 候选对的估计 Jaccard 相似度达到该值才视为近重复
+RANDOM_SEED = 20240501  # 固定随机种子，保证多次运行得到相同的签名和簇
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_HASH_BASE = np.uint64(1000003)
+_MASK_32 = np.uint64(0xFFFFFFFF)
+
+
+def _permutation_params(num_permutations, seed):
+    """ 生成 MinHash 使用的 (a, b) 参数；取值小于 2^31 以保证 a*h+b 不会溢出 uint64 """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 1 << 31, size=num_permutations, dtype=np.uint64)
+    b = rng.integers(0, 1 << 31, size=num_permutations, dtype=np.uint64)
+    return a, b
+
+
+_PERM_A, _PERM_B = _permutation_params(NUM_PERMUTATIONS, RANDOM_SEED)
+
+
+def shingle_hashes(text, shingle_size=SHINGLE_SIZE):
+    """ 计算文本所有字符 shingle 的 32 位滚动哈希 (去重后)；文本短于 shingle 长度时返回空数组 """
+    codepoints = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+    count = len(codepoints) - shingle_size + 1
+    if count <= 0:
+        return np.empty(0, dtype=np.uint64)
+    hashes = np.zeros(count, dtype=np.uint64)
+    for offset in range(shingle_size):
+        hashes = hashes * _HASH_BASE + codepoints[offset:offset + count]  # uint64 自然回绕
+    return np.unique(hashes & _MASK_32)
+
+
+def minhash_signature(hashes, block_size=8192):
+    """ 计算 shingle 哈希集合的 MinHash 签名；分块计算，超长法规也只占用固定大小的临时内存 """
+    signature = np.full(NUM_PERMUTATIONS, _MERSENNE_PRIME, dtype=np.uint64)
+    for start in range(0, len(hashes), block_size):
+        block = hashes[start:start + block_size]
+        permuted = (_PERM_A[:, None] * block[None, :] + _PERM_B[:, None]) % _MERSENNE_PRIME
+        np.minimum(signature, permuted.min(axis=1), out=signature)
+    return signature
+
+
+def estimated_similarity(signature_a, signature_b):
+    """ 用签名中相同位置相等的比例估计 Jaccard 相似度 """
+    return float(np.mean(signature_a == signature_b))
+
+
+def find_near_duplicate_clusters(texts, threshold=SIMILARITY_THRESHOLD, bands=LSH_BANDS):
+    """
+    对文本列表做 MinHash + LSH 近重复检测，总体耗时与文档数近似线性。
+    返回簇列表，每个簇为 [(文档下标, 与规范文档的估计相似度), ...]，规范文档 (列表中最早出现的一篇) 排在首位。
+    只返回包含两篇及以上文档的簇。
+    """
+    signatures = {}
+    for i, text in enumerate(texts):
+        if not text:
+            continue
+        hashes = shingle_hashes(text)
+        if len(hashes):
+            signatures[i] = minhash_signature(hashes)
+
+    parent = {i: i for i in signatures}
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i, j):
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            # 以下标较小 (更早出现) 的文档为根，根即规范文档
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    rows_per_band = NUM_PERMUTATIONS // bands
+    for band in range(bands):
+        buckets = {}
+        lo, hi = band * rows_per_band, (band + 1) * rows_per_band
+        for i, signature in signatures.items():
+            buckets.setdefault(signature[lo:hi].tobytes(), []).append(i)
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            # 桶内每篇文档只与已有的代表文档比较，避免大桶产生平方级的候选对
+            representatives = [members[0]]
+            for i in members[1:]:
+                for rep in representatives:
+                    if estimated_similarity(signatures[i], signatures[rep]) >= threshold:
+                        union(i, rep)
+                        break
+                else:
+                    representatives.append(i)
+
+    groups = {}
+    for i in signatures:
+        groups.setdefault(find(i), []).append(i)
+    clusters = []
+    for root, members in sorted(groups.items()):
+        if len(members) < 2:
+            continue
+        members.sort()
+        clusters.append([(i, estimated_similarity(signatures[i], signatures[root])) for i in members])
+    return clusters
+
+
+def load_canonical_map(clusters_csv_path):
+    """
+    读取近重复簇文件，返回 {成员编号: 规范编号}，规范政策本身不在其中。
+    文件不存在或未配置时返回空字典。
+    """
+    if not clusters_csv_path or not os.path.isfile(clusters_csv_path):
+        return {}
+    df_clusters = pd.read_csv(clusters_csv_path, dtype=str).fillna('')
+    return {
+        member_id: canonical_id
+        for member_id, canonical_id in zip(df_clusters[ID_COLUMN], df_clusters['规范编号'])
+        if member_id and canonical_id and member_id != canonical_id
+    }
+
+
+def main():
+    print(f"正在从 {INPUT_CSV_FILE} 加载数据...")
+    try:
+        df = pd.read_csv(INPUT_CSV_FILE)
+    except FileNotFoundError:
+        print(f"错误: 输入文件 '{INPUT_CSV_FILE}' 未找到。")
+        return
+
+    for col in [ID_COLUMN, TEXT_COLUMN]:
+        if col not in df.columns:
+            print(f"错误: CSV文件必须包含 '{col}' 列。")
+            return
+
+    print(f"找到 {len(df)} 条政策，开始计算 MinHash 签名 (shingle={SHINGLE_SIZE}, 签名长度={NUM_PERMUTATIONS}, "
+          f"分段={LSH_BANDS}, 阈值={SIMILARITY_THRESHOLD})...")
+    start_time = time.time()
+    fulltext_store_dir = fulltext_store_dir_for(INPUT_CSV_FILE)
+    texts = [load_full_text(value, fulltext_store_dir) for value in df[TEXT_COLUMN]]
+    clusters = find_near_duplicate_clusters(texts)
+    print(f"检测完成，耗时 {time.time() - start_time:.2f} 秒。")
+
+    output_rows = []
+    for cluster_id, cluster in enumerate(clusters, start=1):
+        canonical_index = cluster[0][0]
+        for i, similarity in cluster:
+            output_rows.append({
+                'ClusterID': cluster_id,
+                ID_COLUMN: df.at[i, ID_COLUMN],
+                '规范编号': df.at[canonical_index, ID_COLUMN],
+                TITLE_COLUMN: df.at[i, TITLE_COLUMN] if TITLE_COLUMN in df.columns else '',
+                '估计相似度': round(similarity, 4),
+            })
+
+    duplicate_count = sum(len(cluster) - 1 for cluster in clusters)
+    print(f"发现 {len(clusters)} 个近重复簇，共 {duplicate_count} 条政策可复用规范政策的抽取结果。")
+    pd.DataFrame(output_rows, columns=['ClusterID', ID_COLUMN, '规范编号', TITLE_COLUMN, '估计相似度']).to_csv(
+        OUTPUT_CSV_FILE, index=False, encoding='utf-8-sig')
+    print(f"近重复簇已保存到 {OUTPUT_CSV_FILE}")
+
+
+if __name__ == "__main__":
+    main()
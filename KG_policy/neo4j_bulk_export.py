@@ -0,0 +1,219 @@
+import csv
+import os
+import time
+
+import pandas as pd
+
+from fulltext_store import fulltext_store_dir_for
+from policy_records import MULTI_VALUE_FIELDS_MAP, build_policy_record, build_quantity_properties
+
+# --- 离线批量导入的 CSV 导出 ---
+# 首次构建或全量重建图谱时不需要逐行 MERGE：本脚本把主数据 CSV 和两个映射表转换为
+# `neo4j-admin database import` 格式的节点和关系 CSV (带类型化表头)，导入目标数据库只需数秒。
+# 每类节点以其唯一约束字段作为导入 ID (Policy 为 fabaoCitation，IssuingBody 为 fullName，其余为 name)，
+# 重复运行得到相同的 ID；节点、关系和属性的合并规则与 schema_v2.py 的事务导入一致：
+# 同一节点或关系出现多次时后出现的属性覆盖先出现的，行政区划和工具分类只补充到主数据中出现过的节点上。
+
+# --- 配置信息 ---
+INPUT_CSV_FILE = "policy_data_with_quantitative_info_v6_formatted.csv"
+POLICY_TOOL_XLSX_FILE = "policy_tool.xlsx"
+AREA_CODE_XLSX_FILE = "area_code.xlsx"
+OUTPUT_DIR = "neo4j_import"
+DATABASE_NAME = "neo4j"
+ARRAY_DELIMITER = "|"  # 数组属性的分隔符，对应 neo4j-admin 的 --array-delimiter
+IMPORT_SCRIPT_FILE = "import.sh"  # 生成的导入命令，保存在 OUTPUT_DIR 下
+
+# 节点标签 -> 表头 (第一列为导入 ID，同时作为同名属性写入)
+NODE_HEADERS = {
+    'Policy': ['fabaoCitation:ID(Policy)', 'title', 'documentNumber', 'announceDate:date', 'implementDate:date',
+               'policyLevel', 'validationStatus', 'fullText'],
+    'IssuingBody': ['fullName:ID(IssuingBody)', 'shortName'],
+    'PolicyTopic': ['name:ID(PolicyTopic)'],
+    'PolicyTool': ['name:ID(PolicyTool)', 'category'],
+    'TargetBeneficiary': ['name:ID(TargetBeneficiary)'],
+    'GeographicRegion': ['name:ID(GeographicRegion)', 'code', 'level'],
+    'IndustryFocus': ['name:ID(IndustryFocus)', 'code'],
+}
+# 关系类型 -> (起点标签, 终点标签, 属性表头)
+RELATIONSHIP_HEADERS = {
+    'ISSUED_BY': ('Policy', 'IssuingBody', []),
+    **{rel_type: ('Policy', label, []) for label, rel_type, _ in MULTI_VALUE_FIELDS_MAP.values()},
+    'FOCUSES_ON_INDUSTRY': ('Policy', 'IndustryFocus', []),
+    'APPLIES_TOOL': ('Policy', 'PolicyTool', [
+        'quantitativeDetail', 'quantityLabels:string[]', 'quantityValues:double[]', 'quantityUnits:string[]',
+        'quantityTexts:string[]', 'maxAmountYuan:double', 'maxRatioPercent:double', 'maxDurationDays:double',
+        'maxAreaMu:double']),
+    'IS_SUBREGION_OF': ('GeographicRegion', 'GeographicRegion', []),
+}
+
+
+def _property_name(header):
+    return header.split(':')[0]
+
+
+def _format_value(value):
+    """ None 写为空字段 (导入时不设置该属性)，列表按 ARRAY_DELIMITER 拼接 """
+    if value is None:
+        return ''
+    if isinstance(value, list):
+        return ARRAY_DELIMITER.join(str(item).replace(ARRAY_DELIMITER, '｜') for item in value)
+    return value
+
+
+def node_file_path(label):
+    return os.path.join(OUTPUT_DIR, f"nodes_{label}.csv")
+
+
+def relationship_file_path(rel_type):
+    return os.path.join(OUTPUT_DIR, f"rels_{rel_type}.csv")
+
+
+def open_csv_writer(path, header):
+    f = open(path, 'w', encoding='utf-8', newline='')
+    writer = csv.writer(f)
+    writer.writerow(header)
+    return f, writer
+
+
+def collect_policy_graph(df_policies, fulltext_store_dir):
+    """
+    遍历主数据，Policy 节点直接流式写出 (同一政策出现多次时只写最后一次)，
+    其余节点和关系累积到 {标签: {ID: 属性}} 和 {关系类型: {(起点ID, 终点ID): 属性}} 中返回。
+    """
+    nodes = {label: {} for label in NODE_HEADERS if label != 'Policy'}
+    relationships = {rel_type: {} for rel_type in RELATIONSHIP_HEADERS}
+    last_index = {fabao_citation.strip(): index for index, fabao_citation in df_policies['FabaoCitation'].items()}
+
+    policy_header = NODE_HEADERS['Policy']
+    policy_file, policy_writer = open_csv_writer(node_file_path('Policy'), policy_header + [':LABEL'])
+    policy_count = 0
+    with policy_file:
+        for index, row in df_policies.iterrows():
+            record = build_policy_record(index, row, fulltext_store_dir)
+            if record is None:
+                print(f"警告: 第 {index + 2} 行缺少 FabaoCitation，跳过此行。")
+                continue
+            fabao_citation = record['policy']['fabaoCitation']
+            if last_index[fabao_citation] == index:
+                policy_writer.writerow([_format_value(record['policy'][_property_name(header)])
+                                        for header in policy_header] + ['Policy'])
+                policy_count += 1
+
+            for full_name, short_name in record['issuers']:
+                nodes['IssuingBody'][full_name] = {'shortName': short_name}
+                relationships['ISSUED_BY'][(fabao_citation, full_name)] = {}
+            for label, rel_type, _, item_name in record['links']:
+                nodes[label].setdefault(item_name, {})
+                relationships[rel_type][(fabao_citation, item_name)] = {}
+            for industry_name, industry_code in record['industries']:
+                nodes['IndustryFocus'][industry_name] = {'code': industry_code}
+                relationships['FOCUSES_ON_INDUSTRY'][(fabao_citation, industry_name)] = {}
+            for tool_name, detail in record['tools']:
+                detail = detail if detail else None
+                nodes['PolicyTool'].setdefault(tool_name, {})
+                relationships['APPLIES_TOOL'][(fabao_citation, tool_name)] = dict(
+                    build_quantity_properties(detail), quantitativeDetail=detail)
+    print(f"已写出 {policy_count} 个 Policy 节点。")
+    return nodes, relationships
+
+
+def apply_tool_categories(nodes, path):
+    """ 与 schema_v2.py 相同：只更新主数据中出现过的工具，分类为空时不设置属性 """
+    try:
+        df_tool_categories = pd.read_excel(path, dtype=str).fillna('')
+    except FileNotFoundError:
+        print(f"警告: 工具分类映射文件 {path} 未找到。跳过此步骤。")
+        return
+    for _, row_map in df_tool_categories.iterrows():
+        tool_name = row_map.get('PolicyTool', '').strip()
+        if tool_name in nodes['PolicyTool']:
+            nodes['PolicyTool'][tool_name]['category'] = row_map.get('Category', '').strip() or None
+
+
+def apply_area_codes(nodes, relationships, path):
+    """ 为主数据中出现过的行政区划补充 code / level，并按 Pcode 建立 IS_SUBREGION_OF (Pcode 为 "0" 的顶级区域除外) """
+    try:
+        df_area_codes = pd.read_excel(path, dtype=str).fillna('')
+    except FileNotFoundError:
+        print(f"警告: 行政区划映射文件 {path} 未找到。跳过此步骤。")
+        return
+    regions = nodes['GeographicRegion']
+    for _, row_map in df_area_codes.iterrows():
+        area_name = row_map.get('Name', '').strip()
+        if area_name in regions:
+            for key, column in (('code', 'Code'), ('level', 'Level')):
+                value = str(row_map.get(column, '')).strip()
+                if value:
+                    regions[area_name][key] = value
+
+    names_by_code = {}
+    for region_name, properties in regions.items():
+        if properties.get('code'):
+            names_by_code.setdefault(properties['code'], []).append(region_name)
+    for _, row_map in df_area_codes.iterrows():
+        child_area_name = row_map.get('Name', '').strip()
+        parent_area_code = str(row_map.get('Pcode', '')).strip()
+        if child_area_name in regions and parent_area_code and parent_area_code != "0":
+            for parent_name in names_by_code.get(parent_area_code, []):
+                relationships['IS_SUBREGION_OF'][(child_area_name, parent_name)] = {}
+
+
+def write_nodes(nodes):
+    for label, nodes_by_id in nodes.items():
+        header = NODE_HEADERS[label]
+        f, writer = open_csv_writer(node_file_path(label), header + [':LABEL'])
+        with f:
+            for node_id, properties in nodes_by_id.items():
+                writer.writerow([node_id] + [_format_value(properties.get(_property_name(column)))
+                                             for column in header[1:]] + [label])
+        print(f"已写出 {len(nodes_by_id)} 个 {label} 节点。")
+
+
+def write_relationships(relationships):
+    for rel_type, relationships_by_key in relationships.items():
+        start_label, end_label, property_headers = RELATIONSHIP_HEADERS[rel_type]
+        header = [f':START_ID({start_label})', f':END_ID({end_label})'] + property_headers + [':TYPE']
+        f, writer = open_csv_writer(relationship_file_path(rel_type), header)
+        with f:
+            for (start_id, end_id), properties in relationships_by_key.items():
+                writer.writerow([start_id, end_id] + [_format_value(properties.get(_property_name(column)))
+                                                      for column in property_headers] + [rel_type])
+        print(f"已写出 {len(relationships_by_key)} 条 {rel_type} 关系。")
+
+
+def build_import_command():
+    """ neo4j-admin (5.x) 全量导入命令；导入会覆盖目标数据库，导入后需运行 schema_v2.setup_database_schema 创建约束和索引 """
+    arguments = ["neo4j-admin database import full", "--overwrite-destination", "--multiline-fields=true",
+                 f'--array-delimiter="{ARRAY_DELIMITER}"']
+    arguments += [f'--nodes="{node_file_path(label)}"' for label in NODE_HEADERS]
+    arguments += [f'--relationships="{relationship_file_path(rel_type)}"' for rel_type in RELATIONSHIP_HEADERS]
+    arguments.append(DATABASE_NAME)
+    return " \\\n    ".join(arguments)
+
+
+def main():
+    start_time = time.time()
+    print(f"正在从 {INPUT_CSV_FILE} 加载数据...")
+    try:
+        df_policies = pd.read_csv(INPUT_CSV_FILE, dtype=str).fillna('')
+    except FileNotFoundError:
+        print(f"错误: 主数据文件 {INPUT_CSV_FILE} 未找到。")
+        return
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    nodes, relationships = collect_policy_graph(df_policies, fulltext_store_dir_for(INPUT_CSV_FILE))
+    apply_tool_categories(nodes, POLICY_TOOL_XLSX_FILE)
+    apply_area_codes(nodes, relationships, AREA_CODE_XLSX_FILE)
+    write_nodes(nodes)
+    write_relationships(relationships)
+
+    import_command = build_import_command()
+    with open(os.path.join(OUTPUT_DIR, IMPORT_SCRIPT_FILE), 'w', encoding='utf-8') as f:
+        f.write(import_command + "\n")
+    print(f"导出完成，用时 {time.time() - start_time:.1f} 秒。请先停止数据库，再运行以下命令 (已保存到 "
+          f"{os.path.join(OUTPUT_DIR, IMPORT_SCRIPT_FILE)})：\n{import_command}")
+    print("导入完成并启动数据库后，运行 schema_v2.setup_database_schema 创建约束和索引。")
+
+
+if __name__ == "__main__":
+    main()
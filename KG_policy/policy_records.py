@@ -0,0 +1,175 @@
+import re
+
+import pandas as pd
+
+from fulltext_store import load_full_text
+from quantitative_normalize import parse_quantitative_components, summarize_components
+
+# --- 主数据行的解析 ---
+# 把 policy_data_with_quantitative_info_v6_formatted.csv 的一行整理为节点属性和出边列表。
+# 不依赖 Neo4j 驱动：schema_v2.py 的各种导入模式和离线导出脚本 neo4j_bulk_export.py 共用这里的函数。
+
+
+# --- 数据映射定义 ---
+INDUSTRY_CODE_MAPPING = {
+    "农、林、牧、渔业": "A",
+    "采矿业": "B",
+    "制造业": "C",
+    "电力、热力、燃气及水生产和供应业": "D",
+    "建筑业": "E",
+    "批发和零售业": "F",
+    "交通运输、仓储和邮政业": "G",
+    "住宿和餐饮业": "H",
+    "信息传输、软件和信息技术服务业": "I",
+    "金融业": "J",
+    "房地产业": "K",
+    "租赁和商务服务业": "L",
+    "科学研究和技术服务业": "M",
+    "水利、环境和公共设施管理业": "N",
+    "居民服务、修理和其他服务业": "O",
+    "教育": "P",
+    "卫生和社会工作": "Q",
+    "文化、体育和娱乐业": "R",
+    "公共管理、社会保障和社会组织": "S",
+    "国际组织": "T",
+    "全行业": "Z"
+}
+
+MULTI_VALUE_FIELDS_MAP = {  # CSV列 -> (节点标签, 关系类型, 节点名称字段)，单元格内多个值以分号分隔
+    'PolicyTopic': ("PolicyTopic", "HAS_TOPIC", "name"),
+    'TargetBeneficiary': ("TargetBeneficiary", "TARGETS_BENEFICIARY", "name"),
+    'GeographicRegion': ("GeographicRegion", "APPLICABLE_IN", "name"),
+}
+
+
+# --- 行数据处理函数 ---
+
+def clean_quantitative_info(text_data):
+    """
+    清理QuantitativeInfo列，移除知识抽取失败的特定提示文本。
+    """
+    if not text_data or pd.isna(text_data):
+        return ""
+
+    invalid_substrings = [
+        "政策工具缺失或为空",
+        "未找到可处理的政策工具（均未在格式映射中定义或原始列表为空）"
+    ]
+    cleaned_text = str(text_data).strip()
+    if cleaned_text in invalid_substrings or cleaned_text == '""':
+        return ""
+    return cleaned_text
+
+
+def parse_quantitative_info(quantitative_info_str):
+    """
+    解析 QuantitativeInfo 字符串。
+    格式: "工具A(信息A); 工具B(信息B)"
+    内部信息: "组件1, 组件2"
+    返回: 字典 {"工具A": "信息A", "工具B": "信息B"}
+    """
+    if not quantitative_info_str or pd.isna(quantitative_info_str):
+        return {}
+
+    parsed_details = {}
+    tools_info_parts = re.split(r';\s*', quantitative_info_str.strip())
+
+    for tool_info_part in tools_info_parts:
+        if not tool_info_part.strip():
+            continue
+        match = re.match(r'^(.*?)\(([^)]*)\)$', tool_info_part.strip())
+        if match:
+            tool_name = match.group(1).strip()
+            detail_string = match.group(2).strip()
+            if tool_name:
+                parsed_details[tool_name] = detail_string
+    return parsed_details
+
+
+def process_date_format(date_str):
+    """
+    将日期字符串或Excel数字日期转换为 'YYYY-MM-DD' 格式。
+    """
+    if date_str and isinstance(date_str, str) and re.match(r'^\d{4}\.\d{2}\.\d{2}$', date_str.strip()):
+        return date_str.strip().replace('.', '-')
+    elif date_str and isinstance(date_str, (int, float)) and not pd.isna(date_str):
+        try:
+            return pd.to_datetime(date_str, unit='D', origin='1899-12-30').strftime('%Y-%m-%d')
+        except (ValueError, TypeError):
+            pass
+    return None
+
+
+def split_multi_value(cell_value):
+    """ 按分号拆分多值单元格，去掉空白和空项 """
+    return [item.strip() for item in str(cell_value).split(';') if item.strip()] if cell_value else []
+
+
+def build_policy_record(index, row, fulltext_store_dir):
+    """
+    将主数据CSV的一行整理为导入所需的结构，逐行模式和批量模式共用。
+    FullText 列为全文引用时从 fulltext_store_dir (主数据CSV所在目录下的全文存储) 加载完整全文。
+    缺少 FabaoCitation 时返回 None；否则返回字典：
+    policy (Policy 节点属性)、issuers [(全称, 简称)]、links [(节点标签, 关系类型, 名称字段, 名称)]、
+    industries [(行业名称, 行业代码)]、tools [(工具名称, 量化信息)]。
+    """
+    fabao_citation = row.get('FabaoCitation', '').strip()
+    if not fabao_citation:
+        return None
+
+    policy_data = {
+        "fabaoCitation": fabao_citation,
+        "title": row.get('Title', '').strip(),
+        "documentNumber": row.get('DocumentNumber', '').strip(),
+        "announceDate": process_date_format(row.get('AnnounceDate', '').strip()),
+        "implementDate": process_date_format(row.get('ImplementDate', '').strip()),
+        "policyLevel": row.get('Level', '').strip(),
+        "validationStatus": row.get('Validation', '').strip(),
+        "fullText": load_full_text(row.get('FullText', ''), fulltext_store_dir).strip(),
+    }
+
+    full_names = split_multi_value(row.get('IssuingBodyFullName', ''))
+    short_names = split_multi_value(row.get('IssuingBodyShortName', ''))
+    if len(full_names) != len(short_names) and full_names:
+        print(
+            f"警告 (行 {index + 2}, FabaoCitation: {fabao_citation}): IssuingBodyFullName ({len(full_names)}个) 和 IssuingBodyShortName ({len(short_names)}个) 数量不匹配。")
+    issuers = [(full_name, short_names[i] if i < len(short_names) else '') for i, full_name in enumerate(full_names)]
+
+    links = []
+    for csv_col, (label, rel_type, name_field) in MULTI_VALUE_FIELDS_MAP.items():
+        for item_name in split_multi_value(row.get(csv_col, '')):
+            links.append((label, rel_type, name_field, item_name))
+
+    industries = [(industry_name, INDUSTRY_CODE_MAPPING.get(industry_name))
+                  for industry_name in split_multi_value(row.get('IndustryFocus', ''))]
+
+    all_parsed_quant_details = parse_quantitative_info(clean_quantitative_info(row.get('QuantitativeInfo', '')))
+    tools = [(tool_name, all_parsed_quant_details.get(tool_name))
+             for tool_name in split_multi_value(row.get('PolicyTool', ''))]
+
+    return {
+        'policy': policy_data,
+        'issuers': issuers,
+        'links': links,
+        'industries': industries,
+        'tools': tools,
+    }
+
+
+def build_quantity_properties(quantitative_detail_value):
+    """
+    将一个工具的量化信息字符串解析为 APPLIES_TOOL 关系上的类型化属性：
+    quantityLabels / quantityValues / quantityUnits / quantityTexts 为一一对应的数组 (只含解析出数值的组件，
+    数值已换算为规范单位)，maxAmountYuan / maxRatioPercent / maxDurationDays / maxAreaMu 为各规范单位下的最大值，
+    便于在数据库内按地区等维度求和或取最大值。值为 None 的属性在 SET r += 时会被移除。
+    """
+    components = [component for component in parse_quantitative_components(quantitative_detail_value)
+                  if component['value'] is not None]
+    properties = {
+        'quantityLabels': [component['label'] for component in components] or None,
+        'quantityValues': [component['value'] for component in components] or None,
+        'quantityUnits': [component['unit'] or '' for component in components] or None,
+        'quantityTexts': [component['text'] for component in components] or None,
+    }
+    properties.update(summarize_components(components))
+    return properties
@@ -1,14 +1,53 @@
 import pandas as pd
-from openai import AsyncOpenAI  # 保持 AsyncOpenAI
+from openai import APIConnectionError, APITimeoutError, AsyncOpenAI  # 保持 AsyncOpenAI
 import asyncio  # 保持 asyncio
+import collections
+import csv
+import os
+import random
 import time  # 保持 time
 
+from fulltext_store import fulltext_store_dir_for, load_full_text
+from llm_checkpoint import (append_checkpoint, input_fingerprint, load_checkpoint, lookup_checkpoint,
+                            open_checkpoint, stage_version)
+from near_duplicates import load_canonical_map
+from quantitative_snippets import build_snippet_matcher, select_snippets
+
 # --- 配置信息 ---
 API_KEY = "sk-xxx"  # !!! 用户提供的API Key !!!
 BASE_URL = "https://api.deepseek.com"
 INPUT_CSV_FILE = "policy_data_standardized_v4_extracted_v2.csv"  # 输入文件名
 OUTPUT_CSV_FILE = "policy_data_with_quantitative_info_v6_formatted.csv"  # 输出文件名 (更新版本号和描述)
-CONCURRENCY_LIMIT = 5  # 并发API调用限制
+CONCURRENCY_LIMIT = 5  # 初始并发API调用数 (关闭自适应并发时为固定并发数)
+ADAPTIVE_CONCURRENCY = True  # 按 AIMD 自适应调整并发数：健康时加性增加，遇到 429/5xx/超时时乘性减少
+MIN_CONCURRENCY = 1  # 自适应并发的下限
+MAX_CONCURRENCY = 32  # 自适应并发的上限 (不超过账户允许的并发数)
+AIMD_INCREASE_STEP = 1.0  # 每完成约“当前并发数”个健康请求，并发数增加的量
+AIMD_DECREASE_FACTOR = 0.5  # 遇到限流/服务端错误/超时时并发数乘以该系数
+AIMD_DECREASE_COOLDOWN_SECONDS = 5.0  # 两次减少之间的最短间隔，同一波失败只减少一次
+HEALTHY_LATENCY_SECONDS = 60.0  # 请求耗时超过该值时不再增加并发
+REQUEST_TIMEOUT_SECONDS = 180.0  # 单次LLM请求超时，超时按过载处理
+LATENCY_WINDOW = 200  # 计算延迟分位数的最近请求数
+PROGRESS_REPORT_EVERY = 10  # 每完成多少个LLM任务输出一次进度
+READ_CHUNK_SIZE = 500  # 每次从输入CSV读取的行数
+QUEUE_MAXSIZE = 100  # 待处理与待写出队列的容量
+MAX_PENDING_ROWS = 1000  # 已读入但尚未写出的最大行数，决定内存占用上限
+MAX_RETRIES = 4  # 可重试错误 (网络、超时、429、5xx) 的最大重试次数
+RETRY_BASE_DELAY_SECONDS = 2.0  # 指数退避的基础等待时间
+RETRY_MAX_DELAY_SECONDS = 60.0  # 单次退避等待的上限
+CIRCUIT_FAILURE_THRESHOLD = 10  # 连续失败多少次后熔断
+CIRCUIT_OPEN_SECONDS = 60.0  # 熔断后所有任务暂停的时间
+USE_SNIPPET_SELECTOR = True  # 只把含数量的句子及其上下文发给LLM；找不到任何数量时改发截断后的全文
+SNIPPET_MAX_CHARS = 4000  # 发给LLM的片段总长度上限
+SNIPPET_CONTEXT_SENTENCES = 1  # 每个含数量的句子前后附带的句子数
+RETRY_FAILED_ROWS_ONLY = False  # True 时读取已有的 OUTPUT_CSV_FILE，只重新处理结果为 FAILED_RESULT_MARKERS 的行
+MAX_PROMPT_TEXT_LENGTH = 15000  # 从全文存储加载的全文在提示中的最大长度
+POLICY_ID_COLUMN = "FabaoCitation"  # 政策唯一标识列 (即 data_clean.py 输出的 '编号')
+NEAR_DUPLICATE_CLUSTERS_CSV = None  # near_duplicates.py 输出的近重复簇文件；设置后近重复政策复用规范政策的结果
+LLM_MODEL = "deepseek-chat"  # 或您选择的模型
+CHECKPOINT_FILE = "quantitative_info.checkpoint.jsonl"  # 断点续跑检查点，每完成一条政策追加一行；None 为不使用
+EXTRACTION_PROMPT_VERSION = 2  # 修改提示词后递增，使检查点中按旧提示词得到的结果失效
+FAILED_RESULT_MARKERS = ("LLM调用错误", "任务执行异常")  # 失败结果不写入检查点，重新运行时会再次处理
 
 # --- PolicyTool 到 QuantitativeInfo 格式的映射 ---
 # (映射表内容必须完整)
@@ -114,24 +153,193 @@ policy_tool_to_format_map = {
     "项目审批“告知承诺制”": "[纳入告知承诺制审批事项数量]X项; [告知承诺制审批占同类审批比例]Y%"
 }
 
+SNIPPET_MATCHER = build_snippet_matcher(policy_tool_to_format_map)
+
+
+def create_concurrency_limiter(initial=CONCURRENCY_LIMIT, minimum=MIN_CONCURRENCY, maximum=MAX_CONCURRENCY):
+    """
+    AIMD 自适应并发限制器的状态。并发数为浮点数，实际可用名额取其整数部分；
+    minimum 与 maximum 相同时退化为固定大小的信号量。
+    """
+    return {
+        'limit': float(min(max(initial, minimum), maximum)),
+        'minimum': minimum,
+        'maximum': maximum,
+        'in_flight': 0,
+        'condition': asyncio.Condition(),
+        'latencies': collections.deque(maxlen=LATENCY_WINDOW),
+        'succeeded': 0,
+        'overloaded': 0,  # 429/5xx/超时
+        'failed': 0,  # 其他错误
+        'decreases': 0,
+        'last_decrease': 0.0,
+    }
+
+
+def is_overload_error(error):
+    """ 429、5xx 和超时说明服务端过载，需要降低并发；其他错误 (如请求格式错误) 不影响并发数 """
+    if isinstance(error, (asyncio.TimeoutError, APITimeoutError)):
+        return True
+    status_code = getattr(error, 'status_code', None)
+    return status_code is not None and (status_code == 429 or status_code >= 500)
+
+
+async def acquire_concurrency_slot(limiter):
+    """ 等待直到正在进行的请求数低于当前并发数，然后占用一个名额 """
+    async with limiter['condition']:
+        await limiter['condition'].wait_for(lambda: limiter['in_flight'] < int(limiter['limit']))
+        limiter['in_flight'] += 1
+
+
+async def release_concurrency_slot(limiter, latency_seconds, outcome):
+    """
+    释放名额并按请求结果调整并发数。outcome 为 'ok'、'overload' 或 'error'：
+    健康请求 (ok 且耗时未超过 HEALTHY_LATENCY_SECONDS) 使并发数增加 AIMD_INCREASE_STEP / 当前并发数，
+    即大约每一轮请求加一；过载时乘以 AIMD_DECREASE_FACTOR (冷却期内只减少一次)。
+    """
+    async with limiter['condition']:
+        limiter['in_flight'] -= 1
+        if outcome == 'ok':
+            limiter['succeeded'] += 1
+            limiter['latencies'].append(latency_seconds)
+            if latency_seconds <= HEALTHY_LATENCY_SECONDS:
+                limiter['limit'] = min(limiter['maximum'], limiter['limit'] + AIMD_INCREASE_STEP / limiter['limit'])
+        elif outcome == 'overload':
+            limiter['overloaded'] += 1
+            now = time.monotonic()
+            if now - limiter['last_decrease'] >= AIMD_DECREASE_COOLDOWN_SECONDS:
+                limiter['limit'] = max(limiter['minimum'], limiter['limit'] * AIMD_DECREASE_FACTOR)
+                limiter['last_decrease'] = now
+                limiter['decreases'] += 1
+        else:
+            limiter['failed'] += 1
+        limiter['condition'].notify_all()
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def format_limiter_stats(limiter):
+    """ 当前并发数、进行中的请求数、最近请求的延迟分位数和错误计数，用于进度输出 """
+    latencies = sorted(limiter['latencies'])
+    return (f"并发 {int(limiter['limit'])} (进行中 {limiter['in_flight']}) | "
+            f"延迟 p50 {_percentile(latencies, 0.5):.1f}s p90 {_percentile(latencies, 0.9):.1f}s "
+            f"p99 {_percentile(latencies, 0.99):.1f}s | "
+            f"成功 {limiter['succeeded']} 过载 {limiter['overloaded']} 其他错误 {limiter['failed']} "
+            f"降速 {limiter['decreases']} 次")
+
+
+def is_retryable_error(error):
+    """
+    只有网络错误 (APIConnectionError，含 APITimeoutError)、请求超时、429 和 5xx 可以重试；
+    其他 4xx (如请求格式错误、鉴权失败) 以及处理响应时的程序错误重试也不会成功，应立即失败。
+    """
+    if isinstance(error, (APIConnectionError, asyncio.TimeoutError)):
+        return True
+    status_code = getattr(error, 'status_code', None)
+    return status_code is not None and (status_code == 429 or status_code >= 500)
+
+
+def backoff_delay(attempt):
+    """ 第 attempt 次重试前的等待秒数：指数增长并设上限，再在 [0, 上限] 内均匀取值 (full jitter)，避免各任务同时重试 """
+    return random.uniform(0, min(RETRY_MAX_DELAY_SECONDS, RETRY_BASE_DELAY_SECONDS * 2 ** attempt))
+
+
+def create_circuit_breaker():
+    """
+    熔断器状态：连续可重试失败达到 CIRCUIT_FAILURE_THRESHOLD 次时，所有任务暂停 CIRCUIT_OPEN_SECONDS 秒；
+    暂停结束后进入半开状态 (half_open)，只放行一个探测请求 (probe_in_flight)，其余任务等待其结果。
+    """
+    return {
+        'condition': asyncio.Condition(),
+        'consecutive_failures': 0,
+        'open_until': 0.0,
+        'half_open': False,
+        'probe_in_flight': False,
+        'trips': 0,
+    }
+
+
+def _open_circuit(breaker, now):
+    breaker['open_until'] = now + CIRCUIT_OPEN_SECONDS
+    breaker['half_open'] = True
+    breaker['consecutive_failures'] = 0
+    breaker['trips'] += 1
+    print(f"LLM调用连续失败，服务可能不可用，所有任务暂停 {CIRCUIT_OPEN_SECONDS:.0f} 秒 (第 {breaker['trips']} 次熔断)。")
+
+
+async def wait_for_circuit(breaker):
+    """
+    熔断期间等待。暂停结束后 (半开状态) 只有第一个到达的任务作为探测请求放行，返回 True；
+    其余任务等待探测结果：成功则全部放行，失败则重新熔断并继续等待。熔断器关闭时直接返回 False。
+    """
+    while True:
+        remaining_seconds = breaker['open_until'] - time.monotonic()
+        if remaining_seconds > 0:
+            await asyncio.sleep(remaining_seconds)
+            continue
+        async with breaker['condition']:
+            if not breaker['half_open']:
+                return False
+            if not breaker['probe_in_flight']:
+                breaker['probe_in_flight'] = True
+                return True
+            await breaker['condition'].wait()
+
+
+async def record_circuit_result(breaker, succeeded, is_probe):
+    """
+    记录一次请求结果 (succeeded 表示服务有响应)。成功时清零连续失败计数并关闭熔断器；
+    探测请求失败时立即重新熔断，普通请求连续失败达到阈值时打开熔断器。每次结果都会唤醒等待探测结果的任务。
+    """
+    async with breaker['condition']:
+        now = time.monotonic()
+        if is_probe:
+            breaker['probe_in_flight'] = False
+        if succeeded:
+            breaker['consecutive_failures'] = 0
+            breaker['half_open'] = False
+        elif is_probe:
+            _open_circuit(breaker, now)
+        else:
+            breaker['consecutive_failures'] += 1
+            if breaker['consecutive_failures'] >= CIRCUIT_FAILURE_THRESHOLD and not breaker['half_open']:
+                _open_circuit(breaker, now)
+        breaker['condition'].notify_all()
+
 
 async def extract_quantitative_info(aclient: AsyncOpenAI, tools_with_formats: list, full_text: str,
-                                    semaphore: asyncio.Semaphore, original_row_index: int):
+                                    fulltext_store_dir: str, limiter: dict, breaker: dict, original_row_index: int):
     """
     根据提供的政策工具列表及其各自的预期格式（组件模板），从政策全文中异步提取量化信息，
     并按照 `政策工具名称(组件1值, 组件2值, ...)` 的格式输出，不同工具间用分号空格分隔。
+    full_text 可以是全文本身，也可以是 fulltext_store_dir 中的全文引用 (在任务开始执行时才加载)。
+    可重试的错误 (网络、超时、429、5xx) 按带随机抖动的指数退避重试，最多 MAX_RETRIES 次；
+    每次尝试前等待熔断器关闭，退避期间不占用并发名额。
     """
-    async with semaphore:
-        if not tools_with_formats:
-            return "没有可供处理的已知政策工具"  # Script-level status
+    if not tools_with_formats:
+        return "没有可供处理的已知政策工具"  # Script-level status
+    if USE_SNIPPET_SELECTOR:
+        # 在完整全文上选择片段，片段总长度由 SNIPPET_MAX_CHARS 限制
+        loaded_text = load_full_text(full_text, fulltext_store_dir)
+        full_text = select_snippets(SNIPPET_MATCHER, loaded_text, SNIPPET_MAX_CHARS, SNIPPET_CONTEXT_SENTENCES)
+        if not full_text:
+            # 本地规则未识别出数量时不能断定没有量化信息，改为发送全文 (与不筛选片段时相同的长度上限)
+            print(f"  [Row {original_row_index + 1}] 未筛选出含数量的片段，改为发送全文。")
+            full_text = loaded_text[:MAX_PROMPT_TEXT_LENGTH]
+    else:
+        full_text = load_full_text(full_text, fulltext_store_dir, max_length=MAX_PROMPT_TEXT_LENGTH)
 
-        formatted_tool_list_string = []
-        for i, (tool, fmt) in enumerate(tools_with_formats):
-            # fmt在这里是组件提取的模板
-            formatted_tool_list_string.append(f"工具{i + 1}名称: {tool}\n工具{i + 1}的组件提取模板: {fmt}")
-        tools_and_formats_prompt_section = "\n\n".join(formatted_tool_list_string)
+    formatted_tool_list_string = []
+    for i, (tool, fmt) in enumerate(tools_with_formats):
+        # fmt在这里是组件提取的模板
+        formatted_tool_list_string.append(f"工具{i + 1}名称: {tool}\n工具{i + 1}的组件提取模板: {fmt}")
+    tools_and_formats_prompt_section = "\n\n".join(formatted_tool_list_string)
 
-        system_prompt = """
+    system_prompt = """
 你是一位专业的文本信息提取助手。
 你的核心任务是从政策文本中，根据提供的一系列“政策工具”及其对应的“组件提取模板”，提取量化指标。
 最终输出要求非常具体：
@@ -140,7 +348,7 @@ async def extract_quantitative_info(aclient: AsyncOpenAI, tools_with_formats: li
 3. 如果通读全文后，对于所有提供的政策工具及其组件模板，都无法提取到任何有效的量化信息，则必须返回一个完全空的字符串。
 请严格遵循这些格式化指令，不要添加任何额外的解释或标签。
 """
-        user_prompt = f"""
+    user_prompt = f"""
 政策文本:
 ---
 {full_text}
@@ -171,9 +379,14 @@ async def extract_quantitative_info(aclient: AsyncOpenAI, tools_with_formats: li
 
 最终提取的字符串:
 """
+    tool_names_involved = ", ".join([t[0] for t in tools_with_formats])
+    for attempt in range(MAX_RETRIES + 1):
+        is_probe = await wait_for_circuit(breaker)
+        await acquire_concurrency_slot(limiter)
+        outcome, error, request_start = 'error', None, time.monotonic()
         try:
-            response = await aclient.chat.completions.create(
-                model="deepseek-chat",  # 或您选择的模型
+            response = await asyncio.wait_for(aclient.chat.completions.create(
+                model=LLM_MODEL,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt},
@@ -181,69 +394,109 @@ async def extract_quantitative_info(aclient: AsyncOpenAI, tools_with_formats: li
                 stream=False,
                 temperature=0.0,  # 确保结果的确定性
                 max_tokens=1024  # 增加 token 限制以容纳更复杂的组合输出和 ToolName 前缀
-            )
+            ), timeout=REQUEST_TIMEOUT_SECONDS)
             raw_llm_output = response.choices[0].message.content
+            outcome = 'ok'
+        except Exception as e:
+            outcome, error = ('overload' if is_overload_error(e) else 'error'), e
+        finally:
+            await release_concurrency_slot(limiter, time.monotonic() - request_start, outcome)
+
+        # 不可重试的错误 (如 4xx) 说明服务本身有响应，对熔断器而言视为成功
+        await record_circuit_result(breaker, error is None or not is_retryable_error(error), is_probe)
+        if error is None:
             print(f"  [Row {original_row_index + 1}] LLM原始输出: '{raw_llm_output}'")  # 打印原始LLM输出
 
-            extracted_text = raw_llm_output.strip()
+            extracted_text = (raw_llm_output or "").strip()
             # 根据Prompt，LLM应该直接返回空字符串。保险起见，如果返回"未找到"，也转为空字符串。
             if extracted_text == "未找到":
                 return ""
             return extracted_text
-        except Exception as e:
-            tool_names_involved = ", ".join([t[0] for t in tools_with_formats])
-            print(f"  [Row {original_row_index + 1}] 调用LLM时发生错误 (涉及工具: {tool_names_involved}): {e}")
+
+        if not is_retryable_error(error):
+            print(f"  [Row {original_row_index + 1}] 调用LLM时发生不可重试的错误 (涉及工具: {tool_names_involved}): {error}")
             return "LLM调用错误"
+        if attempt == MAX_RETRIES:
+            print(f"  [Row {original_row_index + 1}] 调用LLM时发生错误，重试 {MAX_RETRIES} 次后仍失败 "
+                  f"(涉及工具: {tool_names_involved}): {error}")
+            return "LLM调用错误"
+        retry_delay = backoff_delay(attempt)
+        print(f"  [Row {original_row_index + 1}] 调用LLM时发生错误: {error}，{retry_delay:.1f} 秒后进行第 {attempt + 1} 次重试...")
+        await asyncio.sleep(retry_delay)
 
 
 async def main():
-    print(f"正在从 {INPUT_CSV_FILE} 加载数据...")
+    # 只重试失败行时以上次的输出文件为输入，其余行原样写回
+    input_csv_file = OUTPUT_CSV_FILE if RETRY_FAILED_ROWS_ONLY else INPUT_CSV_FILE
+    fulltext_store_dir = fulltext_store_dir_for(input_csv_file)  # FullText 列为引用时从这里加载完整全文
+    print(f"正在从 {input_csv_file} 流式加载数据 (每块 {READ_CHUNK_SIZE} 行)...")
     try:
-        df = pd.read_csv(INPUT_CSV_FILE)
+        input_columns = pd.read_csv(input_csv_file, nrows=0).columns.tolist()
     except FileNotFoundError:
-        print(f"错误: 输入文件 '{INPUT_CSV_FILE}' 未找到。")
+        print(f"错误: 输入文件 '{input_csv_file}' 未找到。")
         return
     except Exception as e:
         print(f"读取CSV文件时发生错误: {e}")
         return
 
-    required_columns = ['PolicyTool', 'FullText']
+    # 新增列的名称修改
+    output_column_name = "政策工具(量化)"
+    required_columns = ['PolicyTool', 'FullText'] + ([output_column_name] if RETRY_FAILED_ROWS_ONLY else [])
     for col in required_columns:
-        if col not in df.columns:
+        if col not in input_columns:
             print(f"错误: CSV文件必须包含 '{col}' 列。")
             return
+    if RETRY_FAILED_ROWS_ONLY:
+        print(f"只重新处理 '{output_column_name}' 为 {'/'.join(FAILED_RESULT_MARKERS)} 的行。")
 
-    print(f"找到 {len(df)} 条政策需要处理。")
-
-    # 新增列的名称修改
-    output_column_name = "政策工具(量化)"
-    df[output_column_name] = "未处理"
+    output_columns = input_columns + ([output_column_name] if output_column_name not in input_columns else [])
+    partial_output_path = OUTPUT_CSV_FILE + ".partial"
 
     aclient = AsyncOpenAI(api_key=API_KEY, base_url=BASE_URL)
-    semaphore = asyncio.Semaphore(CONCURRENCY_LIMIT)
-
-    tasks_to_run = []
-    llm_processing_info = []
-
-    for index, row in df.iterrows():
+    if ADAPTIVE_CONCURRENCY:
+        limiter = create_concurrency_limiter()
+    else:
+        limiter = create_concurrency_limiter(CONCURRENCY_LIMIT, CONCURRENCY_LIMIT, CONCURRENCY_LIMIT)
+    breaker = create_circuit_breaker()
+    num_workers = MAX_CONCURRENCY if ADAPTIVE_CONCURRENCY else CONCURRENCY_LIMIT  # 实际并发由 limiter 控制
+
+    canonical_map = load_canonical_map(NEAR_DUPLICATE_CLUSTERS_CSV)
+    canonical_policy_ids = set(canonical_map.values())
+    scheduled_by_policy_id = {}  # 已安排的政策编号 -> (行号, PolicyTool 原文)
+    canonical_results = {}  # 行号 -> 结果，只保留被近重复政策引用的规范政策
+
+    checkpoint_version = stage_version("quantitative_info", EXTRACTION_PROMPT_VERSION, LLM_MODEL,
+                                       policy_tool_to_format_map, USE_SNIPPET_SELECTOR and
+                                       (SNIPPET_MAX_CHARS, SNIPPET_CONTEXT_SENTENCES))
+    checkpoint_records = load_checkpoint(CHECKPOINT_FILE, checkpoint_version)
+    if checkpoint_records:
+        print(f"已从检查点 {CHECKPOINT_FILE} 加载 {len(checkpoint_records)} 条已完成的政策，将跳过这些政策。")
+    checkpoint_handle = open_checkpoint(CHECKPOINT_FILE) if CHECKPOINT_FILE else None
+    stats = {'rows': 0, 'written': 0, 'checkpoint_hits': 0, 'reused': 0, 'llm_tasks': 0, 'llm_completed': 0}
+
+    # 读取 -> work_queue -> N 个 worker -> result_queue -> 写出；
+    # pending_rows 限制已读入但尚未写出的行数，内存占用与语料规模无关
+    work_queue = asyncio.Queue(maxsize=QUEUE_MAXSIZE)
+    result_queue = asyncio.Queue(maxsize=QUEUE_MAXSIZE)
+    pending_rows = asyncio.Semaphore(MAX_PENDING_ROWS)
+
+    def plan_row(row_number, row):
+        """ 判断一行是直接得到结果、复用规范政策的结果，还是需要调用LLM """
         policy_tool_string = row['PolicyTool']
         full_text_content = row['FullText']
-        original_df_index = row.name
-
-        if pd.isna(policy_tool_string) or not str(policy_tool_string).strip():
-            df.loc[original_df_index, output_column_name] = "政策工具缺失或为空"
-            continue
-        if pd.isna(full_text_content) or not str(full_text_content).strip():  # 确保FullText也是字符串且非空
-            df.loc[original_df_index, output_column_name] = "政策全文缺失或为空"
-            continue
+        policy_id = str(row.get(POLICY_ID_COLUMN, '')).strip()
+        item = {'row_number': row_number, 'row': row, 'keep_result': policy_id in canonical_policy_ids}
+        if RETRY_FAILED_ROWS_ONLY and row[output_column_name] not in FAILED_RESULT_MARKERS:
+            return dict(item, result=row[output_column_name])
 
-        # 确保full_text_content是字符串类型传递给LLM
-        full_text_content_str = str(full_text_content)
+        if not str(policy_tool_string).strip():
+            return dict(item, result="政策工具缺失或为空")
+        if not str(full_text_content).strip():  # 确保FullText也是字符串且非空
+            return dict(item, result="政策全文缺失或为空")
 
         individual_tools = [tool.strip() for tool in str(policy_tool_string).split(';') if tool.strip()]
         if not individual_tools:
-            df.loc[original_df_index, output_column_name] = "政策工具解析后为空"
-            continue
+            return dict(item, result="政策工具解析后为空")
 
         known_tools_with_formats_for_row = []
         unknown_tools_for_row = []
@@ -253,54 +506,119 @@ async def main():
             else:
                 unknown_tools_for_row.append(single_tool)
 
-        current_row_log_prefix = f"处理第 {original_df_index + 1}/{len(df)} 行 (DF索引 {original_df_index}): "
+        current_row_log_prefix = f"处理第 {row_number + 1} 行: "
         if unknown_tools_for_row:
             print(
                 f"{current_row_log_prefix}注意: 以下工具未在格式映射中定义，将忽略: {', '.join(unknown_tools_for_row)}")
-
-        if known_tools_with_formats_for_row:
-            print(f"{current_row_log_prefix}将向LLM传递 {len(known_tools_with_formats_for_row)} 个已知工具。")
-            task = extract_quantitative_info(aclient, known_tools_with_formats_for_row, full_text_content_str,
-                                             semaphore, original_df_index)
-            tasks_to_run.append(task)
-            llm_processing_info.append({'original_index': original_df_index})
-        else:
-            df.loc[original_df_index, output_column_name] = "未找到可处理的政策工具（均未在格式映射中定义或原始列表为空）"
+        if not known_tools_with_formats_for_row:
             print(f"{current_row_log_prefix}无已知工具可处理。")
-
-    if tasks_to_run:
-        print(f"\n开始并发执行 {len(tasks_to_run)} 个LLM提取任务 (并发数上限: {CONCURRENCY_LIMIT})...")
-        start_time = time.time()
-        all_results = await asyncio.gather(*tasks_to_run, return_exceptions=True)
-        end_time = time.time()
-        print(f"所有LLM任务执行完毕，耗时: {end_time - start_time:.2f} 秒。")
-
-        for i, result_or_exc in enumerate(all_results):
-            original_df_idx = llm_processing_info[i]['original_index']
-            if isinstance(result_or_exc, Exception):
-                print(f"  [Row {original_df_idx + 1}] 任务执行时发生异常: {result_or_exc}")
-                df.loc[original_df_idx, output_column_name] = "任务执行异常"  # 或者更具体的错误信息
-            else:
-                df.loc[original_df_idx, output_column_name] = result_or_exc
-                # 打印一些结果样本，确认格式
-                if (i + 1) % 5 == 0 or i == len(all_results) - 1:  # 每5个或最后一个打印进度
-                    print(
-                        f"  ...已赋值 {i + 1}/{len(all_results)} LLM结果。行 {original_df_idx + 1} (DF索引 {original_df_idx}) 结果: '{str(result_or_exc)[:200]}...'")
-    else:
-        print("没有需要通过LLM处理的任务。")
-
-    # AsyncOpenAI client uses httpx.AsyncClient which should be closed if managed manually.
-    # However, if aclient is not used in a context manager (`async with`),
-    # explicit close is good practice.
-    await aclient.close()
-
-    print("\n所有行处理完毕。")
-    print(f"正在将更新后的数据保存到 {OUTPUT_CSV_FILE}...")
+            return dict(item, result="未找到可处理的政策工具（均未在格式映射中定义或原始列表为空）")
+
+        canonical = scheduled_by_policy_id.get(canonical_map.get(policy_id))
+        if canonical is not None and canonical[1] == str(policy_tool_string):
+            # 近重复政策且政策工具相同：复用规范政策的结果，不再调用LLM
+            print(f"{current_row_log_prefix}近重复政策，将复用规范政策 {canonical_map[policy_id]} 的结果。")
+            stats['reused'] += 1
+            return dict(item, reuse_of=canonical[0])
+
+        if policy_id:
+            scheduled_by_policy_id[policy_id] = (row_number, str(policy_tool_string))
+        fingerprint = input_fingerprint(policy_tool_string, str(full_text_content))
+        found, checkpoint_result = lookup_checkpoint(checkpoint_records, policy_id, fingerprint)
+        if found:
+            stats['checkpoint_hits'] += 1
+            return dict(item, result=checkpoint_result)
+        print(f"{current_row_log_prefix}将向LLM传递 {len(known_tools_with_formats_for_row)} 个已知工具。")
+        stats['llm_tasks'] += 1
+        return dict(item, tools=known_tools_with_formats_for_row, policy_id=policy_id, fingerprint=fingerprint)
+
+    async def read_rows():
+        # 逐块读取；全部按字符串读入，写出时保持输入的原始取值
+        row_number = 0
+        for chunk in pd.read_csv(input_csv_file, chunksize=READ_CHUNK_SIZE, dtype=str, keep_default_na=False):
+            for row in chunk.to_dict('records'):
+                await pending_rows.acquire()
+                item = plan_row(row_number, row)
+                await (work_queue if 'tools' in item else result_queue).put(item)
+                row_number += 1
+                stats['rows'] = row_number
+        for _ in range(num_workers):
+            await work_queue.put(None)
+
+    async def process_rows():
+        while True:
+            item = await work_queue.get()
+            if item is None:
+                return
+            try:
+                result = await extract_quantitative_info(aclient, item['tools'], item['row']['FullText'],
+                                                         fulltext_store_dir, limiter, breaker, item['row_number'])
+            except Exception as e:
+                print(f"  [Row {item['row_number'] + 1}] 任务执行时发生异常: {e}")
+                result = "任务执行异常"
+            # 每条政策完成后立即写入检查点，失败结果除外
+            if result not in FAILED_RESULT_MARKERS:
+                append_checkpoint(checkpoint_handle, item['policy_id'], checkpoint_version, item['fingerprint'], result)
+            stats['llm_completed'] += 1
+            if stats['llm_completed'] % PROGRESS_REPORT_EVERY == 0:
+                print(f"  ...已完成 {stats['llm_completed']}/{stats['llm_tasks']} 个已读入的LLM任务 | "
+                      f"{format_limiter_stats(limiter)} | 熔断 {breaker['trips']} 次")
+            await result_queue.put(dict(item, result=result))
+
+    async def read_and_process_rows():
+        await asyncio.gather(read_rows(), *(process_rows() for _ in range(num_workers)))
+        await result_queue.put(None)
+
+    async def write_rows():
+        # 结果到达顺序与输入顺序不同，先缓存，按行号顺序追加写出
+        buffered = {}
+        next_row_number = 0
+        with open(partial_output_path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f, lineterminator=os.linesep)  # 与 DataFrame.to_csv 的换行一致
+            writer.writerow(output_columns)
+            while True:
+                item = await result_queue.get()
+                if item is None:
+                    break
+                buffered[item['row_number']] = item
+                while next_row_number in buffered:
+                    item = buffered.pop(next_row_number)
+                    result = canonical_results.get(item['reuse_of'], "") if 'reuse_of' in item else item['result']
+                    if item['keep_result']:
+                        canonical_results[next_row_number] = result
+                    row = dict(item['row'], **{output_column_name: result})
+                    writer.writerow([row.get(column, "") for column in output_columns])
+                    pending_rows.release()
+                    next_row_number += 1
+                f.flush()
+        stats['written'] = next_row_number
+
+    start_time = time.time()
     try:
-        df.to_csv(OUTPUT_CSV_FILE, index=False, encoding='utf-8-sig')
-        print(f"成功保存到 {OUTPUT_CSV_FILE}")
+        await asyncio.gather(read_and_process_rows(), write_rows())
     except Exception as e:
-        print(f"保存CSV文件时发生错误: {e}")
+        print(f"处理或保存CSV文件时发生错误: {e}")
+        print(f"已写出的部分结果保留在 {partial_output_path}。")
+        return
+    finally:
+        # AsyncOpenAI client uses httpx.AsyncClient which should be closed if managed manually.
+        # However, if aclient is not used in a context manager (`async with`),
+        # explicit close is good practice.
+        await aclient.close()
+        if checkpoint_handle is not None:
+            checkpoint_handle.close()
+
+    os.replace(partial_output_path, OUTPUT_CSV_FILE)
+    print(f"\n所有行处理完毕，共 {stats['written']} 行，耗时: {time.time() - start_time:.2f} 秒。")
+    if stats['checkpoint_hits']:
+        print(f"{stats['checkpoint_hits']} 条政策的结果取自检查点，未调用LLM。")
+    if stats['reused']:
+        print(f"{stats['reused']} 条近重复政策复用了规范政策的量化信息，节省了相应的LLM调用。")
+    if stats['llm_tasks']:
+        print(f"共执行 {stats['llm_tasks']} 个LLM提取任务 | {format_limiter_stats(limiter)} | 熔断 {breaker['trips']} 次")
+    else:
+        print("没有需要通过LLM处理的任务。")
+    print(f"成功保存到 {OUTPUT_CSV_FILE}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,213 @@
+import re
+
+import pandas as pd
+
+# --- 量化信息的数值规范化 ---
+# quantitative_info.py 输出的量化信息形如 "财政直接补贴([补贴金额]100万元, [补贴比例]30%)"，
+# 图谱中只以字符串形式保存在 APPLIES_TOOL 关系上，无法在数据库内求和或比较。
+# 本模块把每个组件解析为 (组件标签, 规范单位下的数值, 规范单位, 原文)，金额统一为元、比例统一为%、
+# 期限统一为天、面积统一为亩；其他计数类单位 (项、家、倍等) 保持原单位。
+# schema_v2.py 加载时调用本模块，把结果写为关系上的数值属性；单独运行本脚本则输出长表 CSV 供核对。
+
+# --- 配置信息 ---
+INPUT_CSV_FILE = "policy_data_with_quantitative_info_v6_formatted.csv"
+OUTPUT_CSV_FILE = "quantitative_components.csv"
+POLICY_ID_COLUMN = "FabaoCitation"
+QUANTITATIVE_COLUMN = "QuantitativeInfo"
+
+# 单位 -> (换算系数, 规范单位)；按长度从长到短匹配，"万元" 优先于 "元"
+UNIT_CONVERSIONS = {
+    "元": (1, "元"), "千元": (1e3, "元"), "万元": (1e4, "元"), "十万元": (1e5, "元"), "百万元": (1e6, "元"),
+    "千万元": (1e7, "元"), "亿元": (1e8, "元"), "万亿元": (1e12, "元"),
+    "%": (1, "%"), "％": (1, "%"), "‰": (0.1, "%"), "个百分点": (1, "%"),
+    "天": (1, "天"), "日": (1, "天"), "周": (7, "天"), "个月": (30, "天"), "月": (30, "天"), "年": (365, "天"),
+    "个工作日": (1, "工作日"), "工作日": (1, "工作日"),
+    "亩": (1, "亩"), "公顷": (15, "亩"), "平方米": (0.0015, "亩"), "平方公里": (1500, "亩"),
+}
+FRACTION_PREFIXES = {"百分之": "%", "千分之": "‰"}  # 单位写在数值之前的比例，如 “百分之三十”“千分之五”
+SUMMARY_UNITS = {  # 关系上的汇总属性：同一工具下该规范单位的最大值
+    "元": "maxAmountYuan",
+    "%": "maxRatioPercent",
+    "天": "maxDurationDays",
+    "亩": "maxAreaMu",
+}
+
+_CHINESE_DIGITS = {"零": 0, "〇": 0, "一": 1, "二": 2, "两": 2, "三": 3, "四": 4, "五": 5, "六": 6, "七": 7, "八": 8, "九": 9}
+_CHINESE_UNITS = {"十": 10, "百": 100, "千": 1000}
+_NUMBER_PATTERN = r'(?:\d+(?:[,，]\d{3})*(?:\.\d+)?|[零〇一二两三四五六七八九十百千]+)'
+_RANGE_PATTERN = r'(?:-|~|～|—|至|到)'
+_UNIT_PATTERN = "|".join(re.escape(unit) for unit in sorted(UNIT_CONVERSIONS, key=len, reverse=True))
+# 数值 (可为范围 "50-100"、"50%-80%"、"3年至5年"，取上限) + 已知单位 (可带 "/亩" 等分母) 或其他不超过4个字符的计数单位
+_QUANTITY_REGEX = re.compile(
+    rf'(?:{_NUMBER_PATTERN}\s*(?:{_UNIT_PATTERN})?\s*{_RANGE_PATTERN}\s*)?(?P<number>{_NUMBER_PATTERN})\s*'
+    rf'(?:(?P<unit>{_UNIT_PATTERN})(?P<per>/[^\s,，;；/]{{1,4}})?|(?P<other_unit>[^\d\s,，;；:：/()（）\[\]]{{1,4}}))?'
+)
+_FRACTION_PREFIX_PATTERN = "|".join(FRACTION_PREFIXES)
+# 前缀 + 数值，范围写法 “百分之三十至五十”“百分之三十至百分之五十” 同样取上限
+_FRACTION_REGEX = re.compile(
+    rf'(?P<prefix>{_FRACTION_PREFIX_PATTERN})(?:{_NUMBER_PATTERN}\s*{_RANGE_PATTERN}\s*(?:{_FRACTION_PREFIX_PATTERN})?)?'
+    rf'(?P<number>{_NUMBER_PATTERN})'
+)
+# 日期中紧随 “N年”“N月” 之后的 “N月”“N日”，如 “2025年12月31日”
+_DATE_CONTINUATION_REGEX = {
+    "年": re.compile(rf'\s*{_NUMBER_PATTERN}\s*月'),
+    "月": re.compile(rf'\s*{_NUMBER_PATTERN}\s*[日号]'),
+}
+_COMPONENT_REGEX = re.compile(r'\[([^\]]+)\]\s*(.*?)\s*(?=[,，]\s*\[|$)')
+_RATIO_COMBINATION_REGEX = re.compile(r'\d\s*[:：]\s*\d')  # “4:3:3” 这类比例组合没有单一数值
+
+
+def parse_chinese_number(text):
+    """ 解析不含“万/亿”的中文数字，如 “一千五百”“十二”“三”；无法解析时返回 None """
+    if all(char in _CHINESE_DIGITS for char in text):  # 逐位写法，如 “二〇二四”
+        return float("".join(str(_CHINESE_DIGITS[char]) for char in text))
+    total, digit = 0, None
+    for char in text:
+        if char in _CHINESE_DIGITS:
+            digit = _CHINESE_DIGITS[char]
+        elif char in _CHINESE_UNITS:
+            total += (1 if digit is None else digit) * _CHINESE_UNITS[char]
+            digit = None
+        else:
+            return None
+    return float(total + (digit or 0))
+
+
+def parse_number(text):
+    """ 阿拉伯数字 (可带千分位逗号和小数) 或中文数字 """
+    text = text.replace(',', '').replace('，', '')
+    try:
+        return float(text)
+    except ValueError:
+        return parse_chinese_number(text)
+
+
+def _is_ordinal_or_date(match):
+    """
+    数值前为“第” (序号)；四位数 (阿拉伯数字或“二〇二四”这类逐位中文数字) 在 1900-2099 之间且后接“年” (年份)；
+    或是日期的一部分：“N年N月”“N月N日”中的 N年、N月，以及紧跟在“年”“月”之后的 N月、N日。
+    """
+    text, start, unit = match.string, match.start(), match.group('unit')
+    if start > 0 and text[start - 1] == '第':
+        return True
+    number = match.group('number')
+    if unit == '年' and len(number) == 4 and 1900 <= (parse_number(number) or 0) <= 2099:
+        return True
+    if unit in ('月', '日') and start > 0 and text[start - 1] in '年月':
+        return True
+    return unit in _DATE_CONTINUATION_REGEX and bool(_DATE_CONTINUATION_REGEX[unit].match(text, match.end()))
+
+
+def normalize_quantity(text):
+    """
+    从一个组件的原文 (如 “最高100万元”“30%”“5个工作日”“50万元/亩”) 中解析数值并换算为规范单位，
+    返回 (数值, 规范单位)；没有数值时返回 (None, None)。范围写法取上限。
+    “百分之三十”“千分之五”按比例解析；“第一年”等序号、“2024年”“二〇二四年”等年份和“2025年12月31日”等日期
+    不是数量，与 quantitative_snippets._is_quantity 一样跳过。
+
+    >>> normalize_quantity("最高100万元")
+    (1000000.0, '元')
+    >>> normalize_quantity("50%-80%")
+    (80.0, '%')
+    >>> normalize_quantity("3年至5年")
+    (1825.0, '天')
+    >>> normalize_quantity("2024年")
+    (None, None)
+    >>> normalize_quantity("第一年")
+    (None, None)
+    >>> normalize_quantity("百分之三十")
+    (30.0, '%')
+    >>> normalize_quantity("千分之五")
+    (0.5, '%')
+    >>> normalize_quantity("百分之三十至百分之五十")
+    (50.0, '%')
+    >>> normalize_quantity("二〇二四年")
+    (None, None)
+    >>> normalize_quantity("执行至二〇二五年底")
+    (None, None)
+    >>> normalize_quantity("有效期至2025年12月31日")
+    (None, None)
+    >>> normalize_quantity("自2024年1月1日起施行")
+    (None, None)
+    """
+    if _RATIO_COMBINATION_REGEX.search(text or ""):
+        return None, None
+    fraction = _FRACTION_REGEX.search(text or "")
+    match = next((candidate for candidate in _QUANTITY_REGEX.finditer(text or "")
+                  if not _is_ordinal_or_date(candidate)
+                  and not (fraction and fraction.start() <= candidate.start() < fraction.end())), None)
+    if fraction and (not match or fraction.start() <= match.start()):
+        value = parse_number(fraction.group('number'))
+        if value is None:
+            return None, None
+        factor, canonical_unit = UNIT_CONVERSIONS[FRACTION_PREFIXES[fraction.group('prefix')]]
+        return round(value * factor, 6), canonical_unit
+    if not match:
+        return None, None
+    value = parse_number(match.group('number'))
+    if value is None:
+        return None, None
+    if match.group('unit'):
+        factor, canonical_unit = UNIT_CONVERSIONS[match.group('unit')]
+        return round(value * factor, 6), canonical_unit + (match.group('per') or "")
+    return value, match.group('other_unit') or None
+
+
+def parse_quantitative_components(detail_string):
+    """
+    解析一个工具的量化信息 (如 "[补贴金额]100万元, [补贴比例]30%")，
+    返回组件列表 [{'label', 'value', 'unit', 'text'}]；value 为 None 表示该组件没有可解析的数值。
+    """
+    components = []
+    for label, component_text in _COMPONENT_REGEX.findall((detail_string or "").strip()):
+        value, unit = normalize_quantity(component_text)
+        components.append({'label': label.strip(), 'value': value, 'unit': unit, 'text': component_text.strip()})
+    return components
+
+
+def summarize_components(components):
+    """ 每个汇总单位 (元、%、天、亩) 下的最大值，如 {'maxAmountYuan': 1000000.0}；没有该单位时为 None """
+    summary = {property_name: None for property_name in SUMMARY_UNITS.values()}
+    for component in components:
+        property_name = SUMMARY_UNITS.get(component['unit'])
+        if property_name and component['value'] is not None:
+            current = summary[property_name]
+            summary[property_name] = component['value'] if current is None else max(current, component['value'])
+    return summary
+
+
+def main():
+    from policy_records import clean_quantitative_info, parse_quantitative_info
+
+    print(f"正在从 {INPUT_CSV_FILE} 加载数据...")
+    try:
+        df = pd.read_csv(INPUT_CSV_FILE, dtype=str).fillna('')
+    except FileNotFoundError:
+        print(f"错误: 输入文件 '{INPUT_CSV_FILE}' 未找到。")
+        return
+    if QUANTITATIVE_COLUMN not in df.columns:
+        print(f"错误: CSV文件必须包含 '{QUANTITATIVE_COLUMN}' 列。")
+        return
+
+    rows = []
+    for policy_id, quantitative_info in zip(df.get(POLICY_ID_COLUMN, pd.Series([''] * len(df))),
+                                            df[QUANTITATIVE_COLUMN]):
+        for tool_name, detail_string in parse_quantitative_info(clean_quantitative_info(quantitative_info)).items():
+            for component in parse_quantitative_components(detail_string):
+                rows.append({
+                    POLICY_ID_COLUMN: policy_id,
+                    'PolicyTool': tool_name,
+                    'Label': component['label'],
+                    'Value': component['value'],
+                    'Unit': component['unit'],
+                    'OriginalText': component['text'],
+                })
+
+    df_components = pd.DataFrame(rows, columns=[POLICY_ID_COLUMN, 'PolicyTool', 'Label', 'Value', 'Unit', 'OriginalText'])
+    df_components.to_csv(OUTPUT_CSV_FILE, index=False, encoding='utf-8-sig')
+    parsed_count = int(df_components['Value'].notna().sum())
+    print(f"共解析 {len(df_components)} 个量化组件，其中 {parsed_count} 个得到数值，结果已保存到 {OUTPUT_CSV_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import collections
+import re
+
+# --- 量化信息提取的片段选择 ---
+# 量化指标 (如 "[金额]X万元"、"[比例]Y%") 通常只出现在少数带数字和单位的句子中。
+# 在调用 LLM 之前，先把全文切分为句子，用由政策工具名称、组件标签和单位构建的 Aho-Corasick 自动机
+# 一次扫描全文，为每个句子打分，只把得分最高的句子及其上下文发送给 LLM；
+# 全文中找不到任何“数值 + 单位”时返回空字符串，由调用方改为发送 (截断后的) 全文，避免漏掉本地规则未覆盖的写法。
+
+NUMERAL_CHARS = set("0123456789０１２３４５６７８９.．零〇一二两三四五六七八九十百千万亿")
+SENTENCE_DELIMITERS = "。！？；;!?\n"
+EXTRA_UNITS = ["％", "万元", "亿元", "元"]  # 模板中未单独出现但正文常见的单位写法
+SNIPPET_SEPARATOR = "\n……\n"  # 不相邻的片段之间的分隔
+QUANTITY_WEIGHT = 3  # 每个“数值 + 单位”对句子得分的贡献，工具名称和组件标签每次命中贡献 1
+
+# 组件模板形如 "[补贴金额]X万元; [补贴比例]Y%"，方括号内为标签，变量字母之后为单位
+_COMPONENT_REGEX = re.compile(r'\[([^\]]+)\]\s*[A-Z]\s*([^;\[(（）)\s]*)')
+# “百分之三十”“千分之五”这类单位在数值之前的比例写法，不经过自动机单独计数
+_FRACTION_REGEX = re.compile(r'[百千]分之[0-9０-９.．零〇一二两三四五六七八九十百千]+')
+
+
+def build_automaton(keywords):
+    """
+    构建 Aho-Corasick 自动机：goto 为每个状态的转移表，fail 为失败指针，
+    output 为到达该状态时命中的关键词列表 (含通过失败指针继承的后缀关键词)。
+    """
+    goto, fail, output = [{}], [0], [[]]
+    for keyword in keywords:
+        if not keyword:
+            continue
+        state = 0
+        for char in keyword:
+            if char not in goto[state]:
+                goto.append({})
+                fail.append(0)
+                output.append([])
+                goto[state][char] = len(goto) - 1
+            state = goto[state][char]
+        output[state].append(keyword)
+
+    queue = collections.deque(goto[0].values())  # 深度为 1 的状态失败指针指向根
+    while queue:
+        state = queue.popleft()
+        for char, next_state in goto[state].items():
+            queue.append(next_state)
+            fallback = fail[state]
+            while fallback and char not in goto[fallback]:
+                fallback = fail[fallback]
+            fail[next_state] = goto[fallback].get(char, 0)
+            output[next_state] = output[next_state] + output[fail[next_state]]
+    return {'goto': goto, 'fail': fail, 'output': output}
+
+
+def find_keywords(automaton, text):
+    """ 单次扫描 text，返回所有命中 [(起始位置, 关键词)]，同一位置可命中多个关键词 """
+    goto, fail, output = automaton['goto'], automaton['fail'], automaton['output']
+    matches = []
+    state = 0
+    for i, char in enumerate(text):
+        while state and char not in goto[state]:
+            state = fail[state]
+        state = goto[state].get(char, 0)
+        for keyword in output[state]:
+            matches.append((i - len(keyword) + 1, keyword))
+    return matches
+
+
+def build_snippet_matcher(tool_format_map):
+    """ 从 PolicyTool -> 组件模板映射中收集工具名称、组件标签和单位，构建片段选择器 """
+    units, terms = set(EXTRA_UNITS), set(tool_format_map)
+    for component_template in tool_format_map.values():
+        for label, unit in _COMPONENT_REGEX.findall(component_template):
+            terms.add(label)
+            unit = unit.split('/')[0]  # "万元/亩" 等复合单位按主单位匹配
+            if unit and not unit.startswith(':'):
+                units.add(unit)
+    return {
+        'automaton': build_automaton(sorted(units | terms)),
+        'units': units,
+        'terms': terms - units,
+    }
+
+
+def split_sentences(text):
+    """ 按句末标点和换行切分，分隔符保留在句尾；只有空白的片段并入前一句 """
+    sentences, start = [], 0
+    for i, char in enumerate(text):
+        if char in SENTENCE_DELIMITERS:
+            _append_sentence(sentences, text[start:i + 1])
+            start = i + 1
+    _append_sentence(sentences, text[start:])
+    return sentences
+
+
+def _append_sentence(sentences, piece):
+    if piece.strip():
+        sentences.append(piece)
+    elif sentences:
+        sentences[-1] += piece
+
+
+def _is_quantity(sentence, unit_start):
+    """
+    单位前紧跟数字或中文数字时视为一个数量。排除几种常见的非数量写法：
+    “第3条”等序号、“2024年”等年份，以及“一次”“一起”这类单独的“一”。
+    """
+    numeral_start = unit_start
+    while numeral_start > 0 and sentence[numeral_start - 1] in NUMERAL_CHARS:
+        numeral_start -= 1
+    numeral = sentence[numeral_start:unit_start]
+    if not numeral.strip('.．'):
+        return False
+    if numeral_start > 0 and sentence[numeral_start - 1] == '第':
+        return False
+    if numeral == '一':
+        return False
+    if sentence.startswith('年', unit_start) and len(numeral) == 4 and numeral[:2] in ('19', '20'):
+        return False
+    return True
+
+
+def score_sentence(matcher, sentence):
+    """ 返回 (数量个数, 工具名称/组件标签命中次数) """
+    quantities, term_hits = len(_FRACTION_REGEX.findall(sentence)), 0
+    for start, keyword in find_keywords(matcher['automaton'], sentence):
+        if keyword in matcher['units']:
+            quantities += _is_quantity(sentence, start)
+        if keyword in matcher['terms']:
+            term_hits += 1
+    return quantities, term_hits
+
+
+def select_snippets(matcher, text, max_chars, context_sentences=1):
+    """
+    返回 text 中与量化信息相关的片段：含数量的句子按得分从高到低入选 (连同前后 context_sentences 句)，
+    直到总长度达到 max_chars，再按原文顺序拼接。没有任何含数量的句子时返回空字符串，调用方应改用全文。
+    """
+    sentences = split_sentences(text)
+    scored = []
+    for i, sentence in enumerate(sentences):
+        quantities, term_hits = score_sentence(matcher, sentence)
+        if quantities:
+            scored.append((quantities * QUANTITY_WEIGHT + term_hits, i))
+    if not scored:
+        return ""
+
+    selected, total_chars = set(), 0
+    for _, i in sorted(scored, key=lambda item: (-item[0], item[1])):
+        window = [j for j in range(max(0, i - context_sentences), min(len(sentences), i + context_sentences + 1))
+                  if j not in selected]
+        window_chars = sum(len(sentences[j]) for j in window)
+        if selected and total_chars + window_chars > max_chars:
+            continue
+        selected.update(window)
+        total_chars += window_chars
+
+    snippets, previous = [], None
+    for j in sorted(selected):
+        if previous is not None and j != previous + 1:
+            snippets.append(SNIPPET_SEPARATOR)
+        snippets.append(sentences[j])
+        previous = j
+    return "".join(snippets)[:max_chars]
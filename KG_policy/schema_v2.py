@@ -1,101 +1,27 @@
 import pandas as pd
 from neo4j import GraphDatabase, basic_auth
-import re
+import hashlib
+import json
+import time
+
+from fulltext_store import fulltext_store_dir_for
+from policy_records import build_policy_record, build_quantity_properties
 
 # --- 1. Neo4j 连接配置 ---
 URI = "neo4j://localhost:7687"
 NEO4J_USER = "neo4j"
 NEO4J_PASSWORD = "88888888"  # 请确保使用您的密码
+BULK_LOAD_MODE = True  # True: 按批次用 UNWIND 语句导入，每批一个事务；False: 每个节点和关系单独一个事务 (原方式)
+BATCH_SIZE = 500  # 批量模式下每个事务包含的行数
+DELTA_LOAD_MODE = False  # True: 增量导入，只重新导入内容哈希变化的政策，并替换其出边 (优先于 BULK_LOAD_MODE)
+DELTA_DELETE_MISSING_POLICIES = True  # 增量模式下删除图谱中存在、但已不在主数据 CSV 中的政策节点
 
-# --- 2. 数据映射定义 ---
-INDUSTRY_CODE_MAPPING = {
-    "农、林、牧、渔业": "A",
-    "采矿业": "B",
-    "制造业": "C",
-    "电力、热力、燃气及水生产和供应业": "D",
-    "建筑业": "E",
-    "批发和零售业": "F",
-    "交通运输、仓储和邮政业": "G",
-    "住宿和餐饮业": "H",
-    "信息传输、软件和信息技术服务业": "I",
-    "金融业": "J",
-    "房地产业": "K",
-    "租赁和商务服务业": "L",
-    "科学研究和技术服务业": "M",
-    "水利、环境和公共设施管理业": "N",
-    "居民服务、修理和其他服务业": "O",
-    "教育": "P",
-    "卫生和社会工作": "Q",
-    "文化、体育和娱乐业": "R",
-    "公共管理、社会保障和社会组织": "S",
-    "国际组织": "T",
-    "全行业": "Z"
-}
-
-
-# --- 3. Python 端的数据处理函数 ---
-
-def clean_quantitative_info(text_data):
-    """
-    清理QuantitativeInfo列，移除知识抽取失败的特定提示文本。
-    """
-    if not text_data or pd.isna(text_data):
-        return ""
-
-    invalid_substrings = [
-        "政策工具缺失或为空",
-        "未找到可处理的政策工具（均未在格式映射中定义或原始列表为空）"
-    ]
-    cleaned_text = str(text_data).strip()
-    if cleaned_text in invalid_substrings or cleaned_text == '""':
-        return ""
-    return cleaned_text
-
-
-def parse_quantitative_info(quantitative_info_str):
-    """
-    解析 QuantitativeInfo 字符串。
-    格式: "工具A(信息A); 工具B(信息B)"
-    内部信息: "组件1, 组件2"
-    返回: 字典 {"工具A": "信息A", "工具B": "信息B"}
-    """
-    if not quantitative_info_str or pd.isna(quantitative_info_str):
-        return {}
-
-    parsed_details = {}
-    tools_info_parts = re.split(r';\s*', quantitative_info_str.strip())
-
-    for tool_info_part in tools_info_parts:
-        if not tool_info_part.strip():
-            continue
-        match = re.match(r'^(.*?)\(([^)]*)\)$', tool_info_part.strip())
-        if match:
-            tool_name = match.group(1).strip()
-            detail_string = match.group(2).strip()
-            if tool_name:
-                parsed_details[tool_name] = detail_string
-    return parsed_details
-
-
-def process_date_format(date_str):
-    """
-    将日期字符串或Excel数字日期转换为 'YYYY-MM-DD' 格式。
-    """
-    if date_str and isinstance(date_str, str) and re.match(r'^\d{4}\.\d{2}\.\d{2}$', date_str.strip()):
-        return date_str.strip().replace('.', '-')
-    elif date_str and isinstance(date_str, (int, float)) and not pd.isna(date_str):
-        try:
-            return pd.to_datetime(date_str, unit='D', origin='1899-12-30').strftime('%Y-%m-%d')
-        except (ValueError, TypeError):
-            pass
-    return None
-
-
-# --- 4. Neo4j 事务函数 ---
+# --- 2. Neo4j 事务函数 ---
 
 def create_policy_tx(tx, policy_data):
     """
     仅创建或更新政策（Policy）节点本身。
+    逐行导入只合并出边、不删除过期出边，因此清除增量模式写入的 contentHash，下次增量导入时重新替换该政策。
     """
     query = (
         "MERGE (p:Policy {fabaoCitation: $fabaoCitation}) "
@@ -108,7 +34,8 @@ def create_policy_tx(tx, policy_data):
         "    p.title = $title, p.documentNumber = $documentNumber, "
         "    p.announceDate = CASE WHEN $announceDate IS NOT NULL THEN date($announceDate) ELSE null END, "
         "    p.implementDate = CASE WHEN $implementDate IS NOT NULL THEN date($implementDate) ELSE null END, "
-        "    p.policyLevel = $policyLevel, p.validationStatus = $validationStatus, p.fullText = $fullText "
+        "    p.policyLevel = $policyLevel, p.validationStatus = $validationStatus, p.fullText = $fullText, "
+        "    p.contentHash = null "
     )
     tx.run(query, **policy_data)
 
@@ -189,10 +116,11 @@ def link_policy_to_tool_tx(tx, fabao_citation, tool_name, quantitative_detail_va
         "MATCH (p:Policy {fabaoCitation: $fabao_citation}) "
         "MERGE (ptool:PolicyTool {name: $tool_name}) "
         "MERGE (p)-[r:APPLIES_TOOL]->(ptool) "
-        "SET r.quantitativeDetail = $quantitative_detail_value"
+        "SET r.quantitativeDetail = $quantitative_detail_value, r += $quantity_properties"
     )
     tx.run(query, fabao_citation=fabao_citation, tool_name=tool_name_clean,
-           quantitative_detail_value=detail_value_to_set)
+           quantitative_detail_value=detail_value_to_set,
+           quantity_properties=build_quantity_properties(detail_value_to_set))
 
 
 def update_node_properties_tx(tx, node_label, node_identifier_field, node_identifier_value, properties_to_set):
@@ -243,6 +171,289 @@ def link_region_to_parent_tx(tx, child_region_name, parent_region_code):
     tx.run(query, child_name=child_region_name, parent_code=parent_region_code)
 
 
+# --- 3. 批量导入 (UNWIND) 事务函数 ---
+# 每种节点/关系每批只执行一条参数化的 UNWIND 语句，rows 为字典列表，语义与上面的逐条事务函数一致。
+
+def merge_policies_batch_tx(tx, rows):
+    """ 与 create_policy_tx 相同，清除 contentHash；增量模式在重建出边后由 replace_policy_batch_tx 重新写入 """
+    query = (
+        "UNWIND $rows AS row "
+        "MERGE (p:Policy {fabaoCitation: row.fabaoCitation}) "
+        "SET p.title = row.title, p.documentNumber = row.documentNumber, "
+        "    p.announceDate = CASE WHEN row.announceDate IS NOT NULL THEN date(row.announceDate) ELSE null END, "
+        "    p.implementDate = CASE WHEN row.implementDate IS NOT NULL THEN date(row.implementDate) ELSE null END, "
+        "    p.policyLevel = row.policyLevel, p.validationStatus = row.validationStatus, p.fullText = row.fullText, "
+        "    p.contentHash = null"
+    )
+    tx.run(query, rows=rows)
+
+
+def merge_issuers_batch_tx(tx, rows):
+    query = (
+        "UNWIND $rows AS row "
+        "MATCH (p:Policy {fabaoCitation: row.fabaoCitation}) "
+        "MERGE (ib:IssuingBody {fullName: row.fullName}) "
+        "SET ib.shortName = row.shortName "
+        "MERGE (p)-[:ISSUED_BY]->(ib)"
+    )
+    tx.run(query, rows=rows)
+
+
+def merge_simple_links_batch_tx(tx, node_label, relationship_type, node_name_field, rows):
+    query = (
+        f"UNWIND $rows AS row "
+        f"MATCH (p:Policy {{fabaoCitation: row.fabaoCitation}}) "
+        f"MERGE (n:{node_label} {{{node_name_field}: row.name}}) "
+        f"MERGE (p)-[:{relationship_type}]->(n)"
+    )
+    tx.run(query, rows=rows)
+
+
+def merge_industry_links_batch_tx(tx, rows):
+    query = (
+        "UNWIND $rows AS row "
+        "MATCH (p:Policy {fabaoCitation: row.fabaoCitation}) "
+        "MERGE (indf:IndustryFocus {name: row.name}) "
+        "SET indf.code = row.code "
+        "MERGE (p)-[:FOCUSES_ON_INDUSTRY]->(indf)"
+    )
+    tx.run(query, rows=rows)
+
+
+def merge_tool_links_batch_tx(tx, rows):
+    query = (
+        "UNWIND $rows AS row "
+        "MATCH (p:Policy {fabaoCitation: row.fabaoCitation}) "
+        "MERGE (ptool:PolicyTool {name: row.name}) "
+        "MERGE (p)-[r:APPLIES_TOOL]->(ptool) "
+        "SET r.quantitativeDetail = row.quantitativeDetail, r += row.quantityProperties"
+    )
+    tx.run(query, rows=rows)
+
+
+def load_policy_batch_tx(tx, records):
+    """
+    在一个事务中导入一批 build_policy_record 的结果：先合并 Policy 节点，再按类型各用一条 UNWIND 语句建立关系。
+    """
+    merge_policies_batch_tx(tx, [record['policy'] for record in records])
+
+    issuer_rows, industry_rows, tool_rows, link_rows = [], [], [], {}
+    for record in records:
+        fabao_citation = record['policy']['fabaoCitation']
+        issuer_rows.extend({'fabaoCitation': fabao_citation, 'fullName': full_name, 'shortName': short_name}
+                           for full_name, short_name in record['issuers'])
+        for label, rel_type, name_field, item_name in record['links']:
+            link_rows.setdefault((label, rel_type, name_field), []).append(
+                {'fabaoCitation': fabao_citation, 'name': item_name})
+        industry_rows.extend({'fabaoCitation': fabao_citation, 'name': industry_name, 'code': industry_code}
+                             for industry_name, industry_code in record['industries'])
+        for tool_name, detail in record['tools']:
+            detail = detail if detail else None
+            tool_rows.append({'fabaoCitation': fabao_citation, 'name': tool_name, 'quantitativeDetail': detail,
+                              'quantityProperties': build_quantity_properties(detail)})
+
+    if issuer_rows:
+        merge_issuers_batch_tx(tx, issuer_rows)
+    for (label, rel_type, name_field), rows in link_rows.items():
+        merge_simple_links_batch_tx(tx, label, rel_type, name_field, rows)
+    if industry_rows:
+        merge_industry_links_batch_tx(tx, industry_rows)
+    if tool_rows:
+        merge_tool_links_batch_tx(tx, tool_rows)
+
+
+def update_nodes_batch_tx(tx, node_label, node_identifier_field, rows):
+    """ rows 为 [{'id': 标识值, 'properties': {属性: 值}}]；值为 None 的属性会被移除，与 update_node_properties_tx 一致 """
+    query = (
+        f"UNWIND $rows AS row "
+        f"MATCH (n:{node_label} {{{node_identifier_field}: row.id}}) "
+        f"SET n += row.properties"
+    )
+    tx.run(query, rows=rows)
+
+
+def link_regions_to_parents_batch_tx(tx, rows):
+    query = (
+        "UNWIND $rows AS row "
+        "MATCH (child:GeographicRegion {name: row.childName}) "
+        "MATCH (parent:GeographicRegion {code: row.parentCode}) "
+        "MERGE (child)-[:IS_SUBREGION_OF]->(parent)"
+    )
+    tx.run(query, rows=rows)
+
+
+def run_in_batches(session, batch_tx_function, rows, description, *args):
+    """
+    将 rows (可为生成器) 按 BATCH_SIZE 分批，每批调用一次 session.execute_write(batch_tx_function, *args, batch)，
+    并输出进度和吞吐量 (行/秒)。返回导入的总行数。
+    """
+    start_time = time.time()
+    loaded_count = 0
+    batch = []
+
+    def flush():
+        nonlocal loaded_count
+        session.execute_write(batch_tx_function, *args, batch)
+        loaded_count += len(batch)
+        elapsed = time.time() - start_time
+        print(f"{description}: 已处理 {loaded_count} 行 ({loaded_count / elapsed if elapsed > 0 else 0:.1f} 行/秒)")
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            flush()
+            batch = []
+    if batch:
+        flush()
+    elapsed = time.time() - start_time
+    print(f"{description}完成: 共 {loaded_count} 行，用时 {elapsed:.1f} 秒"
+          f" ({loaded_count / elapsed if elapsed > 0 else 0:.1f} 行/秒)。")
+    return loaded_count
+
+
+# --- 4. 增量导入 ---
+# 每个 Policy 节点保存 contentHash (节点属性、所有出边及量化属性的哈希)。增量模式下哈希未变的政策直接跳过，
+# 新增或变化的政策在一个事务中删除原有出边并按当前数据重建，重新抽取后不再残留过期的 APPLIES_TOOL / HAS_TOPIC 等关系。
+
+MANAGED_RELATIONSHIP_TYPES = ["ISSUED_BY", "HAS_TOPIC", "TARGETS_BENEFICIARY", "APPLICABLE_IN", "FOCUSES_ON_INDUSTRY",
+                              "APPLIES_TOOL"]  # 由主数据生成、增量模式下会被替换的政策出边
+
+
+def policy_content_hash(record):
+    """ 计算 build_policy_record 结果的内容哈希；出边按内容排序，单元格内的顺序变化不视为修改 """
+    payload = {
+        'policy': record['policy'],
+        'issuers': sorted(record['issuers'], key=str),
+        'links': sorted(record['links'], key=str),
+        'industries': sorted(record['industries'], key=str),
+        'tools': sorted(((tool_name, detail, build_quantity_properties(detail if detail else None))
+                         for tool_name, detail in record['tools']), key=str),
+    }
+    encoded = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha1(encoded).hexdigest()
+
+
+def merge_policy_records(records):
+    """ 同一 FabaoCitation 出现在多行时合并为一条：节点属性以最后一行为准，出边取并集 (与逐行 MERGE 的结果一致) """
+    if len(records) == 1:
+        return records[0]
+    merged = {'policy': records[-1]['policy']}
+    for key in ('issuers', 'links', 'industries', 'tools'):
+        merged[key] = [item for record in records for item in record[key]]
+    return merged
+
+
+def fetch_policy_hashes_tx(tx):
+    result = tx.run("MATCH (p:Policy) RETURN p.fabaoCitation AS id, p.contentHash AS hash")
+    return {row['id']: row['hash'] for row in result}
+
+
+def _relationship_keys(records):
+    """ 一批政策应有的出边 {(政策编号, 关系类型, 终点名称)} """
+    keys = set()
+    for record in records:
+        fabao_citation = record['policy']['fabaoCitation']
+        keys.update((fabao_citation, "ISSUED_BY", full_name) for full_name, _ in record['issuers'])
+        keys.update((fabao_citation, rel_type, item_name) for _, rel_type, _, item_name in record['links'])
+        keys.update((fabao_citation, "FOCUSES_ON_INDUSTRY", industry_name) for industry_name, _ in record['industries'])
+        keys.update((fabao_citation, "APPLIES_TOOL", tool_name) for tool_name, _ in record['tools'])
+    return keys
+
+
+def replace_policy_batch_tx(tx, records):
+    """
+    在一个事务中替换一批政策：删除其原有出边，按当前数据重建节点和出边，再写入 contentHash。
+    返回被清理的过期关系数 (原有但按当前数据不应存在的出边)。
+    """
+    ids = [record['policy']['fabaoCitation'] for record in records]
+    relationship_pattern = "|".join(MANAGED_RELATIONSHIP_TYPES)
+    result = tx.run(
+        f"UNWIND $ids AS id "
+        f"MATCH (p:Policy {{fabaoCitation: id}})-[r:{relationship_pattern}]->(n) "
+        f"RETURN id, type(r) AS type, coalesce(n.fullName, n.name) AS target",
+        ids=ids)
+    old_keys = {(row['id'], row['type'], row['target']) for row in result}
+    tx.run(
+        f"UNWIND $ids AS id "
+        f"MATCH (p:Policy {{fabaoCitation: id}})-[r:{relationship_pattern}]->() "
+        f"DELETE r",
+        ids=ids)
+
+    load_policy_batch_tx(tx, records)
+    tx.run(
+        "UNWIND $rows AS row "
+        "MATCH (p:Policy {fabaoCitation: row.fabaoCitation}) "
+        "SET p.contentHash = row.contentHash",
+        rows=[{'fabaoCitation': record['policy']['fabaoCitation'], 'contentHash': record['content_hash']}
+              for record in records])
+    return len(old_keys - _relationship_keys(records))
+
+
+def delete_policies_batch_tx(tx, ids):
+    tx.run("UNWIND $ids AS id MATCH (p:Policy {fabaoCitation: id}) DETACH DELETE p", ids=ids)
+
+
+def load_policies_delta(driver, df_policies, fulltext_store_dir):
+    """
+    增量导入主数据，返回计数 {'inserted', 'updated', 'unchanged', 'deleted', 'pruned_relationships'}。
+    deleted 为已不在 CSV 中、被删除的政策数 (DELTA_DELETE_MISSING_POLICIES 为 False 时只统计不删除)。
+    """
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'deleted': 0, 'pruned_relationships': 0}
+    if 'FabaoCitation' not in df_policies.columns:
+        # 没有政策编号时所有行都会被跳过，继续执行会把图谱中的全部政策当作已移除而删除
+        print("错误: 主数据缺少 FabaoCitation 列，跳过增量导入。")
+        return counts
+    rows_by_citation = {}
+    for index, fabao_citation in df_policies['FabaoCitation'].items():
+        if not fabao_citation.strip():
+            print(f"警告: 第 {index + 2} 行缺少 FabaoCitation，跳过此行。")
+            continue
+        rows_by_citation.setdefault(fabao_citation.strip(), []).append(index)
+
+    start_time = time.time()
+    with driver.session(database="neo4j") as session:
+        existing_hashes = session.execute_read(fetch_policy_hashes_tx)
+        print(f"图谱中已有 {len(existing_hashes)} 个政策节点，主数据中有 {len(rows_by_citation)} 条政策。")
+
+        changed_records, checked_count = [], 0
+
+        def flush():
+            counts['pruned_relationships'] += session.execute_write(replace_policy_batch_tx, changed_records)
+            elapsed = time.time() - start_time
+            print(f"增量导入: 已检查 {checked_count} 条政策 (新增 {counts['inserted']}，更新 {counts['updated']}，"
+                  f"未变化 {counts['unchanged']}，{checked_count / elapsed if elapsed > 0 else 0:.1f} 条/秒)")
+
+        for fabao_citation, indices in rows_by_citation.items():
+            record = merge_policy_records([build_policy_record(index, df_policies.loc[index], fulltext_store_dir)
+                                           for index in indices])
+            record['content_hash'] = policy_content_hash(record)
+            checked_count += 1
+            if fabao_citation not in existing_hashes:
+                counts['inserted'] += 1
+            elif existing_hashes[fabao_citation] == record['content_hash']:
+                counts['unchanged'] += 1
+                continue
+            else:
+                counts['updated'] += 1
+            changed_records.append(record)
+            if len(changed_records) >= BATCH_SIZE:
+                flush()
+                changed_records = []
+        if changed_records:
+            flush()
+
+        missing_ids = [fabao_citation for fabao_citation in existing_hashes if fabao_citation not in rows_by_citation]
+        if missing_ids and DELTA_DELETE_MISSING_POLICIES:
+            counts['deleted'] = run_in_batches(session, delete_policies_batch_tx, missing_ids, "删除已移除的政策")
+        elif missing_ids:
+            print(f"提示: 图谱中有 {len(missing_ids)} 个政策已不在主数据中 (DELTA_DELETE_MISSING_POLICIES 为 False，未删除)。")
+
+    elapsed = time.time() - start_time
+    print(f"增量导入完成，用时 {elapsed:.1f} 秒: 新增 {counts['inserted']}，更新 {counts['updated']}，"
+          f"未变化 {counts['unchanged']}，删除 {counts['deleted']} 条政策；清理过期关系 {counts['pruned_relationships']} 条。")
+    return counts
+
+
 # --- 5. 数据库Schema设置函数 ---
 def setup_database_schema(driver):
     """
@@ -306,95 +517,68 @@ def main():
             print(f"错误: 主数据文件 {csv_filepath} 未找到。")
             return
 
+        fulltext_store_dir = fulltext_store_dir_for(csv_filepath)
         print(f"开始从 {csv_filepath} 加载政策数据...")
-        with driver.session(database="neo4j") as session:
-            processed_rows = 0
-            for index, row in df_policies.iterrows():
-                fabao_citation = row.get('FabaoCitation', '').strip()
-                if not fabao_citation:
-                    print(f"警告: 第 {index + 2} 行缺少 FabaoCitation，跳过此行。")
-                    continue
-
-                policy_data = {
-                    "fabaoCitation": fabao_citation,
-                    "title": row.get('Title', '').strip(),
-                    "documentNumber": row.get('DocumentNumber', '').strip(),
-                    "announceDate": process_date_format(row.get('AnnounceDate', '').strip()),
-                    "implementDate": process_date_format(row.get('ImplementDate', '').strip()),
-                    "policyLevel": row.get('Level', '').strip(),
-                    "validationStatus": row.get('Validation', '').strip(),
-                    "fullText": row.get('FullText', '').strip(),
-                }
-                session.execute_write(create_policy_tx, policy_data)
-
-                full_names_str = row.get('IssuingBodyFullName', '')
-                short_names_str = row.get('IssuingBodyShortName', '')
-                full_names = [fn.strip() for fn in str(full_names_str).split(';') if fn.strip()]
-                short_names = [sn.strip() for sn in str(short_names_str).split(';') if sn.strip()]
-
-                if len(full_names) != len(short_names) and full_names:
-                    print(
-                        f"警告 (行 {index + 2}, FabaoCitation: {fabao_citation}): IssuingBodyFullName ({len(full_names)}个) 和 IssuingBodyShortName ({len(short_names)}个) 数量不匹配。")
-
-                for i, full_name_item in enumerate(full_names):
-                    short_name_item = short_names[i] if i < len(short_names) else ''
-                    session.execute_write(link_policy_to_issuer_tx, fabao_citation, full_name_item, short_name_item)
-
-                multi_value_fields_map = {
-                    'PolicyTopic': ("PolicyTopic", "HAS_TOPIC", "name"),
-                    'TargetBeneficiary': ("TargetBeneficiary", "TARGETS_BENEFICIARY", "name"),
-                    'GeographicRegion': ("GeographicRegion", "APPLICABLE_IN", "name"),
-                }
-                for csv_col, (label, rel_type, name_field) in multi_value_fields_map.items():
-                    cell_value = row.get(csv_col, '')
-                    if cell_value:
-                        for item_name in str(cell_value).split(';'):
-                            cleaned_item_name = item_name.strip()
-                            if cleaned_item_name:
-                                session.execute_write(link_policy_to_simple_node_tx, fabao_citation, label, rel_type,
-                                                      name_field, cleaned_item_name)
-
-                industry_focus_str = row.get('IndustryFocus', '')
-                if industry_focus_str:
-                    for industry_name_raw in str(industry_focus_str).split(';'):
-                        industry_name = industry_name_raw.strip()
-                        if industry_name:
-                            industry_code = INDUSTRY_CODE_MAPPING.get(industry_name)
-                            session.execute_write(link_policy_to_industry_focus_tx, fabao_citation, industry_name,
-                                                  industry_code)
-
-                quantitative_info_raw = row.get('QuantitativeInfo', '')
-                cleaned_quant_info_str = clean_quantitative_info(quantitative_info_raw)
-                all_parsed_quant_details = parse_quantitative_info(cleaned_quant_info_str)
-                policy_tool_str = row.get('PolicyTool', '')
-                if policy_tool_str:
-                    for tool_name_raw in str(policy_tool_str).split(';'):
-                        tool_name = tool_name_raw.strip()
-                        if tool_name:
-                            current_tool_detail = all_parsed_quant_details.get(tool_name)
-                            session.execute_write(link_policy_to_tool_tx, fabao_citation, tool_name,
-                                                  current_tool_detail)
-
-                processed_rows += 1
-                if processed_rows % 100 == 0:
-                    print(f"已处理 {processed_rows} 行主政策数据...")
+        if DELTA_LOAD_MODE:
+            load_policies_delta(driver, df_policies, fulltext_store_dir)
+        elif BULK_LOAD_MODE:
+            def iter_policy_records():
+                for index, row in df_policies.iterrows():
+                    record = build_policy_record(index, row, fulltext_store_dir)
+                    if record is None:
+                        print(f"警告: 第 {index + 2} 行缺少 FabaoCitation，跳过此行。")
+                        continue
+                    yield record
+
+            with driver.session(database="neo4j") as session:
+                processed_rows = run_in_batches(session, load_policy_batch_tx, iter_policy_records(), "主政策数据")
             print(f"主政策数据加载完成。总共处理了 {processed_rows} 行有效数据。")
+        else:
+            with driver.session(database="neo4j") as session:
+                processed_rows = 0
+                for index, row in df_policies.iterrows():
+                    record = build_policy_record(index, row, fulltext_store_dir)
+                    if record is None:
+                        print(f"警告: 第 {index + 2} 行缺少 FabaoCitation，跳过此行。")
+                        continue
+
+                    fabao_citation = record['policy']['fabaoCitation']
+                    session.execute_write(create_policy_tx, record['policy'])
+                    for full_name_item, short_name_item in record['issuers']:
+                        session.execute_write(link_policy_to_issuer_tx, fabao_citation, full_name_item, short_name_item)
+                    for label, rel_type, name_field, item_name in record['links']:
+                        session.execute_write(link_policy_to_simple_node_tx, fabao_citation, label, rel_type,
+                                              name_field, item_name)
+                    for industry_name, industry_code in record['industries']:
+                        session.execute_write(link_policy_to_industry_focus_tx, fabao_citation, industry_name,
+                                              industry_code)
+                    for tool_name, current_tool_detail in record['tools']:
+                        session.execute_write(link_policy_to_tool_tx, fabao_citation, tool_name, current_tool_detail)
+
+                    processed_rows += 1
+                    if processed_rows % 100 == 0:
+                        print(f"已处理 {processed_rows} 行主政策数据...")
+                print(f"主政策数据加载完成。总共处理了 {processed_rows} 行有效数据。")
 
         # ---- C. 加载映射表数据并更新节点 ----
         policy_tool_xlsx_path = 'policy_tool.xlsx'
         try:
             df_tool_categories = pd.read_excel(policy_tool_xlsx_path, dtype=str).fillna('')
             print(f"开始从 {policy_tool_xlsx_path} 加载政策工具分类...")
-            updated_tools_count = 0
+            tool_rows = []
+            for _, row_map in df_tool_categories.iterrows():
+                tool_name = row_map.get('PolicyTool', '').strip()
+                category = row_map.get('Category', '').strip()
+                if tool_name:
+                    tool_rows.append({'id': tool_name, 'properties': {"category": category if category else None}})
             with driver.session(database="neo4j") as session:
-                for _, row_map in df_tool_categories.iterrows():
-                    tool_name = row_map.get('PolicyTool', '').strip()
-                    category = row_map.get('Category', '').strip()
-                    if tool_name:
-                        properties_to_set = {"category": category if category else None}
-                        session.execute_write(update_node_properties_tx, "PolicyTool", "name", tool_name,
-                                              properties_to_set)
-                        updated_tools_count += 1
+                if BULK_LOAD_MODE:
+                    run_in_batches(session, update_nodes_batch_tx, tool_rows, "政策工具分类", "PolicyTool", "name")
+                else:
+                    for tool_row in tool_rows:
+                        session.execute_write(update_node_properties_tx, "PolicyTool", "name", tool_row['id'],
+                                              tool_row['properties'])
+            updated_tools_count = len(tool_rows)
             print(f"政策工具分类更新完成。尝试更新了 {updated_tools_count} 个工具。")
         except FileNotFoundError:
             print(f"警告: 工具分类映射文件 {policy_tool_xlsx_path} 未找到。跳过此步骤。")
@@ -405,38 +589,48 @@ def main():
         try:
             df_area_codes = pd.read_excel(area_code_xlsx_path, dtype=str).fillna('')
             print(f"开始从 {area_code_xlsx_path} 加载行政区划信息并建立层级关系...")
-            updated_areas_count = 0
+            area_rows = []
+            for _, row_map in df_area_codes.iterrows():
+                area_name = row_map.get('Name', '').strip()
+                if area_name:
+                    properties = {
+                        "code": str(row_map.get('Code', '')).strip() or None,
+                        "level": str(row_map.get('Level', '')).strip() or None
+                    }
+                    properties = {k: v for k, v in properties.items() if v is not None}
+                    if properties:  # 只有当有实际属性需要更新时才执行
+                        area_rows.append({'id': area_name, 'properties': properties})
 
             with driver.session(database="neo4j") as session:
                 print("第一遍：更新行政区划节点属性...")
-                for _, row_map in df_area_codes.iterrows():
-                    area_name = row_map.get('Name', '').strip()
-                    if area_name:
-                        properties = {
-                            "code": str(row_map.get('Code', '')).strip() or None,
-                            "level": str(row_map.get('Level', '')).strip() or None
-                        }
-                        properties = {k: v for k, v in properties.items() if v is not None}
-                        if properties:  # 只有当有实际属性需要更新时才执行
-                            session.execute_write(update_node_properties_tx, "GeographicRegion", "name", area_name,
-                                                  properties)
-                            updated_areas_count += 1
-                print(f"行政区划节点属性更新完成。尝试更新了 {updated_areas_count} 个区域的属性。")
+                if BULK_LOAD_MODE:
+                    run_in_batches(session, update_nodes_batch_tx, area_rows, "行政区划属性", "GeographicRegion", "name")
+                else:
+                    for area_row in area_rows:
+                        session.execute_write(update_node_properties_tx, "GeographicRegion", "name", area_row['id'],
+                                              area_row['properties'])
+            updated_areas_count = len(area_rows)
+            print(f"行政区划节点属性更新完成。尝试更新了 {updated_areas_count} 个区域的属性。")
 
             print("第二遍：建立行政区划层级关系...")
-            linked_regions_count = 0
+            region_link_rows = []
             skipped_top_level_regions = 0
+            for _, row_map in df_area_codes.iterrows():
+                child_area_name = row_map.get('Name', '').strip()
+                parent_area_code = str(row_map.get('Pcode', '')).strip()
+
+                if child_area_name and parent_area_code:
+                    if parent_area_code == "0":  # 如果Pcode为"0"，则为顶级区域，不创建父级链接
+                        skipped_top_level_regions += 1
+                        continue
+                    region_link_rows.append({'childName': child_area_name, 'parentCode': parent_area_code})
             with driver.session(database="neo4j") as session:
-                for _, row_map in df_area_codes.iterrows():
-                    child_area_name = row_map.get('Name', '').strip()
-                    parent_area_code = str(row_map.get('Pcode', '')).strip()
-
-                    if child_area_name and parent_area_code:
-                        if parent_area_code == "0":  # 如果Pcode为"0"，则为顶级区域，不创建父级链接
-                            skipped_top_level_regions += 1
-                            continue
-                        session.execute_write(link_region_to_parent_tx, child_area_name, parent_area_code)
-                        linked_regions_count += 1
+                if BULK_LOAD_MODE:
+                    run_in_batches(session, link_regions_to_parents_batch_tx, region_link_rows, "行政区划层级关系")
+                else:
+                    for link_row in region_link_rows:
+                        session.execute_write(link_region_to_parent_tx, link_row['childName'], link_row['parentCode'])
+            linked_regions_count = len(region_link_rows)
             print(
                 f"行政区划层级关系建立尝试完成。尝试链接了 {linked_regions_count} 个区域。跳过了 {skipped_top_level_regions} 个顶级区域的父级链接。")
 
@@ -0,0 +1,168 @@
+import argparse
+import os
+import random
+
+import pandas as pd
+
+# --- 合成语料生成器 ---
+# 按 data_clean.py 期望的目录结构生成分类文件夹：<分类>/<分类>目录.xlsx 与 <分类>/<分类>全文/*.txt，
+# 全文带有法宝引证码头部、重复标题行、发文字号行，并混合 UTF-8 / UTF-8-BOM / GBK 编码和不同换行符，
+# 用于在没有北大法宝语料的环境中做性能基准和回归检查。相同参数和随机种子总是生成相同的语料。
+
+# --- 配置信息 ---
+OUTPUT_DIR = "synthetic_corpus"
+CATEGORIES = [
+    "部门规范性文件",
+    "党内法规制度",
+    "地方性法规",
+    "地方性规范文件",
+    "地方政府规章",
+    "法律",
+    "行政法规"
+]
+FILES_PER_CATEGORY = 200  # 每个分类的目录条目数
+BODY_PARAGRAPHS = (5, 60)  # 每篇正文段落数范围
+DUPLICATE_TITLE_RATIO = 0.1  # 与其他条目 (可能跨分类) 标题相同的比例，用于覆盖标题去重
+MISSING_FILE_RATIO = 0.05  # 目录中有记录但没有全文文件的比例
+GBK_RATIO = 0.3  # 以 GBK 编码保存的全文比例
+UTF8_BOM_RATIO = 0.1  # 以带 BOM 的 UTF-8 保存的全文比例
+DOC_NUM_LINE_RATIO = 0.6  # 标题之后带发文字号行的比例
+EMPTY_DOC_NUM_RATIO = 0.5  # 目录中 '发文字号' 为空 (需要从全文回填) 的比例
+RANDOM_SEED = 20240501
+
+_ISSUERS = ["国务院", "国务院办公厅", "国家发展和改革委员会", "财政部", "国家税务总局", "浙江省人民政府",
+            "浙江省人民政府办公厅", "杭州市人民政府", "宁波市人民政府", "浙江省财政厅;浙江省税务局"]
+_DOC_PREFIXES = ["国发", "国办发", "发改体改", "财税", "浙政发", "浙政办发", "杭政", "甬政发"]
+_LEVELS = ["行政法规", "部门规范性文件", "地方性法规", "地方政府规章", "地方规范性文件"]
+_TITLE_PARTS = ["关于", "促进", "支持", "民营经济", "中小企业", "高质量发展", "营商环境", "若干", "措施",
+                "意见", "实施办法", "通知", "暂行规定", "财政补贴", "融资担保", "科技创新", "数字经济"]
+_BODY_SENTENCES = [
+    "为贯彻落实党中央、国务院决策部署，进一步激发民营经济活力，制定本办法。",
+    "对符合条件的小微企业，按实际贷款额的{pct}%给予贴息，单户最高不超过{wan}万元。",
+    "新认定的高新技术企业给予一次性奖励{wan}万元。",
+    "审批时限压缩至{days}个工作日以内。",
+    "各地要加强组织领导，明确责任分工，确保各项政策落地见效。",
+    "对新增用地{mu}亩以上的制造业项目，优先保障用地指标。",
+    "本办法自印发之日起施行，有效期{years}年。",
+]
+
+
+def random_title(rng):
+    """ 随机拼接一个政策标题 """
+    parts = rng.sample(_TITLE_PARTS, rng.randint(3, 7))
+    return rng.choice(["", "浙江省", "杭州市", "国务院"]) + "".join(parts)
+
+
+def random_doc_num(rng):
+    """ 随机生成一个发文字号，格式覆盖 〔〕、[] 与全角括号包裹的写法 """
+    doc_num = f"{rng.choice(_DOC_PREFIXES)}〔{rng.randint(2000, 2024)}〕{rng.randint(1, 120)}号"
+    return rng.choice([doc_num, f"（{doc_num}）", doc_num.replace('〔', '[').replace('〕', ']')])
+
+
+def random_body(rng):
+    """ 随机生成正文段落 """
+    paragraphs = []
+    for i in range(rng.randint(*BODY_PARAGRAPHS)):
+        sentence = rng.choice(_BODY_SENTENCES).format(
+            pct=rng.randint(10, 80), wan=rng.randint(5, 500), days=rng.randint(3, 30),
+            mu=rng.randint(10, 200), years=rng.randint(1, 5))
+        paragraphs.append(rng.choice(["", "　　"]) + f"第{i + 1}条 " + sentence * rng.randint(1, 4))
+        if rng.random() < 0.2:
+            paragraphs.append("")
+    return paragraphs
+
+
+def policy_text_bytes(rng, title, citation, doc_num):
+    """ 组装一篇全文 (头部元数据 + 重复标题 + 发文字号 + 正文) 并按随机编码和换行符编码为字节 """
+    lines = [f"【法宝引证码】{citation}"]
+    if rng.random() < 0.5:
+        lines.append(f"原文链接：https://www.pkulaw.com/{citation}.html")
+    if rng.random() < 0.3:
+        lines.append("")
+    lines.append(rng.choice(["", "  "]) + title)
+    if rng.random() < 0.2:
+        lines.append(title[:20])
+    if doc_num and rng.random() < DOC_NUM_LINE_RATIO:
+        lines.append(doc_num)
+    lines.extend(random_body(rng))
+
+    newline = rng.choice(["\n", "\r\n", "\r"])
+    text = newline.join(lines) + rng.choice(["", newline])
+    roll = rng.random()
+    if roll < GBK_RATIO:
+        return text.encode('gbk', errors='replace')
+    if roll < GBK_RATIO + UTF8_BOM_RATIO:
+        return text.encode('utf-8-sig')
+    return text.encode('utf-8')
+
+
+def generate_corpus(output_dir, files_per_category=FILES_PER_CATEGORY, categories=CATEGORIES, seed=RANDOM_SEED):
+    """
+    在 output_dir 下生成合成语料，返回统计字典 (分类数、目录条目数、全文文件数、总字节数)。
+    """
+    rng = random.Random(seed)
+    stats = {'categories': 0, 'catalog_rows': 0, 'files': 0, 'bytes': 0}
+    used_titles = []
+    citation_counter = 0
+
+    for category_index, category in enumerate(categories):
+        text_dirpath = os.path.join(output_dir, category, f"{category}全文")
+        os.makedirs(text_dirpath, exist_ok=True)
+        rows = []
+        for i in range(files_per_category):
+            if used_titles and rng.random() < DUPLICATE_TITLE_RATIO:
+                title = rng.choice(used_titles)
+            else:
+                title = random_title(rng) + f"（第{category_index}-{i}号）"
+            used_titles.append(title)
+            citation_counter += 1
+            # 引证码加括号共 18 个字符，与 data_clean.extract_id_from_path 截取文件名末尾 18 个字符的约定一致
+            citation = f"CLI.{category_index + 1}.{5000000000 + citation_counter}"
+            doc_num = random_doc_num(rng)
+
+            rows.append({
+                '序号': i + 1,
+                '标题': title,
+                '发文字号': '' if rng.random() < EMPTY_DOC_NUM_RATIO else doc_num.strip('（）'),
+                '效力级别': rng.choice(_LEVELS),
+                '制定机关': rng.choice(_ISSUERS),
+                '公布日期': f"{rng.randint(2000, 2024)}.{rng.randint(1, 12):02d}.{rng.randint(1, 28):02d}",
+                # 部分分类只有 '实施日期'，覆盖 data_clean.py 的日期列合并
+                ('实施日期' if category_index % 2 else '施行日期'): f"{rng.randint(2000, 2024)}.01.01",
+            })
+            if rng.random() < MISSING_FILE_RATIO:
+                continue
+
+            # 文件名为标题 (可能被截断) 加法宝引证码，与北大法宝导出的命名方式一致
+            filename_title = title if rng.random() < 0.7 else title[:rng.randint(21, max(21, len(title)))]
+            filename = f"{filename_title}({citation}){rng.choice(['.txt', '.TXT'])}"
+            data = policy_text_bytes(rng, title, citation, doc_num)
+            file_path = os.path.join(text_dirpath, filename)
+            if os.path.exists(file_path):
+                continue
+            with open(file_path, 'wb') as f:
+                f.write(data)
+            stats['files'] += 1
+            stats['bytes'] += len(data)
+
+        pd.DataFrame(rows).to_excel(os.path.join(output_dir, category, f"{category}目录.xlsx"), index=False)
+        stats['categories'] += 1
+        stats['catalog_rows'] += len(rows)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成 data_clean.py 使用的合成政策语料")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--files-per-category", type=int, default=FILES_PER_CATEGORY)
+    parser.add_argument("--seed", type=int, default=RANDOM_SEED)
+    args = parser.parse_args()
+
+    print(f"正在生成合成语料到 {args.output_dir} (每个分类 {args.files_per_category} 条，随机种子 {args.seed})...")
+    stats = generate_corpus(args.output_dir, args.files_per_category, seed=args.seed)
+    print(f"生成完成：{stats['categories']} 个分类，{stats['catalog_rows']} 条目录记录，"
+          f"{stats['files']} 个全文文件，共 {stats['bytes'] / 1024 / 1024:.2f} MB。")
+
+
+if __name__ == "__main__":
+    main()